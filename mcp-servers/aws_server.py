@@ -6,14 +6,29 @@ AWS operations via boto3.
 import os
 import json
 import asyncio
+import threading
 from mcp.server import Server
 from mcp.types import Tool, TextContent
 
+# Configuration
+DEFAULT_REGION = os.getenv("AWS_REGION", os.getenv("AWS_DEFAULT_REGION", "eu-central-1"))
+DEFAULT_PROFILE = os.getenv("AWS_PROFILE") or None
+MAX_POOL_CONNECTIONS = int(os.getenv("MCP_AWS_MAX_POOL", "20"))
+WARMUP_SERVICES = [s.strip() for s in os.getenv("MCP_AWS_WARMUP", "ec2,s3,lambda,cloudwatch,logs,rds,ecs").split(",") if s.strip()]
+CREDENTIAL_REFRESH_INTERVAL = 60
+
 # Lazy import boto3 to avoid errors if not installed
 boto3 = None
 
 server = Server("aws-mcp")
 
+# Sessions by profile and clients by (service, region, profile). Clients are
+# thread-safe once built; building them from a shared session is not.
+_sessions = {}
+_clients = {}
+_client_lock = threading.Lock()
+_background = None
+
 def get_boto3():
     """Lazy load boto3."""
     global boto3
@@ -22,10 +37,76 @@ def get_boto3():
         boto3 = b3
     return boto3
 
+def client_config():
+    from botocore.config import Config
+    return Config(
+        max_pool_connections=MAX_POOL_CONNECTIONS,
+        retries={"mode": "adaptive", "max_attempts": 5},
+        tcp_keepalive=True,
+        connect_timeout=5,
+        read_timeout=60
+    )
+
+def get_session(profile: str = None):
+    profile = profile or DEFAULT_PROFILE
+    if profile not in _sessions:
+        _sessions[profile] = get_boto3().session.Session(profile_name=profile)
+    return _sessions[profile]
+
+def get_client(service: str, region: str = None, profile: str = None):
+    """Cached boto3 client; built once per (service, region, profile)."""
+    key = (service, region, profile or DEFAULT_PROFILE)
+    client = _clients.get(key)
+    if client is None:
+        with _client_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = get_session(profile).client(service, region_name=region, config=client_config())
+                _clients[key] = client
+    return client
+
+async def client_for(service: str, region: str = None, profile: str = None):
+    """get_client for the event loop: uncached clients are built in a worker thread,
+    since building one can wait on the lock (warmup) and on credential resolution."""
+    client = _clients.get((service, region, profile or DEFAULT_PROFILE))
+    if client is None:
+        client = await asyncio.to_thread(get_client, service, region, profile)
+    return client
+
+def refresh_credentials():
+    """Touch each session's credentials so refreshable ones (assume-role, SSO,
+    instance metadata) renew here rather than inside a tool call."""
+    for session in list(_sessions.values()):
+        credentials = session.get_credentials()
+        if credentials is not None:
+            credentials.get_frozen_credentials()
+
+async def background_tasks():
+    """Warm up clients for the common services, then keep credentials fresh."""
+    try:
+        with_region = [(s, None if s == "s3" else DEFAULT_REGION) for s in WARMUP_SERVICES]
+        for service, region in with_region:
+            await asyncio.to_thread(get_client, service, region)
+        await asyncio.to_thread(refresh_credentials)
+    except Exception:
+        # Warmup is best effort; the tool call will surface real errors
+        pass
+    while True:
+        await asyncio.sleep(CREDENTIAL_REFRESH_INTERVAL)
+        try:
+            await asyncio.to_thread(refresh_credentials)
+        except Exception:
+            pass
+
+def ensure_background():
+    global _background
+    if _background is None:
+        _background = asyncio.create_task(background_tasks())
+
 @server.list_tools()
 async def list_tools():
     """List available tools."""
-    return [
+    tools = [
         # EC2
         Tool(
             name="aws_ec2_list",
@@ -34,7 +115,7 @@ async def list_tools():
                 "type": "object",
                 "properties": {
                     "filters": {"type": "array", "description": "Instance filters", "items": {"type": "object"}},
-                    "region": {"type": "string", "default": "eu-central-1"}
+                    "region": {"type": "string", "default": DEFAULT_REGION}
                 }
             }
         ),
@@ -45,7 +126,7 @@ async def list_tools():
                 "type": "object",
                 "properties": {
                     "instance_id": {"type": "string"},
-                    "region": {"type": "string", "default": "eu-central-1"}
+                    "region": {"type": "string", "default": DEFAULT_REGION}
                 },
                 "required": ["instance_id"]
             }
@@ -76,7 +157,7 @@ async def list_tools():
             inputSchema={
                 "type": "object",
                 "properties": {
-                    "region": {"type": "string", "default": "eu-central-1"}
+                    "region": {"type": "string", "default": DEFAULT_REGION}
                 }
             }
         ),
@@ -87,7 +168,7 @@ async def list_tools():
                 "type": "object",
                 "properties": {
                     "function_name": {"type": "string"},
-                    "region": {"type": "string", "default": "eu-central-1"}
+                    "region": {"type": "string", "default": DEFAULT_REGION}
                 },
                 "required": ["function_name"]
             }
@@ -100,7 +181,7 @@ async def list_tools():
                 "type": "object",
                 "properties": {
                     "state": {"type": "string", "enum": ["ALARM", "OK", "INSUFFICIENT_DATA"]},
-                    "region": {"type": "string", "default": "eu-central-1"}
+                    "region": {"type": "string", "default": DEFAULT_REGION}
                 }
             }
         ),
@@ -114,7 +195,7 @@ async def list_tools():
                     "filter_pattern": {"type": "string", "default": ""},
                     "start_time": {"type": "integer", "description": "Unix timestamp in ms"},
                     "limit": {"type": "integer", "default": 50},
-                    "region": {"type": "string", "default": "eu-central-1"}
+                    "region": {"type": "string", "default": DEFAULT_REGION}
                 },
                 "required": ["log_group"]
             }
@@ -126,7 +207,7 @@ async def list_tools():
             inputSchema={
                 "type": "object",
                 "properties": {
-                    "region": {"type": "string", "default": "eu-central-1"}
+                    "region": {"type": "string", "default": DEFAULT_REGION}
                 }
             }
         ),
@@ -137,7 +218,7 @@ async def list_tools():
             inputSchema={
                 "type": "object",
                 "properties": {
-                    "region": {"type": "string", "default": "eu-central-1"}
+                    "region": {"type": "string", "default": DEFAULT_REGION}
                 }
             }
         ),
@@ -148,7 +229,7 @@ async def list_tools():
                 "type": "object",
                 "properties": {
                     "cluster": {"type": "string"},
-                    "region": {"type": "string", "default": "eu-central-1"}
+                    "region": {"type": "string", "default": DEFAULT_REGION}
                 },
                 "required": ["cluster"]
             }
@@ -161,19 +242,26 @@ async def list_tools():
         )
     ]
 
+    for tool in tools:
+        tool.inputSchema["properties"]["profile"] = {"type": "string", "description": "AWS profile (default: AWS_PROFILE)"}
+
+    return tools
+
 @server.call_tool()
 async def call_tool(name: str, arguments: dict) -> list:
     """Execute tool calls."""
     try:
-        b3 = get_boto3()
-        region = arguments.get("region", "eu-central-1")
+        ensure_background()
+        region = arguments.get("region", DEFAULT_REGION)
+        profile = arguments.get("profile")
 
         # EC2
         if name == "aws_ec2_list":
-            ec2 = b3.client("ec2", region_name=region)
+            ec2 = await client_for("ec2", region, profile)
             filters = arguments.get("filters", [])
 
-            response = ec2.describe_instances(Filters=filters) if filters else ec2.describe_instances()
+            # boto3 calls block: run them in a worker thread (clients are thread-safe)
+            response = await asyncio.to_thread(ec2.describe_instances, **({"Filters": filters} if filters else {}))
 
             instances = []
             for reservation in response.get("Reservations", []):
@@ -191,29 +279,29 @@ async def call_tool(name: str, arguments: dict) -> list:
             return [TextContent(type="text", text=json.dumps(instances, indent=2))]
 
         elif name == "aws_ec2_describe":
-            ec2 = b3.client("ec2", region_name=region)
+            ec2 = await client_for("ec2", region, profile)
             instance_id = arguments.get("instance_id")
 
-            response = ec2.describe_instances(InstanceIds=[instance_id])
+            response = await asyncio.to_thread(ec2.describe_instances, InstanceIds=[instance_id])
             instance = response["Reservations"][0]["Instances"][0]
 
             return [TextContent(type="text", text=json.dumps(instance, indent=2, default=str))]
 
         # S3
         elif name == "aws_s3_list_buckets":
-            s3 = b3.client("s3")
-            response = s3.list_buckets()
+            s3 = await client_for("s3", None, profile)
+            response = await asyncio.to_thread(s3.list_buckets)
 
             buckets = [{"name": b["Name"], "created": str(b["CreationDate"])} for b in response.get("Buckets", [])]
             return [TextContent(type="text", text=json.dumps(buckets, indent=2))]
 
         elif name == "aws_s3_list_objects":
-            s3 = b3.client("s3")
+            s3 = await client_for("s3", None, profile)
             bucket = arguments.get("bucket")
             prefix = arguments.get("prefix", "")
             max_keys = arguments.get("max_keys", 100)
 
-            response = s3.list_objects_v2(Bucket=bucket, Prefix=prefix, MaxKeys=max_keys)
+            response = await asyncio.to_thread(s3.list_objects_v2, Bucket=bucket, Prefix=prefix, MaxKeys=max_keys)
 
             objects = []
             for obj in response.get("Contents", []):
@@ -232,8 +320,8 @@ async def call_tool(name: str, arguments: dict) -> list:
 
         # Lambda
         elif name == "aws_lambda_list":
-            lam = b3.client("lambda", region_name=region)
-            response = lam.list_functions()
+            lam = await client_for("lambda", region, profile)
+            response = await asyncio.to_thread(lam.list_functions)
 
             functions = []
             for f in response.get("Functions", []):
@@ -248,21 +336,21 @@ async def call_tool(name: str, arguments: dict) -> list:
             return [TextContent(type="text", text=json.dumps(functions, indent=2))]
 
         elif name == "aws_lambda_get":
-            lam = b3.client("lambda", region_name=region)
+            lam = await client_for("lambda", region, profile)
             function_name = arguments.get("function_name")
 
-            response = lam.get_function(FunctionName=function_name)
+            response = await asyncio.to_thread(lam.get_function, FunctionName=function_name)
             return [TextContent(type="text", text=json.dumps(response, indent=2, default=str))]
 
         # CloudWatch
         elif name == "aws_cloudwatch_alarms":
-            cw = b3.client("cloudwatch", region_name=region)
+            cw = await client_for("cloudwatch", region, profile)
             state = arguments.get("state")
 
             if state:
-                response = cw.describe_alarms(StateValue=state)
+                response = await asyncio.to_thread(cw.describe_alarms, StateValue=state)
             else:
-                response = cw.describe_alarms()
+                response = await asyncio.to_thread(cw.describe_alarms)
 
             alarms = []
             for alarm in response.get("MetricAlarms", []):
@@ -277,7 +365,7 @@ async def call_tool(name: str, arguments: dict) -> list:
             return [TextContent(type="text", text=json.dumps(alarms, indent=2))]
 
         elif name == "aws_cloudwatch_logs":
-            logs = b3.client("logs", region_name=region)
+            logs = await client_for("logs", region, profile)
             log_group = arguments.get("log_group")
             filter_pattern = arguments.get("filter_pattern", "")
             limit = arguments.get("limit", 50)
@@ -285,7 +373,8 @@ async def call_tool(name: str, arguments: dict) -> list:
             import time
             start_time = arguments.get("start_time", int((time.time() - 3600) * 1000))  # Last hour
 
-            response = logs.filter_log_events(
+            response = await asyncio.to_thread(
+                logs.filter_log_events,
                 logGroupName=log_group,
                 filterPattern=filter_pattern,
                 startTime=start_time,
@@ -303,8 +392,8 @@ async def call_tool(name: str, arguments: dict) -> list:
 
         # RDS
         elif name == "aws_rds_list":
-            rds = b3.client("rds", region_name=region)
-            response = rds.describe_db_instances()
+            rds = await client_for("rds", region, profile)
+            response = await asyncio.to_thread(rds.describe_db_instances)
 
             instances = []
             for db in response.get("DBInstances", []):
@@ -320,22 +409,22 @@ async def call_tool(name: str, arguments: dict) -> list:
 
         # ECS
         elif name == "aws_ecs_clusters":
-            ecs = b3.client("ecs", region_name=region)
-            response = ecs.list_clusters()
+            ecs = await client_for("ecs", region, profile)
+            response = await asyncio.to_thread(ecs.list_clusters)
 
             clusters = response.get("clusterArns", [])
             return [TextContent(type="text", text=json.dumps(clusters, indent=2))]
 
         elif name == "aws_ecs_services":
-            ecs = b3.client("ecs", region_name=region)
+            ecs = await client_for("ecs", region, profile)
             cluster = arguments.get("cluster")
 
-            response = ecs.list_services(cluster=cluster)
+            response = await asyncio.to_thread(ecs.list_services, cluster=cluster)
             services = response.get("serviceArns", [])
 
             # Get service details
             if services:
-                details = ecs.describe_services(cluster=cluster, services=services[:10])
+                details = await asyncio.to_thread(ecs.describe_services, cluster=cluster, services=services[:10])
                 service_info = []
                 for svc in details.get("services", []):
                     service_info.append({
@@ -350,14 +439,15 @@ async def call_tool(name: str, arguments: dict) -> list:
 
         # Cost
         elif name == "aws_cost_today":
-            ce = b3.client("ce", region_name="us-east-1")  # Cost Explorer is global
+            ce = await client_for("ce", "us-east-1", profile)  # Cost Explorer is global
             from datetime import date, timedelta
 
             today = date.today()
             start = today.strftime("%Y-%m-%d")
             end = (today + timedelta(days=1)).strftime("%Y-%m-%d")
 
-            response = ce.get_cost_and_usage(
+            response = await asyncio.to_thread(
+                ce.get_cost_and_usage,
                 TimePeriod={"Start": start, "End": end},
                 Granularity="DAILY",
                 Metrics=["UnblendedCost"]
@@ -386,6 +476,7 @@ if __name__ == "__main__":
     from mcp.server.stdio import stdio_server
 
     async def main():
+        ensure_background()
         async with stdio_server() as (read_stream, write_stream):
             await server.run(read_stream, write_stream, server.create_initialization_options())
 
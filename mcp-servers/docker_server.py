@@ -1,32 +1,922 @@
 #!/usr/bin/env python3
 """
 Docker MCP Server for Codex CLI
-Container management and monitoring.
+Container management and monitoring via the Docker Engine API.
 """
 import os
+import re
 import json
+import time
+import struct
 import asyncio
-import subprocess
+from datetime import datetime, timezone
+from collections import defaultdict
+import httpx
 from mcp.server import Server
 from mcp.types import Tool, TextContent
 
 # Configuration
 READONLY = os.getenv("MCP_DOCKER_READONLY", "true").lower() == "true"
+DOCKER_HOST = os.getenv("DOCKER_HOST", "unix:///var/run/docker.sock")
+DOCKER_API_VERSION = os.getenv("DOCKER_API_VERSION", "")
+DOCKER_TLS_VERIFY = os.getenv("DOCKER_TLS_VERIFY", "") not in ("", "0")
+DOCKER_CERT_PATH = os.getenv("DOCKER_CERT_PATH", "~/.docker")
+TIMEOUT = int(os.getenv("MCP_DOCKER_TIMEOUT", "30"))
+LOG_MAX_BYTES = int(os.getenv("MCP_DOCKER_LOG_MAX_BYTES", "200000"))  # per response
+LOG_READ_BYTES = 5 * 1024 * 1024  # per container read
+# Keep an events-driven in-memory inventory of containers, images, networks and volumes
+INVENTORY = os.getenv("MCP_DOCKER_INVENTORY", "false").lower() == "true"
+
+# Connection pool size, and how many of those long-lived stats streams may hold at once
+MAX_CONNECTIONS = 50
+STATS_STREAMS = 32
+
+# Newest Engine API version this server is written against; older daemons are negotiated down
+MAX_API_VERSION = "1.45"
 
 server = Server("docker-mcp")
 
-def run_docker(args: list, timeout: int = 30) -> tuple[str, int]:
-    """Run docker command."""
-    try:
-        result = subprocess.run(
-            ["docker"] + args,
-            capture_output=True,
-            text=True,
-            timeout=timeout
+_docker = None
+_inventory = None
+_image_layers = {}  # image ID -> [(layer diff ID, size or None)]; images are immutable
+_reclaim = {"result": None, "watcher": None, "generation": 0}
+
+class DockerError(Exception):
+    """Error returned by the Docker Engine API."""
+
+    def __init__(self, message: str, status: int = None):
+        super().__init__(message)
+        self.status = status
+
+class DockerClient:
+    """Persistent async Engine API client over the daemon socket (or TCP).
+
+    The API version is negotiated once via /_ping: the daemon's version,
+    capped at MAX_API_VERSION, unless DOCKER_API_VERSION pins it.
+    """
+
+    def __init__(self, host: str):
+        if host.startswith("unix://"):
+            transport = httpx.AsyncHTTPTransport(uds=host[len("unix://"):])
+            base_url = "http://docker"
+            verify, cert = True, None
+        elif host.startswith("tcp://"):
+            transport = None
+            scheme = "https" if DOCKER_TLS_VERIFY else "http"
+            base_url = f"{scheme}://{host[len('tcp://'):]}"
+            cert_path = os.path.expanduser(DOCKER_CERT_PATH)
+            verify = os.path.join(cert_path, "ca.pem") if DOCKER_TLS_VERIFY else True
+            cert = (os.path.join(cert_path, "cert.pem"), os.path.join(cert_path, "key.pem")) if DOCKER_TLS_VERIFY else None
+        else:
+            raise DockerError(f"Unsupported DOCKER_HOST '{host}' (use unix:// or tcp://)")
+
+        self.http = httpx.AsyncClient(
+            base_url=base_url,
+            transport=transport,
+            verify=verify,
+            cert=cert,
+            timeout=TIMEOUT,
+            limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=20)
         )
-        return result.stdout or result.stderr, result.returncode
-    except Exception as e:
-        return str(e), 1
+        self.version = DOCKER_API_VERSION or None
+        self.version_lock = asyncio.Lock()
+        self.stats_slots = asyncio.Semaphore(STATS_STREAMS)
+
+    async def negotiate(self) -> str:
+        async with self.version_lock:
+            if self.version is None:
+                response = await self.http.get("/_ping")
+                server_version = response.headers.get("API-Version", MAX_API_VERSION)
+                as_tuple = lambda v: tuple(int(x) for x in v.split("."))
+                self.version = min(server_version, MAX_API_VERSION, key=as_tuple)
+        return self.version
+
+    async def request(self, method: str, path: str, params: dict = None, body=None,
+                      timeout: float = None) -> httpx.Response:
+        version = self.version or await self.negotiate()
+        params = {k: v for k, v in (params or {}).items() if v is not None}
+        kwargs = {"params": params}
+        if body is not None:
+            kwargs["json"] = body
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+        response = await self.http.request(method, f"/v{version}{path}", **kwargs)
+        if response.status_code >= 400:
+            raise api_error(response)
+        return response
+
+    async def get_json(self, path: str, params: dict = None, timeout: float = None):
+        return (await self.request("GET", path, params, timeout=timeout)).json()
+
+    async def stream(self, path: str, params: dict = None, timeout: float = None):
+        """Stream a GET response as raw byte chunks (logs, stats, events)."""
+        version = self.version or await self.negotiate()
+        params = {k: v for k, v in (params or {}).items() if v is not None}
+        request_timeout = httpx.Timeout(TIMEOUT, read=timeout)
+        async with self.http.stream("GET", f"/v{version}{path}", params=params, timeout=request_timeout) as response:
+            if response.status_code >= 400:
+                await response.aread()
+                raise api_error(response)
+            async for chunk in response.aiter_bytes():
+                yield chunk
+
+def api_error(response: httpx.Response) -> DockerError:
+    try:
+        message = response.json().get("message", response.text)
+    except ValueError:
+        message = response.text
+    return DockerError(f"{message} (HTTP {response.status_code})", response.status_code)
+
+def get_docker() -> DockerClient:
+    global _docker
+    if _docker is None:
+        _docker = DockerClient(DOCKER_HOST)
+    return _docker
+
+def demux_stream(data: bytes) -> str:
+    """Decode a log/exec stream, removing the 8-byte frame headers used when the container has no TTY."""
+    if len(data) < 8 or data[0] not in (0, 1, 2) or data[1:4] != b"\x00\x00\x00":
+        return data.decode(errors="replace")
+    out = []
+    pos = 0
+    while pos + 8 <= len(data):
+        size = struct.unpack(">I", data[pos + 4:pos + 8])[0]
+        out.append(data[pos + 8:pos + 8 + size])
+        pos += 8 + size
+    return b"".join(out).decode(errors="replace")
+
+def parse_rfc3339(value: str) -> datetime:
+    """RFC3339Nano with any offset ("...T10:00:00.123456789+02:00") as an aware datetime.
+
+    fromisoformat takes at most microseconds, so the fraction is cut to 6 digits.
+    """
+    match = re.fullmatch(r"(.+?T\d{2}:\d{2}:\d{2})(?:\.(\d+))?(Z|[+-]\d{2}:\d{2})?", value.strip())
+    if not match:
+        raise ValueError(f"invalid timestamp '{value}'")
+    base, frac, offset = match.groups()
+    fraction = f".{frac[:6]}" if frac else ""
+    return datetime.fromisoformat(base + fraction + (offset or "Z").replace("Z", "+00:00"))
+
+def iso_time(value) -> str:
+    """Unix seconds or an RFC3339 string as a `docker ps`-style timestamp (in UTC)."""
+    if isinstance(value, (int, float)):
+        dt = datetime.fromtimestamp(value, timezone.utc)
+    else:
+        dt = parse_rfc3339(value).astimezone(timezone.utc) if value else None
+    return dt.strftime("%Y-%m-%d %H:%M:%S +0000 UTC") if dt else ""
+
+def human_duration(seconds: float) -> str:
+    """Docker's humanized durations ("2 hours", "About a minute")."""
+    if seconds < 1:
+        return "Less than a second"
+    if seconds < 60:
+        return f"{int(seconds)} seconds"
+    minutes = seconds / 60
+    if minutes < 60:
+        return "About a minute" if int(minutes) == 1 else f"{int(minutes)} minutes"
+    hours = minutes / 60
+    if hours < 48:
+        return "About an hour" if int(hours) == 1 else f"{int(hours)} hours"
+    days = hours / 24
+    if days < 14:
+        return f"{int(days)} days"
+    if days < 60:
+        return f"{int(days / 7)} weeks"
+    if days < 730:
+        return f"{int(days / 30)} months"
+    return f"{int(days / 365)} years"
+
+def since(timestamp: float) -> str:
+    return f"{human_duration(time.time() - timestamp)} ago"
+
+def human_size(size: float) -> str:
+    """Decimal sizes the way the docker CLI prints them ("123MB")."""
+    for unit in ("B", "kB", "MB", "GB", "TB"):
+        if abs(size) < 1000 or unit == "TB":
+            return f"{size:.3g}{unit}"
+        size /= 1000
+
+def format_labels(labels: dict) -> str:
+    return ",".join(f"{k}={v}" for k, v in (labels or {}).items())
+
+def format_ports(ports: list) -> str:
+    formatted = []
+    for p in ports or []:
+        if p.get("PublicPort"):
+            formatted.append(f"{p.get('IP', '0.0.0.0')}:{p['PublicPort']}->{p['PrivatePort']}/{p['Type']}")
+        else:
+            formatted.append(f"{p['PrivatePort']}/{p['Type']}")
+    return ", ".join(dict.fromkeys(formatted))
+
+# Engine API objects normalized to the keys of the CLI's `--format json` output
+def format_container(c: dict) -> dict:
+    return {
+        "ID": c["Id"][:12],
+        "Names": ",".join(n.lstrip("/") for n in c.get("Names", [])),
+        "Image": c.get("Image"),
+        "Command": f"\"{c.get('Command', '')}\"",
+        "CreatedAt": iso_time(c.get("Created")),
+        "RunningFor": since(c.get("Created", time.time())),
+        "State": c.get("State"),
+        "Status": c.get("Status"),
+        "Ports": format_ports(c.get("Ports")),
+        "Labels": format_labels(c.get("Labels")),
+        "Networks": ",".join((c.get("NetworkSettings") or {}).get("Networks", {}).keys()),
+        "Mounts": ",".join(m.get("Name") or m.get("Source", "") for m in c.get("Mounts", []))
+    }
+
+def format_images(image: dict) -> list:
+    """One row per repo:tag, like `docker images`."""
+    rows = []
+    tags = image.get("RepoTags") or ["<none>:<none>"]
+    digests = image.get("RepoDigests") or []
+    for tag in tags:
+        repository, _, tag_name = tag.rpartition(":")
+        rows.append({
+            "ID": image["Id"].split(":")[-1][:12],
+            "Repository": repository,
+            "Tag": tag_name,
+            "Digest": digests[0].split("@")[-1] if digests else "<none>",
+            "CreatedAt": iso_time(image.get("Created")),
+            "CreatedSince": since(image.get("Created", time.time())),
+            "Size": human_size(image.get("Size", 0)),
+            "Containers": image.get("Containers") if image.get("Containers", -1) >= 0 else "N/A"
+        })
+    return rows
+
+def format_network(n: dict) -> dict:
+    return {
+        "ID": n["Id"][:12],
+        "Name": n.get("Name"),
+        "Driver": n.get("Driver"),
+        "Scope": n.get("Scope"),
+        "IPv6": str(n.get("EnableIPv6", False)).lower(),
+        "Internal": str(n.get("Internal", False)).lower(),
+        "Labels": format_labels(n.get("Labels")),
+        "CreatedAt": iso_time(n.get("Created"))
+    }
+
+def format_volume(v: dict) -> dict:
+    return {
+        "Name": v.get("Name"),
+        "Driver": v.get("Driver"),
+        "Scope": v.get("Scope"),
+        "Mountpoint": v.get("Mountpoint"),
+        "Labels": format_labels(v.get("Labels"))
+    }
+
+# Stats math matches the CLI's `docker stats` calculations
+def cpu_percent(stats: dict, previous: dict) -> float:
+    cpu = stats.get("cpu_stats", {})
+    prev = previous or {}
+    cpu_delta = cpu.get("cpu_usage", {}).get("total_usage", 0) - prev.get("cpu_usage", {}).get("total_usage", 0)
+    system_delta = cpu.get("system_cpu_usage", 0) - prev.get("system_cpu_usage", 0)
+    online = cpu.get("online_cpus") or len(cpu.get("cpu_usage", {}).get("percpu_usage") or []) or 1
+    if cpu_delta > 0 and system_delta > 0:
+        return cpu_delta / system_delta * online * 100
+    return 0.0
+
+def memory_usage(stats: dict) -> tuple[int, int]:
+    """(usage excluding page cache, limit) in bytes."""
+    memory = stats.get("memory_stats", {})
+    detail = memory.get("stats", {})
+    cache = detail.get("inactive_file", detail.get("total_inactive_file", 0))
+    usage = memory.get("usage", 0)
+    return (usage - cache if cache < usage else usage), memory.get("limit", 0)
+
+def network_bytes(stats: dict) -> tuple[int, int]:
+    networks = (stats.get("networks") or {}).values()
+    return sum(n.get("rx_bytes", 0) for n in networks), sum(n.get("tx_bytes", 0) for n in networks)
+
+def block_bytes(stats: dict) -> tuple[int, int]:
+    entries = (stats.get("blkio_stats") or {}).get("io_service_bytes_recursive") or []
+    read = sum(e["value"] for e in entries if e.get("op", "").lower() == "read")
+    write = sum(e["value"] for e in entries if e.get("op", "").lower() == "write")
+    return read, write
+
+def format_stats(stats: dict) -> dict:
+    """One `docker stats --no-stream` row from a stream=false stats response."""
+    mem_used, mem_limit = memory_usage(stats)
+    rx, tx = network_bytes(stats)
+    read, write = block_bytes(stats)
+    return {
+        "ID": stats.get("id", "")[:12],
+        "Name": stats.get("name", "").lstrip("/"),
+        "CPUPerc": f"{cpu_percent(stats, stats.get('precpu_stats')):.2f}%",
+        "MemUsage": f"{human_size(mem_used)} / {human_size(mem_limit)}",
+        "MemPerc": f"{100 * mem_used / mem_limit if mem_limit else 0:.2f}%",
+        "NetIO": f"{human_size(rx)} / {human_size(tx)}",
+        "BlockIO": f"{human_size(read)} / {human_size(write)}",
+        "PIDs": str(stats.get("pids_stats", {}).get("current", 0))
+    }
+
+def parse_timestamp(value: str) -> float:
+    """RFC3339Nano (as in stats `read`) to Unix seconds."""
+    base, _, frac = value.rstrip("Z").partition(".")
+    frac = frac.split("+")[0].split("-")[0]
+    return datetime.fromisoformat(base + "+00:00").timestamp() + (float(f"0.{frac}") if frac else 0.0)
+
+def series_stats(values: list) -> dict:
+    if not values:
+        return {}
+    return {"min": round(min(values), 2), "avg": round(sum(values) / len(values), 2),
+            "max": round(max(values), 2), "latest": round(values[-1], 2)}
+
+async def read_stats_stream(docker: DockerClient, container: str, duration: float) -> list:
+    """Raw stats samples from a container's stream covering `duration` seconds."""
+    samples = []
+
+    async def read():
+        buffer = b""
+        async for chunk in docker.stream(f"/containers/{container}/stats", {"stream": "true"}, timeout=duration + 10):
+            buffer += chunk
+            while b"\n" in buffer:
+                line, buffer = buffer.split(b"\n", 1)
+                if line.strip():
+                    samples.append(json.loads(line))
+            if len(samples) > 1 and parse_timestamp(samples[-1]["read"]) - parse_timestamp(samples[1]["read"]) >= duration:
+                return
+
+    try:
+        await asyncio.wait_for(read(), duration + 5)
+    except asyncio.TimeoutError:
+        pass
+    return samples
+
+async def sample_container_stats(container: str, duration: float) -> dict:
+    """Read a container's stats stream for `duration` seconds and derive rates from raw counters.
+
+    The daemon emits one sample per second; CPU% uses each sample's own
+    precpu counters, network and block I/O rates the delta to the previous
+    sample. At most STATS_STREAMS streams are open at once so they cannot
+    exhaust the connection pool; further containers wait for a slot.
+    """
+    docker = get_docker()
+    async with docker.stats_slots:
+        samples = await read_stats_stream(docker, container, duration)
+
+    # The first sample of a stream has no precpu counters
+    samples = samples[1:] if len(samples) > 1 else samples
+    points = []
+    previous = None
+    start = parse_timestamp(samples[0]["read"]) if samples else 0
+    for stats in samples:
+        ts = parse_timestamp(stats["read"])
+        mem_used, mem_limit = memory_usage(stats)
+        point = {
+            "t": round(ts - start, 1),
+            "cpu_pct": cpu_percent(stats, stats.get("precpu_stats")),
+            "memory_mb": mem_used / 1e6,
+            "memory_pct": 100 * mem_used / mem_limit if mem_limit else 0.0,
+            "pids": stats.get("pids_stats", {}).get("current", 0)
+        }
+        if previous:
+            elapsed = max(ts - previous[0], 1e-3)
+            (rx, tx), (read_b, write_b) = network_bytes(stats), block_bytes(stats)
+            (prx, ptx), (pread, pwrite) = previous[1], previous[2]
+            point.update({
+                "net_rx_kbps": max(rx - prx, 0) / elapsed / 1e3,
+                "net_tx_kbps": max(tx - ptx, 0) / elapsed / 1e3,
+                "block_read_kbps": max(read_b - pread, 0) / elapsed / 1e3,
+                "block_write_kbps": max(write_b - pwrite, 0) / elapsed / 1e3
+            })
+        previous = (ts, network_bytes(stats), block_bytes(stats))
+        points.append(point)
+
+    metrics = ["cpu_pct", "memory_mb", "memory_pct", "net_rx_kbps", "net_tx_kbps", "block_read_kbps", "block_write_kbps"]
+    return {
+        "container": samples[0].get("name", container).lstrip("/") if samples else container,
+        "id": samples[0].get("id", "")[:12] if samples else "",
+        "samples": len(points),
+        "window_seconds": points[-1]["t"] if points else 0,
+        **{m: series_stats([p[m] for p in points if m in p]) for m in metrics},
+        "series": [{k: round(v, 2) if isinstance(v, float) else v for k, v in p.items()} for p in points]
+    }
+
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+def docker_time(value) -> str:
+    """Unix seconds, RFC3339 or a relative duration ("10m", "2h") as the API's seconds.nanoseconds form."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return f"{value:.9f}"
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([smhd])", value)
+    if match:
+        return f"{time.time() - float(match.group(1)) * DURATION_UNITS[match.group(2)]:.9f}"
+    if re.fullmatch(r"\d+(\.\d+)?", value):
+        return value
+    base, _, frac = value.rstrip("Z").partition(".")
+    seconds = int(datetime.fromisoformat(base + "+00:00").timestamp())
+    return f"{seconds}.{frac[:9].ljust(9, '0')}"
+
+def log_sort_key(ts: str) -> str:
+    """Sortable RFC3339Nano timestamp (fraction padded to 9 digits)."""
+    base, _, frac = ts.rstrip("Z").partition(".")
+    return f"{base}.{frac.ljust(9, '0')}"
+
+async def read_logs(container: str, since=None, until=None, tail=None) -> tuple[list, bool]:
+    """Timestamped log lines of a container as (sort_key, timestamp, message) tuples.
+
+    Reading stops after LOG_READ_BYTES; the flag says whether it did.
+    """
+    params = {
+        "stdout": "true",
+        "stderr": "true",
+        "timestamps": "true",
+        "since": docker_time(since),
+        "until": docker_time(until),
+        "tail": tail if tail is not None else "all"
+    }
+    data = b""
+    cut = False
+    async for chunk in get_docker().stream(f"/containers/{container}/logs", params, timeout=TIMEOUT):
+        data += chunk
+        if len(data) >= LOG_READ_BYTES:
+            cut = True
+            break
+
+    lines = []
+    for line in demux_stream(data).splitlines():
+        ts, _, message = line.partition(" ")
+        if ts[:1].isdigit():
+            lines.append((log_sort_key(ts), ts, message))
+    return lines, cut
+
+def after_cursor(lines: list, cursor: str) -> list:
+    """Lines strictly newer than the cursor (the API's `since` is inclusive)."""
+    if not cursor:
+        return lines
+    key = log_sort_key(cursor)
+    return [line for line in lines if line[0] > key]
+
+def cap_lines(lines: list, max_bytes: int) -> tuple[list, bool]:
+    """Keep the newest lines that fit in max_bytes."""
+    kept, size = [], 0
+    for line in reversed(lines):
+        size += len(line[1]) + len(line[2]) + 2
+        if size > max_bytes:
+            return kept[::-1], True
+        kept.append(line)
+    return kept[::-1], False
+
+async def compose_containers(project: str = None, label: str = None) -> list:
+    """Names of running containers in a compose project or matching a label filter."""
+    data, _ = await list_containers(False, {"project": project, "label": label})
+    return [c["Names"][0].lstrip("/") for c in data]
+
+# Container actions that do not change what the inventory shows
+IGNORED_CONTAINER_ACTIONS = ("exec_create", "exec_start", "exec_die", "exec_detach", "attach", "detach",
+                             "resize", "top", "archive-path", "extract-to-dir", "export", "copy", "commit")
+
+class Inventory:
+    """In-memory view of the daemon, loaded once and kept current from /events.
+
+    Containers are updated one at a time as their events arrive (running
+    ones with full inspect data). Images, networks and volumes change
+    rarely, so their events just mark the list for reload on next read.
+    """
+
+    def __init__(self, docker: DockerClient):
+        self.docker = docker
+        self.containers = {}
+        self.inspected = {}
+        self.lists = {"images": None, "networks": None, "volumes": None}
+        self.synced = asyncio.Event()
+        self.attempted = asyncio.Event()  # set once the first load finished or failed
+        self.last_update = None
+        self.error = None
+        self.task = None
+
+    def start(self):
+        self.task = asyncio.create_task(self.run())
+
+    async def run(self):
+        while True:
+            try:
+                since = int(time.time())
+                await self.load()
+                await self.follow(since)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Events may have been missed: reload everything
+                self.error = str(e)
+                self.attempted.set()
+                clear_reclaim()
+                await asyncio.sleep(2)
+
+    async def load(self):
+        data = await self.docker.get_json("/containers/json", {"all": "true"})
+        self.containers = {c["Id"]: c for c in data}
+        running = [c["Id"] for c in data if c.get("State") == "running"]
+        semaphore = asyncio.Semaphore(20)
+
+        async def inspect_one(container_id):
+            async with semaphore:
+                try:
+                    self.inspected[container_id] = await self.docker.get_json(f"/containers/{container_id}/json")
+                except DockerError:
+                    pass
+
+        self.inspected = {}
+        await asyncio.gather(*(inspect_one(c) for c in running))
+        self.lists = {"images": None, "networks": None, "volumes": None}
+        self.last_update = time.time()
+        self.error = None
+        self.synced.set()
+        self.attempted.set()
+
+    async def follow(self, since: int):
+        filters = json.dumps({"type": ["container", "image", "network", "volume", "builder"]})
+        buffer = b""
+        async for chunk in self.docker.stream("/events", {"since": since, "filters": filters}, timeout=None):
+            buffer += chunk
+            while b"\n" in buffer:
+                line, buffer = buffer.split(b"\n", 1)
+                if line.strip():
+                    await self.apply(json.loads(line))
+
+    async def apply(self, event: dict):
+        kind = event.get("Type")
+        action = event.get("Action", "").split(":")[0]
+        self.last_update = time.time()
+        invalidate_reclaim(event)
+        if kind != "container":
+            key = {"image": "images", "network": "networks", "volume": "volumes"}.get(kind)
+            if key:
+                self.lists[key] = None
+            return
+        if action in IGNORED_CONTAINER_ACTIONS:
+            return
+
+        container_id = event["Actor"]["ID"]
+        if action == "destroy":
+            self.remove(container_id)
+            return
+        data = await self.docker.get_json("/containers/json", {"all": "true", "filters": json.dumps({"id": [container_id]})})
+        if not data:
+            self.remove(container_id)
+            return
+        self.containers[container_id] = data[0]
+        if data[0].get("State") == "running":
+            try:
+                self.inspected[container_id] = await self.docker.get_json(f"/containers/{container_id}/json")
+            except DockerError as e:
+                if e.status != 404:
+                    raise
+                # Removed between the list and the inspect (--rm); its destroy event follows
+                self.remove(container_id)
+        else:
+            self.inspected.pop(container_id, None)
+
+    def remove(self, container_id: str):
+        self.containers.pop(container_id, None)
+        self.inspected.pop(container_id, None)
+
+    async def get_list(self, key: str) -> list:
+        """Images, networks or volumes, reloaded only after an event touched them."""
+        if self.lists[key] is None:
+            if key == "volumes":
+                self.lists[key] = (await self.docker.get_json("/volumes")).get("Volumes") or []
+            else:
+                self.lists[key] = await self.docker.get_json(f"/{key}/json" if key == "images" else f"/{key}")
+        return self.lists[key]
+
+    def find_running(self, target: str):
+        """Inspect data of a running container by ID, ID prefix or name."""
+        name = f"/{target.lstrip('/')}"
+        for container_id, data in self.inspected.items():
+            if container_id.startswith(target) or data.get("Name") == name:
+                return data
+        return None
+
+    def status(self) -> dict:
+        return {
+            "source": "inventory",
+            "synced": self.synced.is_set(),
+            "age_seconds": round(time.time() - self.last_update, 1) if self.last_update else None,
+            "containers": len(self.containers),
+            "running_inspected": len(self.inspected),
+            "error": self.error
+        }
+
+async def get_inventory():
+    """The synced inventory, or None when it is disabled or not ready."""
+    global _inventory
+    if not INVENTORY:
+        return None
+    if _inventory is None:
+        _inventory = Inventory(get_docker())
+        _inventory.start()
+    try:
+        await asyncio.wait_for(_inventory.attempted.wait(), TIMEOUT)
+    except asyncio.TimeoutError:
+        return None
+    # While load keeps failing, callers go straight to the API
+    return _inventory if _inventory.synced.is_set() else None
+
+def has_label(labels: dict, selector: str) -> bool:
+    key, _, value = selector.partition("=")
+    return key in labels and (not value or labels[key] == value)
+
+def match_container(c: dict, filters: dict) -> bool:
+    labels = c.get("Labels") or {}
+    if filters.get("label") and not has_label(labels, filters["label"]):
+        return False
+    if filters.get("project") and labels.get("com.docker.compose.project") != filters["project"]:
+        return False
+    if filters.get("status") and c.get("State") != filters["status"]:
+        return False
+    if filters.get("image"):
+        image = filters["image"]
+        if c.get("Image") != image and not c.get("Image", "").startswith(f"{image}:") and not c.get("ImageID", "").startswith(image):
+            return False
+    if filters.get("name") and not any(filters["name"] in n for n in c.get("Names", [])):
+        return False
+    return True
+
+def container_api_filters(filters: dict) -> str:
+    api = {}
+    labels = [filters["label"]] if filters.get("label") else []
+    if filters.get("project"):
+        labels.append(f"com.docker.compose.project={filters['project']}")
+    if labels:
+        api["label"] = labels
+    if filters.get("status"):
+        api["status"] = [filters["status"]]
+    if filters.get("image"):
+        api["ancestor"] = [filters["image"]]
+    if filters.get("name"):
+        api["name"] = [filters["name"]]
+    return json.dumps(api) if api else None
+
+async def list_containers(all_containers: bool, filters: dict) -> tuple[list, dict]:
+    """Container summaries and, when served from the inventory, its status."""
+    all_containers = all_containers or bool(filters.get("status"))
+    inventory = await get_inventory()
+    if inventory:
+        data = [c for c in inventory.containers.values()
+                if (all_containers or c.get("State") == "running") and match_container(c, filters)]
+        data.sort(key=lambda c: c.get("Created", 0), reverse=True)
+        return data, inventory.status()
+    params = {"all": "true" if all_containers else None, "filters": container_api_filters(filters)}
+    return await get_docker().get_json("/containers/json", params), None
+
+async def list_resources(key: str, api_filters: dict = None) -> tuple[list, dict]:
+    """Images, networks or volumes from the inventory or the API."""
+    inventory = await get_inventory()
+    if inventory:
+        return await inventory.get_list(key), inventory.status()
+    docker = get_docker()
+    params = {"filters": json.dumps(api_filters)} if api_filters else None
+    if key == "volumes":
+        return (await docker.get_json("/volumes", params)).get("Volumes") or [], None
+    return await docker.get_json("/images/json" if key == "images" else f"/{key}", params), None
+
+def list_response(items: list, cache: dict) -> list:
+    """Tool output for a list; inventory reads carry their staleness alongside the items."""
+    result = {"cache": cache, "items": items} if cache else items
+    return [TextContent(type="text", text=json.dumps(result, indent=2))]
+
+# Events after which the disk reclaim analysis is recomputed (state changes move
+# containers in and out of the stopped set)
+RECLAIM_CONTAINER_ACTIONS = ("create", "destroy", "prune", "start", "stop", "die", "pause", "unpause")
+
+def clear_reclaim():
+    """Drop the cached analysis; the generation bump also discards one still being computed."""
+    _reclaim["result"] = None
+    _reclaim["generation"] += 1
+
+def invalidate_reclaim(event: dict):
+    kind = event.get("Type")
+    action = event.get("Action", "").split(":")[0]
+    if kind in ("image", "volume", "builder") or (kind == "container" and action in RECLAIM_CONTAINER_ACTIONS):
+        clear_reclaim()
+
+async def watch_reclaim_invalidation():
+    """Without the inventory, follow /events just to invalidate the cached analysis."""
+    filters = json.dumps({"type": ["image", "volume", "container", "builder"]})
+    while True:
+        try:
+            buffer = b""
+            async for chunk in get_docker().stream("/events", {"since": int(time.time()), "filters": filters}, timeout=None):
+                buffer += chunk
+                while b"\n" in buffer:
+                    line, buffer = buffer.split(b"\n", 1)
+                    if line.strip():
+                        invalidate_reclaim(json.loads(line))
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            clear_reclaim()
+            await asyncio.sleep(5)
+
+# Diff ID of an empty layer tar (RUN steps that change nothing, WORKDIR on an existing path)
+EMPTY_LAYER = "sha256:5f70bf18a086007016e948b04aed3b82103a36bea41755b6cddfaf10ace3c6ef"
+
+async def image_layers(image_id: str) -> list:
+    """Layers of an image with per-layer sizes, from inspect (diff IDs) and history (sizes).
+
+    History lists build steps newest first and does not say which steps
+    produced a layer, so only non-zero sizes can be placed: matched
+    oldest-first against the non-empty layers in RootFS when the counts agree
+    exactly. Otherwise (other zero-byte layers, squashed or imported images)
+    sizes are None and the caller falls back to the image's own size figures.
+    """
+    if image_id not in _image_layers:
+        docker = get_docker()
+        info, history = await asyncio.gather(docker.get_json(f"/images/{image_id}/json"),
+                                             docker.get_json(f"/images/{image_id}/history"))
+        layers = info.get("RootFS", {}).get("Layers") or []
+        sizes = [h.get("Size", 0) for h in reversed(history) if h.get("Size", 0) > 0]
+        if len(sizes) == len([l for l in layers if l != EMPTY_LAYER]):
+            sizes = iter(sizes)
+            _image_layers[image_id] = [(l, 0 if l == EMPTY_LAYER else next(sizes)) for l in layers]
+        else:
+            _image_layers[image_id] = [(l, None) for l in layers]
+    return _image_layers[image_id]
+
+def age_days(created) -> float:
+    if isinstance(created, str):
+        created = parse_rfc3339(created).timestamp() if created else time.time()
+    return round((time.time() - created) / 86400, 1)
+
+async def analyze_disk(include_sizes: bool = False) -> dict:
+    """Reclaimable space per image, container, volume and build cache entry.
+
+    Images are reduced to a layer-sharing graph: an image reclaims only the
+    layers no other image uses, and removing all unused images together
+    reclaims every layer referenced exclusively by unused images, which is
+    more than the sum of their individual figures when they share layers.
+
+    Container writable layers and volume contents are only sized with
+    include_sizes: the daemon walks their files for that, which is the slow
+    part of `docker system df -v`. Without it those candidates are still
+    listed (volumes by whether any container mounts them) with unknown size.
+    """
+    docker = get_docker()
+    if include_sizes:
+        volumes_call = docker.get_json("/system/df", {"type": "volume"}, timeout=300)
+    else:
+        volumes_call = docker.get_json("/volumes")
+    images, containers, volume_data, cache_df = await asyncio.gather(
+        docker.get_json("/images/json", {"shared-size": "true"}),
+        docker.get_json("/containers/json", {"all": "true", "size": "true" if include_sizes else None}),
+        volumes_call,
+        docker.get_json("/system/df", {"type": "build-cache"}, timeout=120)
+    )
+
+    semaphore = asyncio.Semaphore(10)
+
+    async def load_layers(image_id):
+        async with semaphore:
+            try:
+                return await image_layers(image_id)
+            except DockerError:
+                return []
+
+    layer_lists = await asyncio.gather(*(load_layers(i["Id"]) for i in images))
+    used_images = {c.get("ImageID") for c in containers}
+    layer_users = defaultdict(set)
+    layer_size = {}
+    for image, layers in zip(images, layer_lists):
+        for layer, size in layers:
+            layer_users[layer].add(image["Id"])
+            if size is not None:
+                layer_size[layer] = max(layer_size.get(layer, 0), size)
+
+    candidates = []
+    unused_ids = set()
+    unsized_bytes = 0
+    for image, layers in zip(images, layer_lists):
+        tags = [t for t in image.get("RepoTags") or [] if t != "<none>:<none>"]
+        dangling = not tags
+        in_use = image["Id"] in used_images
+        if in_use:
+            continue
+        unused_ids.add(image["Id"])
+        if layers and all(size is not None for _, size in layers):
+            exclusive = sum(layer_size[l] for l, _ in layers if layer_users[l] == {image["Id"]})
+        else:
+            # Per-layer sizes unknown: the daemon's own unique-size figure
+            exclusive = image.get("Size", 0) - max(image.get("SharedSize", 0), 0)
+            unsized_bytes += exclusive
+        candidates.append({
+            "type": "image",
+            "id": image["Id"].split(":")[-1][:12],
+            "name": ", ".join(tags) or "<none>",
+            "reason": "dangling" if dangling else "unused",
+            "reclaim_bytes": exclusive,
+            "size_bytes": image.get("Size", 0),
+            "shared_with": len({u for l, _ in layers for u in layer_users[l]} - {image["Id"]}),
+            "age_days": age_days(image.get("Created", time.time()))
+        })
+    unused_images_bytes = unsized_bytes + sum(size for layer, size in layer_size.items() if layer_users[layer] <= unused_ids)
+
+    for c in containers:
+        if c.get("State") in ("running", "paused", "restarting"):
+            continue
+        candidates.append({
+            "type": "container",
+            "id": c["Id"][:12],
+            "name": c["Names"][0].lstrip("/") if c.get("Names") else "",
+            "reason": c.get("State"),
+            "reclaim_bytes": c.get("SizeRw", 0) if include_sizes else None,
+            "age_days": age_days(c.get("Created", time.time()))
+        })
+
+    mounted = {m.get("Name") for c in containers for m in c.get("Mounts") or [] if m.get("Type") == "volume"}
+    for v in volume_data.get("Volumes") or []:
+        usage = v.get("UsageData") or {}
+        if usage.get("RefCount", 0) > 0 or v["Name"] in mounted:
+            continue
+        candidates.append({
+            "type": "volume",
+            "id": v["Name"][:12],
+            "name": v["Name"],
+            "reason": "unreferenced",
+            "reclaim_bytes": max(usage.get("Size", 0), 0) if include_sizes else None,
+            "age_days": age_days(v.get("CreatedAt", ""))
+        })
+
+    for b in cache_df.get("BuildCache") or []:
+        if b.get("InUse") or b.get("Shared"):
+            continue
+        candidates.append({
+            "type": "build-cache",
+            "id": b["ID"][:12],
+            "name": b.get("Description", "")[:80],
+            "reason": b.get("Type", "cache"),
+            "reclaim_bytes": b.get("Size", 0),
+            "age_days": age_days(b.get("LastUsedAt") or b.get("CreatedAt", ""))
+        })
+
+    totals = defaultdict(int)
+    for c in candidates:
+        totals[c["type"]] += c["reclaim_bytes"] or 0
+    totals["image"] = unused_images_bytes
+    candidates.sort(key=lambda c: (c["reclaim_bytes"] or 0, c["age_days"]), reverse=True)
+
+    return {
+        "analyzed_at": iso_time(time.time()),
+        "sizes_included": include_sizes,
+        "images": len(images),
+        "layers": len(layer_users),
+        "layers_bytes": sum(layer_size.values()),
+        "reclaimable": {k: {"bytes": v, "size": human_size(v)} if include_sizes or k not in ("container", "volume")
+                        else {"bytes": None, "size": "unknown (include_sizes)"} for k, v in totals.items()},
+        "reclaimable_total": human_size(sum(totals.values())),
+        "candidates": candidates
+    }
+
+async def disk_analysis(refresh: bool = False, include_sizes: bool = False) -> tuple[dict, bool]:
+    """Cached analysis (recomputed after relevant Docker events); returns (result, served_from_cache).
+
+    The result is only cached while something follows /events for it: the
+    inventory when enabled and synced, otherwise a dedicated watcher.
+    """
+    if INVENTORY:
+        following = await get_inventory() is not None
+    else:
+        if _reclaim["watcher"] is None:
+            _reclaim["watcher"] = asyncio.create_task(watch_reclaim_invalidation())
+        following = True
+    cached = _reclaim["result"]
+    if not refresh and cached is not None and (cached["sizes_included"] or not include_sizes):
+        return cached, True
+    generation = _reclaim["generation"]
+    result = await analyze_disk(include_sizes)
+    if following and generation == _reclaim["generation"]:
+        _reclaim["result"] = result
+    return result, False
+
+async def inspect(target: str):
+    """Inspect a container, falling back to an image of that name."""
+    inventory = await get_inventory()
+    found = inventory.find_running(target) if inventory else None
+    if found:
+        return found
+    docker = get_docker()
+    try:
+        return await docker.get_json(f"/containers/{target}/json")
+    except DockerError as e:
+        if e.status != 404:
+            raise
+        return await docker.get_json(f"/images/{target}/json")
+
+async def exec_in_container(container: str, command: str, timeout: int = 60) -> tuple[str, int]:
+    """Run `sh -c command` in a container; returns (combined output, exit code)."""
+    docker = get_docker()
+    created = (await docker.request("POST", f"/containers/{container}/exec", body={
+        "AttachStdout": True,
+        "AttachStderr": True,
+        "Cmd": ["sh", "-c", command]
+    })).json()
+    response = await docker.request("POST", f"/exec/{created['Id']}/start", body={"Detach": False, "Tty": False},
+                                    timeout=timeout)
+    info = await docker.get_json(f"/exec/{created['Id']}/json")
+    return demux_stream(response.content), info.get("ExitCode")
 
 @server.list_tools()
 async def list_tools():
@@ -38,27 +928,61 @@ async def list_tools():
             inputSchema={
                 "type": "object",
                 "properties": {
-                    "all": {"type": "boolean", "description": "Show all containers (including stopped)", "default": False}
+                    "all": {"type": "boolean", "description": "Show all containers (including stopped)", "default": False},
+                    "label": {"type": "string", "description": "Label filter (key or key=value)"},
+                    "status": {"type": "string", "description": "State filter (running, exited, paused, created, ...)"},
+                    "image": {"type": "string", "description": "Image name or ID"},
+                    "project": {"type": "string", "description": "Compose project name"},
+                    "name": {"type": "string", "description": "Name substring"}
                 }
             }
         ),
         Tool(
             name="docker_images",
             description="List Docker images",
-            inputSchema={"type": "object", "properties": {}}
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "reference": {"type": "string", "description": "Repository or repo:tag"},
+                    "dangling": {"type": "boolean", "description": "Only untagged images"},
+                    "label": {"type": "string", "description": "Label filter (key or key=value)"}
+                }
+            }
         ),
         Tool(
             name="docker_logs",
-            description="Get container logs",
+            description="Get container logs; pass the returned cursor back to get only new lines",
             inputSchema={
                 "type": "object",
                 "properties": {
                     "container": {"type": "string", "description": "Container ID or name"},
-                    "tail": {"type": "integer", "description": "Number of lines", "default": 100}
+                    "tail": {"type": "integer", "description": "Number of lines (ignored with a cursor)", "default": 100},
+                    "timestamps": {"type": "boolean", "default": False},
+                    "since": {"type": "string", "description": "Unix time, RFC3339 or relative (e.g., '10m')"},
+                    "until": {"type": "string", "description": "Unix time, RFC3339 or relative (e.g., '5m')"},
+                    "cursor": {"type": "string", "description": "Cursor from a previous call"}
                 },
                 "required": ["container"]
             }
         ),
+        Tool(
+            name="docker_logs_multi",
+            description="Merged, timestamp-ordered logs from several containers or a compose project, with regex filter",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "containers": {"type": "array", "items": {"type": "string"}, "description": "Container IDs or names"},
+                    "project": {"type": "string", "description": "Compose project name (running containers)"},
+                    "label": {"type": "string", "description": "Label filter (e.g., 'app=api')"},
+                    "tail": {"type": "integer", "default": 200, "description": "Lines per container"},
+                    "since": {"type": "string", "description": "Unix time, RFC3339 or relative (e.g., '10m')"},
+                    "until": {"type": "string"},
+                    "pattern": {"type": "string", "description": "Regex the log message must match"},
+                    "cursor": {"type": "string", "description": "Cursor from a previous call"},
+                    "max_bytes": {"type": "integer", "default": LOG_MAX_BYTES}
+                }
+            }
+        ),
         Tool(
             name="docker_inspect",
             description="Inspect a container or image",
@@ -80,6 +1004,18 @@ async def list_tools():
                 }
             }
         ),
+        Tool(
+            name="docker_stats_sample",
+            description="Sample container stats streams in parallel over a window; returns CPU, memory, network and block I/O rates with min/avg/max",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "containers": {"type": "array", "items": {"type": "string"}, "description": "Container IDs or names (default: all running)"},
+                    "duration": {"type": "integer", "default": 10, "description": "Sampling window in seconds (max 60)"},
+                    "include_series": {"type": "boolean", "default": False, "description": "Include the per-second samples"}
+                }
+            }
+        ),
         Tool(
             name="docker_top",
             description="Show running processes in container",
@@ -94,17 +1030,38 @@ async def list_tools():
         Tool(
             name="docker_networks",
             description="List Docker networks",
-            inputSchema={"type": "object", "properties": {}}
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "driver": {"type": "string"},
+                    "label": {"type": "string", "description": "Label filter (key or key=value)"}
+                }
+            }
         ),
         Tool(
             name="docker_volumes",
             description="List Docker volumes",
-            inputSchema={"type": "object", "properties": {}}
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "dangling": {"type": "boolean", "description": "Only volumes not used by any container"},
+                    "label": {"type": "string", "description": "Label filter (key or key=value)"}
+                }
+            }
         ),
         Tool(
             name="docker_system_df",
-            description="Show Docker disk usage",
-            inputSchema={"type": "object", "properties": {}}
+            description="Analyze Docker disk usage: reclaimable bytes per image (layer sharing aware), stopped container, unused volume and build cache entry, ranked",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "type": {"type": "string", "enum": ["image", "container", "volume", "build-cache"], "description": "Only candidates of this type"},
+                    "min_age_days": {"type": "number", "default": 0},
+                    "limit": {"type": "integer", "default": 25},
+                    "refresh": {"type": "boolean", "default": False, "description": "Recompute instead of using the cached analysis"},
+                    "include_sizes": {"type": "boolean", "default": False, "description": "Also size stopped containers and unused volumes (slow: the daemon walks their files)"}
+                }
+            }
         ),
         Tool(
             name="docker_version",
@@ -169,116 +1126,187 @@ async def list_tools():
 async def call_tool(name: str, arguments: dict) -> list:
     """Execute tool calls."""
     try:
+        docker = get_docker()
+
         if name == "docker_ps":
-            all_containers = arguments.get("all", False)
-            args = ["ps", "--format", "json"]
-            if all_containers:
-                args.append("-a")
-            output, code = run_docker(args)
-
-            # Parse JSON lines output
-            containers = []
-            for line in output.strip().split('\n'):
-                if line:
-                    try:
-                        containers.append(json.loads(line))
-                    except:
-                        pass
-            return [TextContent(type="text", text=json.dumps(containers, indent=2))]
+            filters = {k: arguments.get(k) for k in ("label", "status", "image", "project", "name")}
+            data, cache = await list_containers(arguments.get("all", False), filters)
+            containers = [format_container(c) for c in data]
+            return list_response(containers, cache)
 
         elif name == "docker_images":
-            output, code = run_docker(["images", "--format", "json"])
-            images = []
-            for line in output.strip().split('\n'):
-                if line:
-                    try:
-                        images.append(json.loads(line))
-                    except:
-                        pass
-            return [TextContent(type="text", text=json.dumps(images, indent=2))]
+            reference, dangling, label = arguments.get("reference"), arguments.get("dangling"), arguments.get("label")
+            api_filters = {k: [v] for k, v in {"reference": reference, "label": label,
+                                               "dangling": "true" if dangling else None}.items() if v}
+            data, cache = await list_resources("images", api_filters)
+            if cache:
+                data = [i for i in data
+                        if (not dangling or not i.get("RepoTags") or i["RepoTags"] == ["<none>:<none>"])
+                        and (not label or has_label(i.get("Labels") or {}, label))]
+            images = [row for image in data for row in format_images(image)]
+            if cache and reference:
+                images = [i for i in images if reference in (i["Repository"], f"{i['Repository']}:{i['Tag']}")]
+            return list_response(images, cache)
 
         elif name == "docker_logs":
             container = arguments.get("container")
-            tail = arguments.get("tail", 100)
-            output, code = run_docker(["logs", "--tail", str(tail), container])
-            return [TextContent(type="text", text=output)]
+            cursor = arguments.get("cursor")
+            tail = None if cursor else arguments.get("tail", 100)
+            lines, cut = await read_logs(container, since=cursor or arguments.get("since"),
+                                         until=arguments.get("until"), tail=tail)
+            lines, truncated = cap_lines(after_cursor(lines, cursor), LOG_MAX_BYTES)
+
+            show_ts = arguments.get("timestamps", False)
+            result = {
+                "container": container,
+                "cursor": lines[-1][1] if lines else cursor,
+                "lines": len(lines),
+                "truncated": truncated or cut,
+                "logs": "\n".join(f"{ts} {msg}" if show_ts else msg for _, ts, msg in lines)
+            }
+            return [TextContent(type="text", text=json.dumps(result, indent=2))]
+
+        elif name == "docker_logs_multi":
+            containers = list(arguments.get("containers") or [])
+            if arguments.get("project") or arguments.get("label"):
+                containers += await compose_containers(arguments.get("project"), arguments.get("label"))
+            containers = list(dict.fromkeys(containers))
+            if not containers:
+                return [TextContent(type="text", text="Error: no containers matched (give containers, project or label)")]
+
+            cursor = arguments.get("cursor")
+            pattern = re.compile(arguments["pattern"]) if arguments.get("pattern") else None
+            tail = None if cursor else arguments.get("tail", 200)
+            results = await asyncio.gather(*(read_logs(c, since=cursor or arguments.get("since"), until=arguments.get("until"), tail=tail)
+                                             for c in containers), return_exceptions=True)
+
+            merged, counts = [], {}
+            for container, result in zip(containers, results):
+                if isinstance(result, Exception):
+                    counts[container] = {"error": str(result)}
+                    continue
+                lines, cut = result
+                lines = after_cursor(lines, cursor)
+                matched = [l for l in lines if pattern is None or pattern.search(l[2])]
+                counts[container] = {"lines": len(lines), "matched": len(matched), "read_limit_hit": cut}
+                merged.extend((key, ts, f"[{container}] {msg}") for key, ts, msg in matched)
+            merged.sort(key=lambda l: l[0])
+            merged, truncated = cap_lines(merged, arguments.get("max_bytes", LOG_MAX_BYTES))
+
+            result = {
+                "cursor": merged[-1][1] if merged else cursor,
+                "containers": counts,
+                "truncated": truncated,
+                "lines": [f"{ts} {msg}" for _, ts, msg in merged]
+            }
+            return [TextContent(type="text", text=json.dumps(result, indent=2))]
 
         elif name == "docker_inspect":
             target = arguments.get("target")
-            output, code = run_docker(["inspect", target])
-            return [TextContent(type="text", text=output)]
+            data = await inspect(target)
+            return [TextContent(type="text", text=json.dumps([data], indent=2))]
 
         elif name == "docker_stats":
             container = arguments.get("container")
-            args = ["stats", "--no-stream", "--format", "json"]
             if container:
-                args.append(container)
-            output, code = run_docker(args)
-            stats = []
-            for line in output.strip().split('\n'):
-                if line:
-                    try:
-                        stats.append(json.loads(line))
-                    except:
-                        pass
+                targets = [container]
+            else:
+                targets = [c["Id"] for c in await docker.get_json("/containers/json")]
+            # stream=false waits for a second sample so CPU% has a delta; fetch containers
+            # concurrently, bounded like the stats streams so the pool is not exhausted
+            async def one_shot(target):
+                async with docker.stats_slots:
+                    return await docker.get_json(f"/containers/{target}/stats", {"stream": "false"})
+
+            samples = await asyncio.gather(*(one_shot(t) for t in targets))
+            stats = [format_stats(s) for s in samples]
             return [TextContent(type="text", text=json.dumps(stats, indent=2))]
 
+        elif name == "docker_stats_sample":
+            containers = arguments.get("containers") or [c["Id"] for c in await docker.get_json("/containers/json")]
+            duration = min(max(arguments.get("duration", 10), 2), 60)
+
+            results = await asyncio.gather(*(sample_container_stats(c, duration) for c in containers), return_exceptions=True)
+            samples = []
+            for container, result in zip(containers, results):
+                if isinstance(result, Exception):
+                    samples.append({"container": container, "error": str(result)})
+                    continue
+                if not arguments.get("include_series", False):
+                    result.pop("series")
+                samples.append(result)
+            return [TextContent(type="text", text=json.dumps(samples, indent=2))]
+
         elif name == "docker_top":
             container = arguments.get("container")
-            output, code = run_docker(["top", container])
-            return [TextContent(type="text", text=output)]
+            data = await docker.get_json(f"/containers/{container}/top")
+            processes = [dict(zip(data["Titles"], p)) for p in data.get("Processes") or []]
+            return [TextContent(type="text", text=json.dumps(processes, indent=2))]
 
         elif name == "docker_networks":
-            output, code = run_docker(["network", "ls", "--format", "json"])
-            networks = []
-            for line in output.strip().split('\n'):
-                if line:
-                    try:
-                        networks.append(json.loads(line))
-                    except:
-                        pass
-            return [TextContent(type="text", text=json.dumps(networks, indent=2))]
+            driver, label = arguments.get("driver"), arguments.get("label")
+            data, cache = await list_resources("networks", {k: [v] for k, v in {"driver": driver, "label": label}.items() if v})
+            if cache:
+                data = [n for n in data if (not driver or n.get("Driver") == driver)
+                        and (not label or has_label(n.get("Labels") or {}, label))]
+            networks = [format_network(n) for n in data]
+            return list_response(networks, cache)
 
         elif name == "docker_volumes":
-            output, code = run_docker(["volume", "ls", "--format", "json"])
-            volumes = []
-            for line in output.strip().split('\n'):
-                if line:
-                    try:
-                        volumes.append(json.loads(line))
-                    except:
-                        pass
-            return [TextContent(type="text", text=json.dumps(volumes, indent=2))]
+            dangling, label = arguments.get("dangling"), arguments.get("label")
+            data, cache = await list_resources("volumes", {k: [v] for k, v in {"dangling": "true" if dangling else None, "label": label}.items() if v})
+            if cache:
+                if dangling:
+                    # Volumes mounted by any container, running or not
+                    used = {m.get("Name") for c in _inventory.containers.values() for m in c.get("Mounts", [])}
+                    data = [v for v in data if v["Name"] not in used]
+                if label:
+                    data = [v for v in data if has_label(v.get("Labels") or {}, label)]
+            volumes = [format_volume(v) for v in data]
+            return list_response(volumes, cache)
 
         elif name == "docker_system_df":
-            output, code = run_docker(["system", "df", "-v"])
-            return [TextContent(type="text", text=output)]
+            analysis, cached = await disk_analysis(arguments.get("refresh", False), arguments.get("include_sizes", False))
+            kind = arguments.get("type")
+            min_age = arguments.get("min_age_days", 0)
+            limit = arguments.get("limit", 25)
+
+            candidates = [c for c in analysis["candidates"] if (not kind or c["type"] == kind) and c["age_days"] >= min_age]
+            result = {k: v for k, v in analysis.items() if k != "candidates"}
+            result["cached"] = cached
+            result["candidates"] = [dict(c, reclaim=human_size(c["reclaim_bytes"]) if c["reclaim_bytes"] is not None else "unknown")
+                                    for c in candidates[:limit]]
+            result["truncated"] = len(candidates) > limit
+            return [TextContent(type="text", text=json.dumps(result, indent=2))]
 
         elif name == "docker_version":
-            output, code = run_docker(["version", "--format", "json"])
-            return [TextContent(type="text", text=output)]
+            data = await docker.get_json("/version")
+            version = {"Client": {"ApiVersion": docker.version, "DockerHost": DOCKER_HOST}, "Server": data}
+            return [TextContent(type="text", text=json.dumps(version, indent=2))]
 
         # Write operations
         elif name == "docker_start" and not READONLY:
             container = arguments.get("container")
-            output, code = run_docker(["start", container])
-            return [TextContent(type="text", text=f"Started: {output}" if code == 0 else f"Error: {output}")]
+            await docker.request("POST", f"/containers/{container}/start")
+            return [TextContent(type="text", text=f"Started: {container}")]
 
         elif name == "docker_stop" and not READONLY:
             container = arguments.get("container")
             timeout = arguments.get("timeout", 10)
-            output, code = run_docker(["stop", "-t", str(timeout), container])
-            return [TextContent(type="text", text=f"Stopped: {output}" if code == 0 else f"Error: {output}")]
+            await docker.request("POST", f"/containers/{container}/stop", {"t": timeout}, timeout=timeout + TIMEOUT)
+            return [TextContent(type="text", text=f"Stopped: {container}")]
 
         elif name == "docker_restart" and not READONLY:
             container = arguments.get("container")
-            output, code = run_docker(["restart", container])
-            return [TextContent(type="text", text=f"Restarted: {output}" if code == 0 else f"Error: {output}")]
+            await docker.request("POST", f"/containers/{container}/restart", timeout=TIMEOUT * 2)
+            return [TextContent(type="text", text=f"Restarted: {container}")]
 
         elif name == "docker_exec" and not READONLY:
             container = arguments.get("container")
             command = arguments.get("command")
-            output, code = run_docker(["exec", container, "sh", "-c", command], timeout=60)
+            output, exit_code = await exec_in_container(container, command, timeout=60)
+            if exit_code:
+                output += f"\n[exit code {exit_code}]"
             return [TextContent(type="text", text=output)]
 
         else:
@@ -5,7 +5,17 @@ Search logs, query indices, and analyze data.
 """
 import os
 import json
+import re
+import gzip
+import time
+import zlib
+import base64
+import random
 import asyncio
+import math
+import fnmatch
+import itertools
+from datetime import datetime, timezone
 import httpx
 from mcp.server import Server
 from mcp.types import Tool, TextContent
@@ -16,9 +26,28 @@ ELASTICSEARCH_USER = os.getenv("ELASTICSEARCH_USER", "")
 ELASTICSEARCH_PASSWORD = os.getenv("ELASTICSEARCH_PASSWORD", "")
 MAX_RESULTS = int(os.getenv("MCP_ES_MAX_RESULTS", "100"))
 TIMEOUT = int(os.getenv("MCP_ES_TIMEOUT", "30"))
+READONLY = os.getenv("MCP_ES_READONLY", "true").lower() == "true"
+PIT_KEEP_ALIVE = os.getenv("MCP_ES_PIT_KEEP_ALIVE", "2m")
+MAX_FIELD_CHARS = int(os.getenv("MCP_ES_MAX_FIELD_CHARS", "1000"))
+SOURCE_EXCLUDES = [f for f in os.getenv("MCP_ES_SOURCE_EXCLUDES", "").split(",") if f]
+CATALOG_TTL = int(os.getenv("MCP_ES_CATALOG_TTL", "300"))
+CATALOG_CHECK = int(os.getenv("MCP_ES_CATALOG_CHECK", "30"))
+PATTERN_MAX_LINES = int(os.getenv("MCP_ES_PATTERN_MAX_LINES", "200000"))
+EXPORT_DIR = os.path.expanduser(os.getenv("MCP_ES_EXPORT_DIR", "~/.codex/exports"))
+EXPORT_MAX_DOCS = int(os.getenv("MCP_ES_EXPORT_MAX_DOCS", "5000000"))
+BULK_READ_LINES = 5000
+BULK_ERROR_SAMPLES = 10
+
+# Only the parts of a search response the tools read, so the cluster sends less
+SEARCH_FILTER_PATH = "took,pit_id,_scroll_id,error,hits.total.value,hits.hits._id,hits.hits._source,hits.hits.fields,hits.hits.sort"
+MSEARCH_FILTER_PATH = "took,responses.took,responses.error,responses.hits.total.value,responses.hits.hits._id,responses.hits.hits._source,responses.hits.hits.fields,responses.aggregations"
+LOG_FIELDS = ["message", "log", "level", "log.level", "service", "service.name"]
 
 server = Server("elasticsearch-mcp")
 
+# Field catalogs by index pattern, see get_field_catalog()
+_field_catalogs = {}
+
 def get_auth():
     """Get auth tuple if credentials configured."""
     if ELASTICSEARCH_USER and ELASTICSEARCH_PASSWORD:
@@ -28,7 +57,7 @@ def get_auth():
 @server.list_tools()
 async def list_tools():
     """List available tools."""
-    return [
+    tools = [
         Tool(
             name="es_search",
             description="Search documents in an index",
@@ -39,7 +68,10 @@ async def list_tools():
                     "query": {"type": "object", "description": "Elasticsearch query DSL"},
                     "size": {"type": "integer", "default": 10, "description": "Number of results"},
                     "sort": {"type": "array", "description": "Sort specification"},
-                    "source": {"type": "array", "description": "Fields to return", "items": {"type": "string"}}
+                    "source": {"type": "array", "description": "Fields to return", "items": {"type": "string"}},
+                    "source_excludes": {"type": "array", "description": "Field patterns to drop from _source", "items": {"type": "string"}},
+                    "docvalue_fields": {"type": "array", "description": "Fields to read from doc values", "items": {"type": "string"}},
+                    "max_field_chars": {"type": "integer", "description": "Truncate longer string fields (0 = no limit)"}
                 },
                 "required": ["index"]
             }
@@ -54,7 +86,130 @@ async def list_tools():
                     "query": {"type": "string", "description": "Simple query string (e.g., 'error AND service:api')"},
                     "time_field": {"type": "string", "default": "@timestamp"},
                     "time_range": {"type": "string", "description": "Time range (e.g., '1h', '24h', '7d')", "default": "1h"},
-                    "size": {"type": "integer", "default": 50}
+                    "size": {"type": "integer", "default": 50},
+                    "max_field_chars": {"type": "integer", "description": "Truncate longer messages (0 = no limit)"}
+                }
+            }
+        ),
+        Tool(
+            name="es_search_page",
+            description="Page through search results with a point-in-time and search_after. Pass the returned cursor to get the next page",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "index": {"type": "string", "description": "Index name or pattern (first page only)"},
+                    "query": {"type": "object", "description": "Elasticsearch query DSL (first page only)"},
+                    "size": {"type": "integer", "default": 10, "description": "Results per page"},
+                    "sort": {"type": "array", "description": "Sort specification (a _shard_doc tiebreaker is appended)"},
+                    "source": {"type": "array", "description": "Fields to return", "items": {"type": "string"}},
+                    "source_excludes": {"type": "array", "description": "Field patterns to drop from _source", "items": {"type": "string"}},
+                    "docvalue_fields": {"type": "array", "description": "Fields to read from doc values", "items": {"type": "string"}},
+                    "max_field_chars": {"type": "integer", "description": "Truncate longer string fields (0 = no limit)"},
+                    "cursor": {"type": "string", "description": "Continuation token from the previous page"},
+                    "close": {"type": "boolean", "default": False, "description": "Release the point-in-time for this cursor instead of fetching"}
+                }
+            }
+        ),
+        Tool(
+            name="es_logs_page",
+            description="Page through logs (newest first) with a point-in-time and search_after. Pass the returned cursor to get the next page",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "index": {"type": "string", "description": "Index pattern (first page only)", "default": "logs-*"},
+                    "query": {"type": "string", "description": "Simple query string (first page only)"},
+                    "time_field": {"type": "string", "default": "@timestamp"},
+                    "time_range": {"type": "string", "description": "Time range, pinned at the first page (e.g., '1h', '24h')", "default": "1h"},
+                    "size": {"type": "integer", "default": 50, "description": "Logs per page"},
+                    "max_field_chars": {"type": "integer", "description": "Truncate longer messages (0 = no limit)"},
+                    "cursor": {"type": "string", "description": "Continuation token from the previous page"},
+                    "close": {"type": "boolean", "default": False, "description": "Release the point-in-time for this cursor instead of fetching"}
+                }
+            }
+        ),
+        Tool(
+            name="es_export",
+            description="Export all matching documents to a local NDJSON (optionally gzip) file. Returns only a summary",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "index": {"type": "string", "description": "Index name or pattern (e.g., 'logs-*')"},
+                    "query": {"type": "object", "description": "Elasticsearch query DSL", "default": {"match_all": {}}},
+                    "time_field": {"type": "string", "default": "@timestamp"},
+                    "time_range": {"type": "string", "description": "Optional time range filter (e.g., '1h', '24h')"},
+                    "source": {"type": "array", "description": "_source fields to export", "items": {"type": "string"}},
+                    "output": {"type": "string", "description": "File name inside MCP_ES_EXPORT_DIR (default: generated)"},
+                    "compress": {"type": "boolean", "default": True, "description": "Write gzip-compressed NDJSON"},
+                    "mode": {"type": "string", "enum": ["pit", "scroll"], "default": "pit", "description": "PIT/search_after stream or sliced scroll"},
+                    "slices": {"type": "integer", "default": 4, "description": "Concurrent slices (scroll mode, max 16)"},
+                    "page_size": {"type": "integer", "default": 1000, "description": "Documents per request (max 10000)"},
+                    "max_docs": {"type": "integer", "description": "Stop after this many documents"}
+                },
+                "required": ["index"]
+            }
+        ),
+        Tool(
+            name="es_msearch",
+            description="Run several searches, counts or aggregations in one _msearch request. Results are keyed by id",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "index": {"type": "string", "description": "Default index for searches that do not set one"},
+                    "searches": {
+                        "type": "array",
+                        "description": "Searches to run",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "id": {"type": "string", "description": "Caller ID used to key the result"},
+                                "index": {"type": "string"},
+                                "query": {"type": "object", "description": "Elasticsearch query DSL"},
+                                "size": {"type": "integer", "description": "Number of hits (default 10, 0 with aggs)"},
+                                "sort": {"type": "array"},
+                                "source": {"type": "array", "items": {"type": "string"}},
+                                "source_excludes": {"type": "array", "items": {"type": "string"}},
+                                "aggs": {"type": "object", "description": "Aggregation specification"}
+                            }
+                        }
+                    },
+                    "max_field_chars": {"type": "integer", "description": "Truncate longer string fields (0 = no limit)"},
+                    "max_concurrent_searches": {"type": "integer", "description": "Max searches executed concurrently by the cluster"}
+                },
+                "required": ["searches"]
+            }
+        ),
+        Tool(
+            name="es_log_patterns",
+            description="Cluster log messages in a time window into templates (Drain-style) with counts, first/last seen and example IDs",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "index": {"type": "string", "description": "Index pattern", "default": "logs-*"},
+                    "query": {"type": "string", "description": "Simple query string (e.g., 'level:error')"},
+                    "time_field": {"type": "string", "default": "@timestamp"},
+                    "time_range": {"type": "string", "description": "Time range (e.g., '1h', '24h')", "default": "1h"},
+                    "message_field": {"type": "string", "default": "message"},
+                    "max_lines": {"type": "integer", "default": 100000, "description": "Stop after scanning this many lines"},
+                    "similarity": {"type": "number", "default": 0.5, "description": "Token similarity needed to join a template (0-1)"},
+                    "top": {"type": "integer", "default": 30, "description": "Number of templates to return"}
+                }
+            }
+        ),
+        Tool(
+            name="es_log_timeline",
+            description="Log volume timeline split by level and service, with spike and dip detection, from a single aggregation",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "index": {"type": "string", "description": "Index pattern", "default": "logs-*"},
+                    "query": {"type": "string", "description": "Simple query string", "default": "*"},
+                    "time_field": {"type": "string", "default": "@timestamp"},
+                    "time_range": {"type": "string", "description": "Time range (e.g., '1h', '24h', '7d')", "default": "1h"},
+                    "level_field": {"type": "string", "description": "Keyword field with the log level (auto-detected)"},
+                    "service_field": {"type": "string", "description": "Keyword field with the service name (auto-detected)"},
+                    "buckets": {"type": "integer", "default": 60, "description": "Approximate number of time buckets"},
+                    "baseline": {"type": "integer", "default": 10, "description": "Preceding buckets used as the baseline"},
+                    "z_threshold": {"type": "number", "default": 3.0, "description": "Z-score that counts as a spike (or, negated, a dip)"}
                 }
             }
         ),
@@ -79,9 +234,25 @@ async def list_tools():
                 "required": ["index"]
             }
         ),
+        Tool(
+            name="es_fields",
+            description="Look up fields across an index pattern from a cached field catalog (type, searchable, aggregatable, indices)",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "index": {"type": "string", "description": "Index pattern (e.g., 'logs-*')"},
+                    "match": {"type": "string", "description": "Field name glob or substring (e.g., 'kubernetes.*', 'status')"},
+                    "type": {"type": "string", "description": "Only fields of this type (e.g., 'keyword', 'date')"},
+                    "aggregatable": {"type": "boolean", "description": "Only aggregatable (or non-aggregatable) fields"},
+                    "refresh": {"type": "boolean", "default": False, "description": "Rebuild the catalog now"},
+                    "limit": {"type": "integer", "default": 200}
+                },
+                "required": ["index"]
+            }
+        ),
         Tool(
             name="es_mapping",
-            description="Get index mapping",
+            description="Get raw index mapping (es_fields is cheaper for field lookups)",
             inputSchema={
                 "type": "object",
                 "properties": {
@@ -111,7 +282,8 @@ async def list_tools():
                     "index": {"type": "string"},
                     "aggs": {"type": "object", "description": "Aggregation specification"},
                     "query": {"type": "object", "description": "Optional filter query"},
-                    "size": {"type": "integer", "default": 0}
+                    "size": {"type": "integer", "default": 0},
+                    "filter_path": {"type": "string", "description": "Response filter (e.g., 'aggregations.*.buckets.key,aggregations.*.buckets.doc_count')"}
                 },
                 "required": ["index", "aggs"]
             }
@@ -138,10 +310,878 @@ async def list_tools():
         )
     ]
 
+    if not READONLY:
+        tools.extend([
+            Tool(
+                name="es_bulk_index",
+                description="Index documents from a local NDJSON file (one document per line, .gz supported) through _bulk",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "index": {"type": "string", "description": "Target index"},
+                        "file": {"type": "string", "description": "NDJSON file inside MCP_ES_EXPORT_DIR (e.g. an es_export output)"},
+                        "id_field": {"type": "string", "description": "Document field to use as _id"},
+                        "batch_docs": {"type": "integer", "default": 1000, "description": "Max documents per _bulk request"},
+                        "batch_bytes": {"type": "integer", "default": 5242880, "description": "Max bytes per _bulk request"},
+                        "workers": {"type": "integer", "default": 4, "description": "Concurrent _bulk requests"},
+                        "max_retries": {"type": "integer", "default": 5, "description": "Retries for 429-rejected documents"},
+                        "refresh": {"type": "boolean", "default": False, "description": "Refresh the index when done"}
+                    },
+                    "required": ["index", "file"]
+                }
+            )
+        ])
+
+    return tools
+
 def parse_time_range(time_range: str) -> str:
     """Parse time range string to ES format."""
     return f"now-{time_range}"
 
+def build_logs_query(query_string: str, time_field: str, time_range: str, anchor: str = None) -> dict:
+    """Build the es_logs query, optionally pinned to an absolute end time."""
+    if anchor:
+        # Date math anchored on a fixed instant, so later pages see the same window
+        time_filter = {"gte": f"{anchor}||-{time_range}", "lte": anchor, "format": "strict_date_optional_time"}
+    else:
+        time_filter = {"gte": parse_time_range(time_range)}
+    return {
+        "bool": {
+            "must": [
+                {"query_string": {"query": query_string}}
+            ],
+            "filter": [
+                {"range": {time_field: time_filter}}
+            ]
+        }
+    }
+
+def build_source(includes: list = None, excludes: list = None):
+    """Build a _source filter, applying the configured default excludes."""
+    excludes = list(excludes or []) + SOURCE_EXCLUDES
+    if not excludes:
+        return includes or None
+    source = {"excludes": excludes}
+    if includes:
+        source["includes"] = includes
+    return source
+
+def truncate_fields(value, max_chars: int):
+    """Cut long strings anywhere in a document, leaving a marker with the dropped length."""
+    if not max_chars:
+        return value
+    if isinstance(value, str):
+        if len(value) > max_chars:
+            return f"{value[:max_chars]}...[truncated {len(value) - max_chars} chars]"
+        return value
+    if isinstance(value, dict):
+        return {k: truncate_fields(v, max_chars) for k, v in value.items()}
+    if isinstance(value, list):
+        return [truncate_fields(v, max_chars) for v in value]
+    return value
+
+def get_field(source: dict, field: str, default=None):
+    """Read a field by its flat dotted name or by walking nested objects."""
+    if field in source:
+        return source[field]
+    value = source
+    for part in field.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return default
+        value = value[part]
+    return value
+
+def simplify_hits(hits: list, max_chars: int = MAX_FIELD_CHARS) -> list:
+    """Flatten search hits to their _id plus _source and doc value fields."""
+    simplified = []
+    for h in hits:
+        doc = {"_id": h["_id"], **h.get("_source", {})}
+        for field, values in h.get("fields", {}).items():
+            doc[field] = values[0] if len(values) == 1 else values
+        simplified.append(truncate_fields(doc, max_chars))
+    return simplified
+
+def format_logs(hits: list, time_field: str, max_chars: int = MAX_FIELD_CHARS) -> list:
+    """Extract the common log fields from search hits."""
+    logs = []
+    for hit in hits:
+        source = hit.get("_source", {})
+        timestamp = hit.get("fields", {}).get(time_field, [get_field(source, time_field)])[0]
+        logs.append({
+            "timestamp": timestamp,
+            "message": truncate_fields(get_field(source, "message", get_field(source, "log", "")), max_chars),
+            "level": get_field(source, "level", get_field(source, "log.level", "")),
+            "service": get_field(source, "service", get_field(source, "service.name", ""))
+        })
+    return logs
+
+def shape_logs_body(body: dict, time_field: str) -> dict:
+    """Limit a logs search to the fields format_logs reads."""
+    body["_source"] = LOG_FIELDS
+    body["docvalue_fields"] = [{"field": time_field, "format": "strict_date_optional_time"}]
+    return body
+
+def encode_cursor(state: dict) -> str:
+    """Encode pagination state as an opaque, URL-safe token."""
+    raw = json.dumps(state, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(zlib.compress(raw)).decode()
+
+def decode_cursor(cursor: str) -> dict:
+    """Decode a token produced by encode_cursor."""
+    try:
+        return json.loads(zlib.decompress(base64.urlsafe_b64decode(cursor.encode())))
+    except Exception:
+        raise ValueError("invalid cursor")
+
+async def open_pit(client: httpx.AsyncClient, base_url: str, index: str) -> str:
+    """Open a point-in-time on an index pattern and return its id."""
+    response = await client.post(f"{base_url}/{index}/_pit", params={"keep_alive": PIT_KEEP_ALIVE})
+    data = response.json()
+    if "id" not in data:
+        raise RuntimeError(json.dumps(data.get("error", data)))
+    return data["id"]
+
+async def close_pit(client: httpx.AsyncClient, base_url: str, pit_id: str):
+    """Release a point-in-time. Errors are ignored, the PIT expires on its own."""
+    try:
+        await client.request("DELETE", f"{base_url}/_pit", json={"id": pit_id})
+    except httpx.HTTPError:
+        pass
+
+async def fetch_pit_page(client: httpx.AsyncClient, base_url: str, state: dict) -> tuple[dict, str | None]:
+    """Fetch the next page for a PIT cursor state.
+
+    Returns the raw search response and the cursor for the following page,
+    or None once the results are exhausted or the search failed (the PIT is
+    closed then).
+    """
+    body = dict(state["body"])
+    # search_after needs the last hit of a page, so pages hold at least one
+    body["size"] = max(1, body.get("size", 10))
+    body["pit"] = {"id": state["pit"], "keep_alive": PIT_KEEP_ALIVE}
+    if state.get("after"):
+        body["search_after"] = state["after"]
+        body["track_total_hits"] = False
+
+    try:
+        response = await client.post(f"{base_url}/_search", params={"filter_path": SEARCH_FILTER_PATH}, json=body)
+        data = response.json()
+    except Exception:
+        await close_pit(client, base_url, state["pit"])
+        raise
+    if "error" in data:
+        await close_pit(client, base_url, state["pit"])
+        return data, None
+
+    hits = data.get("hits", {}).get("hits", [])
+    # The PIT id may change between requests, always continue with the latest
+    state["pit"] = data.get("pit_id", state["pit"])
+    if len(hits) < body["size"]:
+        await close_pit(client, base_url, state["pit"])
+        return data, None
+
+    state["after"] = hits[-1]["sort"]
+    return data, encode_cursor(state)
+
+def build_field_catalog(data: dict) -> dict:
+    """Merge a _field_caps response into field -> type/capabilities/indices."""
+    all_indices = data.get("indices", [])
+    fields = {}
+    for field, caps in data.get("fields", {}).items():
+        if field.startswith("_"):
+            continue
+        missing = set(caps.get("unmapped", {}).get("indices", []))
+        mapped = {t: c for t, c in caps.items() if t != "unmapped"}
+        if not mapped:
+            continue
+        entry = {
+            "type": next(iter(mapped)) if len(mapped) == 1 else sorted(mapped),
+            "searchable": all(c.get("searchable") for c in mapped.values()),
+            "aggregatable": all(c.get("aggregatable") for c in mapped.values()),
+            "indices": "all" if not missing else sorted(set(all_indices) - missing)
+        }
+        if len(mapped) > 1:
+            # Conflicting mappings: record which indices use which type
+            entry["type_indices"] = {t: c.get("indices", "rest") for t, c in mapped.items()}
+        fields[field] = entry
+    return fields
+
+async def list_open_indices(client: httpx.AsyncClient, base_url: str, pattern: str) -> set:
+    """Cheaply list the open indices behind a pattern."""
+    response = await client.get(f"{base_url}/_cat/indices/{pattern}", params={"format": "json", "h": "index,status"})
+    data = response.json()
+    if not isinstance(data, list):
+        raise RuntimeError(json.dumps(data.get("error", data)))
+    return {i["index"] for i in data if i.get("status") == "open"}
+
+async def get_field_catalog(client: httpx.AsyncClient, base_url: str, pattern: str, refresh: bool = False) -> dict:
+    """Return the cached field catalog for an index pattern.
+
+    The catalog is rebuilt from _field_caps after CATALOG_TTL seconds, or
+    earlier when a CATALOG_CHECK probe of _cat/indices finds the set of
+    indices has changed (e.g. a new daily index was created).
+    """
+    now = time.monotonic()
+    catalog = _field_catalogs.get(pattern)
+    if catalog and not refresh and now - catalog["loaded"] < CATALOG_TTL:
+        if now - catalog["checked"] < CATALOG_CHECK:
+            return catalog
+        catalog["checked"] = now
+        if await list_open_indices(client, base_url, pattern) == catalog["indices"]:
+            return catalog
+
+    response = await client.get(
+        f"{base_url}/{pattern}/_field_caps",
+        params={"fields": "*", "include_unmapped": "true", "filter_path": "indices,fields,error"}
+    )
+    data = response.json()
+    if "error" in data:
+        raise RuntimeError(json.dumps(data["error"]))
+
+    catalog = {
+        "fields": build_field_catalog(data),
+        "indices": set(data.get("indices", [])),
+        "loaded": now,
+        "checked": now
+    }
+    _field_catalogs[pattern] = catalog
+    return catalog
+
+# Variable tokens masked before clustering, so e.g. ids and durations do not split templates
+TOKEN_MASKS = [
+    (re.compile(r"^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$"), "<UUID>"),
+    (re.compile(r"^\d{1,3}(\.\d{1,3}){3}(:\d+)?$"), "<IP>"),
+    (re.compile(r"^(0x)?[0-9a-fA-F]{12,}$"), "<HEX>"),
+    (re.compile(r"^[-+]?\d+([.,:]\d+)*[a-zA-Z%]{0,3}$"), "<NUM>"),
+]
+
+class LogTemplateMiner:
+    """Streaming Drain-style log template miner.
+
+    Messages are routed through a fixed-depth prefix tree (token count, then
+    the leading tokens) to a small group of candidate templates, and joined
+    to the most similar one or start a new template. Memory is bounded by
+    max_clusters: when exceeded, the rarest templates are evicted.
+    """
+
+    def __init__(self, similarity: float = 0.5, depth: int = 4, max_children: int = 100, max_clusters: int = 2000):
+        self.similarity = similarity
+        self.depth = depth
+        self.max_children = max_children
+        self.max_clusters = max_clusters
+        self.root = {}
+        self.clusters = {}
+        self.next_id = 0
+        self.evicted = 0
+
+    @staticmethod
+    def tokenize(message: str) -> list:
+        tokens = []
+        for token in message.split():
+            for pattern, mask in TOKEN_MASKS:
+                if pattern.match(token):
+                    token = mask
+                    break
+            tokens.append(token)
+        return tokens
+
+    def _leaf(self, tokens: list) -> list:
+        node = self.root.setdefault(len(tokens), {})
+        for token in tokens[:self.depth - 2]:
+            # Tokens with digits are likely variable; never branch on them
+            key = "<*>" if any(c.isdigit() for c in token) else token
+            if key not in node:
+                if len(node) >= self.max_children:
+                    key = "<*>"
+                node = node.setdefault(key, {})
+            else:
+                node = node[key]
+        return node.setdefault(None, [])
+
+    def _score(self, template: list, tokens: list) -> float:
+        same = sum(1 for a, b in zip(template, tokens) if a == b or a == "<*>")
+        return same / len(tokens) if tokens else 1.0
+
+    def add(self, message: str, timestamp=None, doc_id: str = None):
+        tokens = self.tokenize(message)
+        leaf = self._leaf(tokens)
+
+        best, best_score = None, -1.0
+        for cluster_id in leaf:
+            score = self._score(self.clusters[cluster_id]["template"], tokens)
+            if score > best_score:
+                best, best_score = cluster_id, score
+
+        if best is not None and best_score >= self.similarity:
+            cluster = self.clusters[best]
+            cluster["template"] = [a if a == b else "<*>" for a, b in zip(cluster["template"], tokens)]
+            cluster["count"] += 1
+            cluster["last_seen"] = timestamp or cluster["last_seen"]
+            if doc_id and len(cluster["examples"]) < 3:
+                cluster["examples"].append(doc_id)
+            return
+
+        self.clusters[self.next_id] = {
+            "template": tokens,
+            "count": 1,
+            "first_seen": timestamp,
+            "last_seen": timestamp,
+            "examples": [doc_id] if doc_id else [],
+            "leaf": leaf
+        }
+        leaf.append(self.next_id)
+        self.next_id += 1
+        if len(self.clusters) > self.max_clusters:
+            self._evict()
+
+    def _evict(self):
+        """Drop the rarest tenth of templates."""
+        rarest = sorted(self.clusters, key=lambda c: self.clusters[c]["count"])[:max(1, self.max_clusters // 10)]
+        for cluster_id in rarest:
+            self.clusters.pop(cluster_id)["leaf"].remove(cluster_id)
+        self.evicted += len(rarest)
+
+    def top(self, n: int) -> list:
+        clusters = sorted(self.clusters.values(), key=lambda c: c["count"], reverse=True)[:n]
+        return [{
+            "template": " ".join(c["template"]),
+            "count": c["count"],
+            "first_seen": c["first_seen"],
+            "last_seen": c["last_seen"],
+            "examples": c["examples"]
+        } for c in clusters]
+
+async def mine_log_patterns(client: httpx.AsyncClient, base_url: str, arguments: dict) -> dict:
+    """Scan a log window page by page and mine message templates."""
+    index = arguments.get("index", "logs-*")
+    time_field = arguments.get("time_field", "@timestamp")
+    message_field = arguments.get("message_field", "message")
+    max_lines = min(arguments.get("max_lines", 100000), PATTERN_MAX_LINES)
+    anchor = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+    body = {
+        "query": build_logs_query(arguments.get("query", "*"), time_field, arguments.get("time_range", "1h"), anchor),
+        "size": min(1000, max_lines),
+        "sort": [{time_field: "asc"}, {"_shard_doc": "asc"}],
+        "_source": [message_field],
+        "docvalue_fields": [{"field": time_field, "format": "strict_date_optional_time"}],
+        "track_total_hits": False
+    }
+    miner = LogTemplateMiner(similarity=arguments.get("similarity", 0.5))
+    state = {"pit": await open_pit(client, base_url, index), "body": body}
+    scanned = 0
+    truncated = False
+    started = time.monotonic()
+
+    while True:
+        # Ask only for what is left of the line budget
+        body["size"] = min(1000, max_lines - scanned)
+        data, next_cursor = await fetch_pit_page(client, base_url, state)
+        if "error" in data:
+            raise RuntimeError(json.dumps(data["error"]))
+        hits = data.get("hits", {}).get("hits", [])
+        for position, hit in enumerate(hits, 1):
+            message = get_field(hit.get("_source", {}), message_field)
+            if not isinstance(message, str):
+                continue
+            timestamp = hit.get("fields", {}).get(time_field, [None])[0]
+            miner.add(message, timestamp, hit.get("_id"))
+            scanned += 1
+            if scanned >= max_lines:
+                truncated = position < len(hits) or bool(next_cursor)
+                break
+        if not next_cursor or scanned >= max_lines:
+            if next_cursor:
+                await close_pit(client, base_url, state["pit"])
+            break
+
+    templates = miner.top(arguments.get("top", 30))
+    for template in templates:
+        template["template"] = truncate_fields(template["template"], MAX_FIELD_CHARS)
+        template["pct"] = round(100 * template["count"] / scanned, 2) if scanned else 0
+
+    return {
+        "lines_scanned": scanned,
+        "truncated": truncated,
+        "patterns": len(miner.clusters),
+        "evicted_patterns": miner.evicted,
+        "elapsed_s": round(time.monotonic() - started, 2),
+        "templates": templates
+    }
+
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+HISTOGRAM_INTERVALS = ["1s", "5s", "10s", "30s", "1m", "5m", "10m", "15m", "30m", "1h", "3h", "6h", "12h", "1d", "7d"]
+ERROR_LEVELS = {"error", "err", "fatal", "critical", "crit", "alert", "emerg", "emergency", "severe"}
+LEVEL_FIELDS = ["log.level", "level", "severity", "log.level.keyword", "level.keyword"]
+SERVICE_FIELDS = ["service.name", "service", "kubernetes.container.name", "service.name.keyword", "service.keyword", "app"]
+
+def parse_duration(value: str) -> int:
+    """Convert a time range like '15m' or '24h' to seconds."""
+    match = re.fullmatch(r"(\d+)([smhdw])", value.strip())
+    if not match:
+        raise ValueError(f"unsupported time range: {value}")
+    return int(match.group(1)) * DURATION_UNITS[match.group(2)]
+
+def pick_interval(range_seconds: int, buckets: int) -> str:
+    """Pick the smallest round histogram interval giving at most ~buckets buckets."""
+    for interval in HISTOGRAM_INTERVALS:
+        if range_seconds / parse_duration(interval) <= buckets:
+            return interval
+    return HISTOGRAM_INTERVALS[-1]
+
+def pick_field(catalog: dict, candidates: list):
+    """Return the first aggregatable candidate field present in a catalog."""
+    for field in candidates:
+        entry = catalog["fields"].get(field)
+        if entry and entry["aggregatable"]:
+            return field
+    return None
+
+def find_spikes(series: list, baseline: int, threshold: float) -> list:
+    """Score each point against the mean/stddev of the preceding window.
+
+    Returns (index, mean, z) for every point with |z| >= threshold; the sign
+    of z tells spikes from dips. Rolling sums keep this O(n). The stddev is
+    floored at the Poisson estimate sqrt(mean) (and 1) so flat or sparse
+    baselines do not turn every small bump into a spike.
+    """
+    scores = []
+    total = total_sq = 0.0
+    for i, value in enumerate(series):
+        if i >= baseline:
+            window = baseline
+            mean = total / window
+            std = math.sqrt(max(total_sq / window - mean * mean, 0.0))
+            std = max(std, math.sqrt(mean), 1.0)
+            z = (value - mean) / std
+            if abs(z) >= threshold:
+                scores.append((i, round(mean, 1), round(z, 1)))
+            total -= series[i - baseline]
+            total_sq -= series[i - baseline] ** 2
+        total += value
+        total_sq += value * value
+    return scores
+
+async def build_log_timeline(client: httpx.AsyncClient, base_url: str, arguments: dict) -> dict:
+    """Run one date_histogram aggregation and summarize it with spike detection."""
+    index = arguments.get("index", "logs-*")
+    time_field = arguments.get("time_field", "@timestamp")
+    time_range = arguments.get("time_range", "1h")
+    baseline = max(2, arguments.get("baseline", 10))
+    threshold = arguments.get("z_threshold", 3.0)
+
+    level_field = arguments.get("level_field")
+    service_field = arguments.get("service_field")
+    if not level_field or not service_field:
+        catalog = await get_field_catalog(client, base_url, index)
+        level_field = level_field or pick_field(catalog, LEVEL_FIELDS)
+        service_field = service_field or pick_field(catalog, SERVICE_FIELDS)
+
+    interval = pick_interval(parse_duration(time_range), max(1, arguments.get("buckets", 60)))
+    now = datetime.now(timezone.utc)
+    anchor = now.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+    histogram = {
+        "date_histogram": {
+            "field": time_field,
+            "fixed_interval": interval,
+            "min_doc_count": 0,
+            "extended_bounds": {"min": f"{anchor}||-{time_range}", "max": anchor},
+            "format": "strict_date_optional_time"
+        },
+        "aggs": {}
+    }
+    aggs = {"timeline": histogram}
+    if level_field:
+        histogram["aggs"]["level"] = {"terms": {"field": level_field, "size": 10}}
+    if service_field:
+        histogram["aggs"]["service"] = {"terms": {"field": service_field, "size": 5}}
+        aggs["services"] = {"terms": {"field": service_field, "size": 10}}
+
+    body = {
+        "query": build_logs_query(arguments.get("query", "*"), time_field, time_range, anchor),
+        "aggs": aggs,
+        "size": 0,
+        "track_total_hits": True
+    }
+    response = await client.post(f"{base_url}/{index}/_search",
+                                 params={"filter_path": "took,error,hits.total.value,aggregations"}, json=body)
+    data = response.json()
+    if "error" in data:
+        raise RuntimeError(json.dumps(data["error"]))
+
+    timeline = []
+    totals = []
+    errors = []
+    for bucket in data.get("aggregations", {}).get("timeline", {}).get("buckets", []):
+        levels = {b["key"]: b["doc_count"] for b in bucket.get("level", {}).get("buckets", [])}
+        error_count = sum(c for level, c in levels.items() if str(level).lower() in ERROR_LEVELS)
+        timeline.append({"t": bucket.get("key_as_string", bucket["key"]), "count": bucket["doc_count"],
+                         "errors": error_count, "levels": levels})
+        totals.append(bucket["doc_count"])
+        errors.append(error_count)
+
+    # The bucket containing the anchor is still filling up: keep it in the
+    # timeline but do not score it, or its low count reads as a drop every call
+    complete = len(timeline)
+    buckets = data.get("aggregations", {}).get("timeline", {}).get("buckets", [])
+    if buckets and buckets[-1]["key"] / 1000 + parse_duration(interval) > now.timestamp():
+        timeline[-1]["partial"] = True
+        complete -= 1
+
+    spikes, dips = [], []
+    for metric, series in (("count", totals), ("errors", errors)):
+        if metric == "errors" and not level_field:
+            continue
+        for i, mean, z in find_spikes(series[:complete], baseline, threshold):
+            services = buckets[i].get("service", {}).get("buckets", [])
+            (spikes if z > 0 else dips).append({
+                "t": timeline[i]["t"],
+                "metric": metric,
+                "value": series[i],
+                "baseline_mean": mean,
+                "z": z,
+                "top_services": {b["key"]: b["doc_count"] for b in services}
+            })
+
+    total = data.get("hits", {}).get("total", {}).get("value", sum(totals))
+    return {
+        "took_ms": data.get("took"),
+        "interval": interval,
+        "level_field": level_field,
+        "service_field": service_field,
+        "total": total,
+        "errors": sum(errors),
+        "error_rate": round(sum(errors) / total, 4) if total else 0,
+        "services": {b["key"]: b["doc_count"] for b in data.get("aggregations", {}).get("services", {}).get("buckets", [])},
+        "spikes": sorted(spikes, key=lambda s: s["z"], reverse=True),
+        "dips": sorted(dips, key=lambda s: s["z"]),
+        "timeline": timeline
+    }
+
+def build_msearch(searches: list, default_index: str) -> tuple[list, str]:
+    """Build caller IDs and the NDJSON body for an _msearch request."""
+    ids = []
+    lines = []
+    for i, search in enumerate(searches):
+        index = search.get("index", default_index)
+        if not index:
+            raise ValueError(f"search {i} has no index")
+        aggs = search.get("aggs")
+        body = {
+            "query": search.get("query", {"match_all": {}}),
+            "size": min(search.get("size", 0 if aggs else 10), MAX_RESULTS)
+        }
+        if aggs:
+            body["aggs"] = aggs
+        if search.get("sort"):
+            body["sort"] = search["sort"]
+        source = build_source(search.get("source"), search.get("source_excludes"))
+        if source:
+            body["_source"] = source
+        ids.append(str(search.get("id", i)))
+        lines.append(json.dumps({"index": index}))
+        lines.append(json.dumps(body))
+    return ids, "\n".join(lines) + "\n"
+
+def simplify_msearch(ids: list, data: dict, max_chars: int = MAX_FIELD_CHARS) -> dict:
+    """Key _msearch responses by caller ID using the es_search hit format."""
+    results = {}
+    for search_id, item in zip(ids, data.get("responses", [])):
+        if "error" in item:
+            error = item["error"]
+            results[search_id] = {"error": error.get("reason", error) if isinstance(error, dict) else error}
+            continue
+        result = {
+            "total": item.get("hits", {}).get("total", {}).get("value", 0),
+            "took_ms": item.get("took"),
+            "hits": simplify_hits(item.get("hits", {}).get("hits", []), max_chars)
+        }
+        if "aggregations" in item:
+            result["aggregations"] = item["aggregations"]
+        results[search_id] = result
+    return results
+
+def export_path(index: str, output: str, compress: bool) -> str:
+    """Resolve an export file name inside EXPORT_DIR."""
+    if output:
+        filename = os.path.basename(output)
+    else:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        filename = f"{re.sub(r'[^A-Za-z0-9_.-]+', '_', index)}-{stamp}.ndjson"
+    # The extension follows what is actually written
+    if compress and not filename.endswith(".gz"):
+        filename += ".gz"
+    elif not compress and filename.endswith(".gz"):
+        filename = filename[:-3]
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    return os.path.join(EXPORT_DIR, filename)
+
+def import_path(filename: str) -> str:
+    """Resolve a file to read inside EXPORT_DIR, rejecting paths that escape it."""
+    root = os.path.realpath(EXPORT_DIR)
+    path = os.path.realpath(os.path.join(root, filename))
+    if os.path.commonpath([root, path]) != root:
+        raise ValueError(f"file must be inside {EXPORT_DIR}")
+    return path
+
+async def export_scroll_slice(client: httpx.AsyncClient, base_url: str, index: str, body: dict,
+                              slice_id: int, slices: int, write) -> None:
+    """Stream one scroll slice through write(hits) until exhausted or write returns False."""
+    body = dict(body)
+    if slices > 1:
+        body["slice"] = {"id": slice_id, "max": slices}
+
+    params = {"scroll": PIT_KEEP_ALIVE, "filter_path": SEARCH_FILTER_PATH}
+    response = await client.post(f"{base_url}/{index}/_search", params=params, json=body)
+    data = response.json()
+    scroll_id = data.get("_scroll_id")
+    try:
+        while True:
+            if "error" in data:
+                raise RuntimeError(json.dumps(data["error"]))
+            hits = data.get("hits", {}).get("hits", [])
+            if not hits or not write(hits):
+                return
+            response = await client.post(f"{base_url}/_search/scroll", params={"filter_path": SEARCH_FILTER_PATH},
+                                         json={"scroll": PIT_KEEP_ALIVE, "scroll_id": scroll_id})
+            data = response.json()
+            scroll_id = data.get("_scroll_id", scroll_id)
+    finally:
+        if scroll_id:
+            try:
+                await client.request("DELETE", f"{base_url}/_search/scroll", json={"scroll_id": [scroll_id]})
+            except httpx.HTTPError:
+                pass
+
+async def run_export(client: httpx.AsyncClient, base_url: str, arguments: dict) -> dict:
+    """Stream matching documents to an NDJSON file, one page in memory per slice."""
+    index = arguments.get("index")
+    query = arguments.get("query", {"match_all": {}})
+    time_range = arguments.get("time_range")
+    if time_range:
+        time_field = arguments.get("time_field", "@timestamp")
+        # Anchored once so every page filters on the same window
+        anchor = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+        time_filter = {"gte": f"{anchor}||-{time_range}", "lte": anchor, "format": "strict_date_optional_time"}
+        query = {"bool": {"must": [query], "filter": [{"range": {time_field: time_filter}}]}}
+    mode = arguments.get("mode", "pit")
+    slices = max(1, min(arguments.get("slices", 4), 16)) if mode == "scroll" else 1
+    page_size = max(1, min(arguments.get("page_size", 1000), 10000))
+    max_docs = min(arguments.get("max_docs") or EXPORT_MAX_DOCS, EXPORT_MAX_DOCS)
+    compress = arguments.get("compress", True)
+    path = export_path(index, arguments.get("output"), compress)
+
+    body = {"query": query, "size": page_size}
+    source = build_source(arguments.get("source"))
+    if source:
+        body["_source"] = source
+
+    counts = {"docs": 0, "truncated": False}
+    started = time.monotonic()
+    handle = gzip.open(path, "wt", encoding="utf-8") if compress else open(path, "w", encoding="utf-8")
+
+    def write(hits: list) -> bool:
+        """Append a page to the file. Returns False once max_docs is reached."""
+        remaining = max_docs - counts["docs"]
+        if len(hits) > remaining:
+            hits = hits[:remaining]
+            counts["truncated"] = True
+        handle.write("".join(json.dumps(h.get("_source", {}), default=str) + "\n" for h in hits))
+        counts["docs"] += len(hits)
+        return not counts["truncated"]
+
+    try:
+        if mode == "scroll":
+            body["sort"] = ["_doc"]
+            tasks = [asyncio.create_task(export_scroll_slice(client, base_url, index, body, i, slices, write))
+                     for i in range(slices)]
+            try:
+                await asyncio.gather(*tasks)
+            finally:
+                # A failed slice must not leave the others writing to a closed file;
+                # cancelled slices still clear their scroll contexts
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+        else:
+            body["sort"] = [{"_shard_doc": "asc"}]
+            body["track_total_hits"] = False
+            state = {"pit": await open_pit(client, base_url, index), "body": body}
+            while True:
+                data, next_cursor = await fetch_pit_page(client, base_url, state)
+                if "error" in data:
+                    raise RuntimeError(json.dumps(data["error"]))
+                if not write(data.get("hits", {}).get("hits", [])):
+                    await close_pit(client, base_url, state["pit"])
+                    break
+                if not next_cursor:
+                    break
+    except BaseException:
+        # Do not leave a partial export behind
+        handle.close()
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        raise
+    finally:
+        handle.close()
+
+    elapsed = time.monotonic() - started
+    return {
+        "file": path,
+        "docs": counts["docs"],
+        "bytes": os.path.getsize(path),
+        "truncated": counts["truncated"],
+        "mode": mode,
+        "slices": slices,
+        "elapsed_s": round(elapsed, 2),
+        "docs_per_sec": round(counts["docs"] / elapsed, 1) if elapsed > 0 else None
+    }
+
+def record_error(stats: dict, error: dict):
+    """Count a bulk import error, keeping the first BULK_ERROR_SAMPLES as samples."""
+    stats["error_count"] += 1
+    if len(stats["errors"]) < BULK_ERROR_SAMPLES:
+        stats["errors"].append(error)
+
+async def send_bulk_batch(client: httpx.AsyncClient, base_url: str, batch: list, max_retries: int, stats: dict):
+    """Send one _bulk batch, retrying 429-rejected documents with exponential backoff."""
+    attempt = 0
+    while batch:
+        payload = "".join(f"{action}\n{doc}\n" for action, doc in batch)
+        response = await client.post(
+            f"{base_url}/_bulk",
+            params={"filter_path": "errors,items.*.status,items.*.error.type,items.*.error.reason"},
+            content=payload,
+            headers={"Content-Type": "application/x-ndjson"}
+        )
+
+        if response.status_code == 429:
+            retry = batch
+        elif response.status_code >= 400:
+            raise RuntimeError(f"_bulk returned {response.status_code}: {response.text[:500]}")
+        else:
+            retry = []
+            for pair, item in zip(batch, response.json().get("items", [])):
+                result = next(iter(item.values()))
+                status = result.get("status", 500)
+                if status == 429:
+                    retry.append(pair)
+                elif status >= 300:
+                    stats["failed"] += 1
+                    record_error(stats, result.get("error", {"status": status}))
+                else:
+                    stats["indexed"] += 1
+
+        batch = retry
+        if batch:
+            attempt += 1
+            if attempt > max_retries:
+                stats["failed"] += len(batch)
+                record_error(stats, {"type": "es_rejected_execution_exception", "reason": f"{len(batch)} documents still rejected after {max_retries} retries"})
+                return
+            stats["retries"] += 1
+            await asyncio.sleep(min(30.0, 0.5 * 2 ** attempt) * (0.5 + random.random()))
+
+async def bulk_index_file(client: httpx.AsyncClient, base_url: str, arguments: dict) -> dict:
+    """Stream an NDJSON file through _bulk with a bounded queue feeding concurrent workers."""
+    index = arguments.get("index")
+    path = import_path(arguments.get("file"))
+    id_field = arguments.get("id_field")
+    batch_docs = max(1, arguments.get("batch_docs", 1000))
+    batch_bytes = max(1024, arguments.get("batch_bytes", 5 * 1024 * 1024))
+    workers = max(1, min(arguments.get("workers", 4), 16))
+    max_retries = arguments.get("max_retries", 5)
+
+    # A full queue blocks the reader: at most 2 batches per worker wait in memory
+    queue = asyncio.Queue(maxsize=workers * 2)
+    stats = {"indexed": 0, "failed": 0, "retries": 0, "batches": 0, "error_count": 0, "errors": []}
+
+    async def worker():
+        while True:
+            batch = await queue.get()
+            if batch is None:
+                return
+            try:
+                await send_bulk_batch(client, base_url, batch, max_retries, stats)
+            except Exception as e:
+                stats["failed"] += len(batch)
+                record_error(stats, {"type": type(e).__name__, "reason": str(e)})
+
+    def read_chunk(first_line: int) -> tuple[int, list, list]:
+        """Read and prepare the next BULK_READ_LINES lines (runs in a worker thread).
+
+        Returns the number of lines read, the (action, doc) pairs and the
+        numbers of lines that are not valid JSON.
+        """
+        lines = list(itertools.islice(handle, BULK_READ_LINES))
+        pairs, invalid = [], []
+        for line_number, line in enumerate(lines, first_line):
+            line = line.strip()
+            if not line:
+                continue
+            action = {"_index": index}
+            if id_field:
+                try:
+                    doc_id = get_field(json.loads(line), id_field)
+                except json.JSONDecodeError:
+                    invalid.append(line_number)
+                    continue
+                if doc_id is not None:
+                    action["_id"] = str(doc_id)
+            pairs.append((json.dumps({"index": action}), line))
+        return len(lines), pairs, invalid
+
+    # Open before starting workers so a missing file cannot strand them on queue.get()
+    handle = gzip.open(path, "rt", encoding="utf-8") if path.endswith(".gz") else open(path, encoding="utf-8")
+    started = time.monotonic()
+    tasks = [asyncio.create_task(worker()) for _ in range(workers)]
+    try:
+        batch, size = [], 0
+        line_number = 1
+        while True:
+            # File reads and JSON parsing stay off the event loop
+            count, pairs, invalid = await asyncio.to_thread(read_chunk, line_number)
+            if not count:
+                break
+            line_number += count
+            for bad in invalid:
+                stats["failed"] += 1
+                record_error(stats, {"type": "invalid_json", "reason": f"line {bad}"})
+            for action, line in pairs:
+                batch.append((action, line))
+                size += len(line)
+                if len(batch) >= batch_docs or size >= batch_bytes:
+                    stats["batches"] += 1
+                    await queue.put(batch)
+                    batch, size = [], 0
+        if batch:
+            stats["batches"] += 1
+            await queue.put(batch)
+    finally:
+        handle.close()
+        for _ in tasks:
+            await queue.put(None)
+        await asyncio.gather(*tasks)
+
+    if arguments.get("refresh"):
+        await client.post(f"{base_url}/{index}/_refresh")
+
+    elapsed = time.monotonic() - started
+    return {
+        "index": index,
+        "file": path,
+        "indexed": stats["indexed"],
+        "failed": stats["failed"],
+        "batches": stats["batches"],
+        "retries": stats["retries"],
+        "elapsed_s": round(elapsed, 2),
+        "docs_per_sec": round(stats["indexed"] / elapsed, 1) if elapsed > 0 else None,
+        "error_count": stats["error_count"],
+        "errors": stats["errors"]
+    }
+
 @server.call_tool()
 async def call_tool(name: str, arguments: dict) -> list:
     """Execute tool calls."""
@@ -155,7 +1195,9 @@ async def call_tool(name: str, arguments: dict) -> list:
                 query = arguments.get("query", {"match_all": {}})
                 size = min(arguments.get("size", 10), MAX_RESULTS)
                 sort = arguments.get("sort")
-                source = arguments.get("source")
+                source = build_source(arguments.get("source"), arguments.get("source_excludes"))
+                docvalue_fields = arguments.get("docvalue_fields")
+                max_chars = arguments.get("max_field_chars", MAX_FIELD_CHARS)
 
                 body = {
                     "query": query,
@@ -165,16 +1207,19 @@ async def call_tool(name: str, arguments: dict) -> list:
                     body["sort"] = sort
                 if source:
                     body["_source"] = source
+                if docvalue_fields:
+                    body["docvalue_fields"] = docvalue_fields
 
-                response = await client.post(f"{base_url}/{index}/_search", json=body)
+                response = await client.post(f"{base_url}/{index}/_search",
+                                             params={"filter_path": SEARCH_FILTER_PATH}, json=body)
                 data = response.json()
 
                 # Simplify response
-                if "hits" in data:
+                if "error" not in data:
                     return [TextContent(type="text", text=json.dumps({
-                        "total": data["hits"].get("total", {}).get("value", 0),
+                        "total": data.get("hits", {}).get("total", {}).get("value", 0),
                         "took_ms": data.get("took"),
-                        "hits": [{"_id": h["_id"], **h.get("_source", {})} for h in data["hits"].get("hits", [])]
+                        "hits": simplify_hits(data.get("hits", {}).get("hits", []), max_chars)
                     }, indent=2, default=str))]
 
                 return [TextContent(type="text", text=json.dumps(data, indent=2))]
@@ -185,42 +1230,125 @@ async def call_tool(name: str, arguments: dict) -> list:
                 time_field = arguments.get("time_field", "@timestamp")
                 time_range = arguments.get("time_range", "1h")
                 size = min(arguments.get("size", 50), MAX_RESULTS)
+                max_chars = arguments.get("max_field_chars", MAX_FIELD_CHARS)
 
-                body = {
-                    "query": {
-                        "bool": {
-                            "must": [
-                                {"query_string": {"query": query_string}}
-                            ],
-                            "filter": [
-                                {"range": {time_field: {"gte": parse_time_range(time_range)}}}
-                            ]
-                        }
-                    },
+                body = shape_logs_body({
+                    "query": build_logs_query(query_string, time_field, time_range),
                     "sort": [{time_field: "desc"}],
                     "size": size
-                }
+                }, time_field)
 
-                response = await client.post(f"{base_url}/{index}/_search", json=body)
+                response = await client.post(f"{base_url}/{index}/_search",
+                                             params={"filter_path": SEARCH_FILTER_PATH}, json=body)
                 data = response.json()
 
-                if "hits" in data:
-                    logs = []
-                    for hit in data["hits"].get("hits", []):
-                        source = hit.get("_source", {})
-                        logs.append({
-                            "timestamp": source.get(time_field),
-                            "message": source.get("message", source.get("log", "")),
-                            "level": source.get("level", source.get("log.level", "")),
-                            "service": source.get("service", source.get("service.name", ""))
-                        })
+                if "error" not in data:
                     return [TextContent(type="text", text=json.dumps({
-                        "total": data["hits"].get("total", {}).get("value", 0),
-                        "logs": logs
+                        "total": data.get("hits", {}).get("total", {}).get("value", 0),
+                        "logs": format_logs(data.get("hits", {}).get("hits", []), time_field, max_chars)
                     }, indent=2, default=str))]
 
                 return [TextContent(type="text", text=json.dumps(data, indent=2))]
 
+            elif name in ("es_search_page", "es_logs_page"):
+                cursor = arguments.get("cursor")
+
+                if cursor:
+                    state = decode_cursor(cursor)
+                    if arguments.get("close"):
+                        await close_pit(client, base_url, state["pit"])
+                        return [TextContent(type="text", text="Point-in-time closed")]
+                    if "size" in arguments:
+                        state["body"]["size"] = min(arguments["size"], MAX_RESULTS)
+                elif name == "es_search_page":
+                    index = arguments.get("index")
+                    if not index:
+                        return [TextContent(type="text", text="Error: index is required for the first page")]
+                    sort = list(arguments.get("sort") or [])
+                    # _shard_doc is a cheap, unique tiebreaker for search_after within a PIT
+                    if not any(s == "_shard_doc" or (isinstance(s, dict) and "_shard_doc" in s) for s in sort):
+                        sort.append({"_shard_doc": "asc"})
+                    body = {
+                        "query": arguments.get("query", {"match_all": {}}),
+                        "size": min(arguments.get("size", 10), MAX_RESULTS),
+                        "sort": sort
+                    }
+                    source = build_source(arguments.get("source"), arguments.get("source_excludes"))
+                    if source:
+                        body["_source"] = source
+                    if arguments.get("docvalue_fields"):
+                        body["docvalue_fields"] = arguments["docvalue_fields"]
+                    state = {"kind": "search", "pit": await open_pit(client, base_url, index), "body": body}
+                else:
+                    index = arguments.get("index", "logs-*")
+                    time_field = arguments.get("time_field", "@timestamp")
+                    anchor = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+                    body = shape_logs_body({
+                        "query": build_logs_query(arguments.get("query", "*"), time_field,
+                                                  arguments.get("time_range", "1h"), anchor),
+                        "size": min(arguments.get("size", 50), MAX_RESULTS),
+                        "sort": [{time_field: "desc"}, {"_shard_doc": "desc"}]
+                    }, time_field)
+                    state = {"kind": "logs", "pit": await open_pit(client, base_url, index), "body": body,
+                             "time_field": time_field}
+
+                data, next_cursor = await fetch_pit_page(client, base_url, state)
+                if "error" in data:
+                    return [TextContent(type="text", text=json.dumps(data, indent=2))]
+
+                hits = data.get("hits", {}).get("hits", [])
+                max_chars = arguments.get("max_field_chars", MAX_FIELD_CHARS)
+                result = {"took_ms": data.get("took")}
+                if "total" in data.get("hits", {}):
+                    result["total"] = data["hits"]["total"].get("value", 0)
+                if state["kind"] == "logs":
+                    result["logs"] = format_logs(hits, state["time_field"], max_chars)
+                else:
+                    result["hits"] = simplify_hits(hits, max_chars)
+                result["cursor"] = next_cursor
+
+                return [TextContent(type="text", text=json.dumps(result, indent=2, default=str))]
+
+            elif name == "es_export":
+                if not arguments.get("index"):
+                    return [TextContent(type="text", text="Error: index is required")]
+                summary = await run_export(client, base_url, arguments)
+                return [TextContent(type="text", text=json.dumps(summary, indent=2))]
+
+            elif name == "es_msearch":
+                searches = arguments.get("searches") or []
+                if not searches:
+                    return [TextContent(type="text", text="Error: searches is required")]
+                ids, payload = build_msearch(searches, arguments.get("index"))
+
+                params = {"filter_path": MSEARCH_FILTER_PATH}
+                if arguments.get("max_concurrent_searches"):
+                    params["max_concurrent_searches"] = arguments["max_concurrent_searches"]
+
+                response = await client.post(
+                    f"{base_url}/_msearch",
+                    params=params,
+                    content=payload,
+                    headers={"Content-Type": "application/x-ndjson"}
+                )
+                data = response.json()
+
+                if "responses" in data:
+                    return [TextContent(type="text", text=json.dumps({
+                        "took_ms": data.get("took"),
+                        "results": simplify_msearch(ids, data, arguments.get("max_field_chars", MAX_FIELD_CHARS))
+                    }, indent=2, default=str))]
+
+                return [TextContent(type="text", text=json.dumps(data, indent=2))]
+
+            elif name == "es_log_patterns":
+                result = await mine_log_patterns(client, base_url, arguments)
+                return [TextContent(type="text", text=json.dumps(result, indent=2, default=str))]
+
+            elif name == "es_log_timeline":
+                result = await build_log_timeline(client, base_url, arguments)
+                return [TextContent(type="text", text=json.dumps(result, indent=2, default=str))]
+
             elif name == "es_indices":
                 pattern = arguments.get("pattern", "*")
                 response = await client.get(f"{base_url}/_cat/indices/{pattern}?format=json&h=index,health,status,docs.count,store.size")
@@ -244,6 +1372,32 @@ async def call_tool(name: str, arguments: dict) -> list:
 
                 return [TextContent(type="text", text=json.dumps(data, indent=2))]
 
+            elif name == "es_fields":
+                catalog = await get_field_catalog(client, base_url, arguments.get("index"), arguments.get("refresh", False))
+                match = arguments.get("match")
+                field_type = arguments.get("type")
+                aggregatable = arguments.get("aggregatable")
+                limit = arguments.get("limit", 200)
+
+                fields = []
+                for field, entry in sorted(catalog["fields"].items()):
+                    if match and not (fnmatch.fnmatch(field, match) or match in field):
+                        continue
+                    types = entry["type"] if isinstance(entry["type"], list) else [entry["type"]]
+                    if field_type and field_type not in types:
+                        continue
+                    if aggregatable is not None and entry["aggregatable"] != aggregatable:
+                        continue
+                    fields.append({"name": field, **entry})
+
+                return [TextContent(type="text", text=json.dumps({
+                    "index": arguments.get("index"),
+                    "index_count": len(catalog["indices"]),
+                    "catalog_age_s": round(time.monotonic() - catalog["loaded"]),
+                    "matched": len(fields),
+                    "fields": fields[:limit]
+                }, indent=2))]
+
             elif name == "es_mapping":
                 index = arguments.get("index")
                 response = await client.get(f"{base_url}/{index}/_mapping")
@@ -274,8 +1428,12 @@ async def call_tool(name: str, arguments: dict) -> list:
                     "aggs": aggs,
                     "size": size
                 }
+                filter_path = "took,error,aggregations"
+                if arguments.get("filter_path"):
+                    filter_path = f"took,error,{arguments['filter_path']}"
 
-                response = await client.post(f"{base_url}/{index}/_search", json=body)
+                response = await client.post(f"{base_url}/{index}/_search",
+                                             params={"filter_path": filter_path}, json=body)
                 data = response.json()
 
                 if "aggregations" in data:
@@ -312,6 +1470,13 @@ async def call_tool(name: str, arguments: dict) -> list:
                 data = response.json()
                 return [TextContent(type="text", text=json.dumps(data, indent=2, default=str)[:10000])]
 
+            # Write operations
+            elif name == "es_bulk_index" and not READONLY:
+                if not arguments.get("index") or not arguments.get("file"):
+                    return [TextContent(type="text", text="Error: index and file are required")]
+                result = await bulk_index_file(client, base_url, arguments)
+                return [TextContent(type="text", text=json.dumps(result, indent=2, default=str))]
+
             else:
                 return [TextContent(type="text", text=f"Unknown tool: {name}")]
 
@@ -1,12 +1,22 @@
 #!/usr/bin/env python3
 """
 Kubernetes MCP Server for Codex CLI
-K8s operations via kubectl.
+K8s operations via the Kubernetes API (kubectl as fallback).
 """
 import os
+import ssl
 import json
+import time
+import base64
 import asyncio
+import re
+import tempfile
+import contextvars
 import subprocess
+from datetime import datetime, timezone
+from collections import defaultdict, deque
+from urllib.parse import urlencode
+import httpx
 from mcp.server import Server
 from mcp.types import Tool, TextContent
 
@@ -14,9 +24,81 @@ from mcp.types import Tool, TextContent
 KUBECONFIG = os.getenv("KUBECONFIG", "~/.kube/config")
 DEFAULT_NAMESPACE = os.getenv("K8S_NAMESPACE", "default")
 READONLY = os.getenv("MCP_K8S_READONLY", "true").lower() == "true"
+CLIENT_MODE = os.getenv("MCP_K8S_CLIENT", "api").lower()
+TIMEOUT = int(os.getenv("MCP_K8S_TIMEOUT", "30"))
+# Resource types served from watch-backed in-memory caches, e.g. "pods,deployments,services,events"
+INFORMERS = {r.strip() for r in os.getenv("MCP_K8S_INFORMERS", "").split(",") if r.strip()}
+INFORMER_SYNC_TIMEOUT = int(os.getenv("MCP_K8S_INFORMER_SYNC_TIMEOUT", "60"))
+CONTEXT_TIMEOUT = int(os.getenv("MCP_K8S_CONTEXT_TIMEOUT", "20"))
+WATCH_TIMEOUT = 300
+LOG_STREAM_CONCURRENCY = 10
+LOG_LIMIT_BYTES = 2 * 1024 * 1024  # per container
+MAX_EVENT_WAIT = 120
+# Background metrics sampling for k8s_top_history (0 disables)
+METRICS_SAMPLE_INTERVAL = int(os.getenv("MCP_K8S_METRICS_SAMPLE_INTERVAL", "60"))
+METRICS_HISTORY_SECONDS = int(os.getenv("MCP_K8S_METRICS_HISTORY", "900"))
+METRICS_PATH = "/apis/metrics.k8s.io/v1beta1"
+LIST_CHUNK_SIZE = 500
+
+SERVICE_ACCOUNT_DIR = "/var/run/secrets/kubernetes.io/serviceaccount"
+
+# API group/version prefix for the resource types the tools use directly.
+# Anything else goes through kubectl.
+RESOURCE_PATHS = {
+    "pods": "/api/v1",
+    "services": "/api/v1",
+    "nodes": "/api/v1",
+    "namespaces": "/api/v1",
+    "events": "/api/v1",
+    "configmaps": "/api/v1",
+    "secrets": "/api/v1",
+    "endpoints": "/api/v1",
+    "persistentvolumeclaims": "/api/v1",
+    "persistentvolumes": "/api/v1",
+    "serviceaccounts": "/api/v1",
+    "deployments": "/apis/apps/v1",
+    "statefulsets": "/apis/apps/v1",
+    "daemonsets": "/apis/apps/v1",
+    "replicasets": "/apis/apps/v1",
+    "jobs": "/apis/batch/v1",
+    "cronjobs": "/apis/batch/v1",
+    "ingresses": "/apis/networking.k8s.io/v1",
+    "networkpolicies": "/apis/networking.k8s.io/v1",
+    "horizontalpodautoscalers": "/apis/autoscaling/v2",
+}
+CLUSTER_SCOPED = {"nodes", "namespaces", "persistentvolumes"}
+
+# Server-side Table columns behind each summary field (None = object namespace).
+# Listing these as Tables moves a few cells per row instead of full objects.
+TABLE_ACCEPT = "application/json;as=Table;v=v1;g=meta.k8s.io,application/json"
+PARTIAL_METADATA_ACCEPT = "application/json;as=PartialObjectMetadataList;v=v1;g=meta.k8s.io,application/json"
+TABLE_COLUMNS = {
+    "pods": {"namespace": None, "status": "Status", "ready": "Ready", "restarts": "Restarts", "node": "Node"},
+    "deployments": {"namespace": None, "ready": "Ready", "up_to_date": "Up-to-date", "available": "Available"},
+    "services": {"namespace": None, "type": "Type", "cluster_ip": "Cluster-IP", "ports": "Port(s)"},
+    "nodes": {"status": "Status", "roles": "Roles", "version": "Version", "os": "OS-Image"},
+    "secrets": {"type": "Type"},
+}
 
 server = Server("kubernetes-mcp")
 
+# Kubeconfig (as JSON) and API clients by context name, built on first use
+_kubeconfig = None
+_kubeconfig_error = None
+_clients = {}
+_informers = {}
+# Kubeconfig context for the current call; None means the current-context
+_current_context = contextvars.ContextVar("k8s_context", default=None)
+_metrics_history = {"nodes": deque(), "pods": deque()}
+_metrics_sampler = None
+
+class KubeError(Exception):
+    """Error returned by the Kubernetes API or kubectl."""
+
+    def __init__(self, message: str, code: int = None):
+        super().__init__(message)
+        self.code = code
+
 def run_kubectl(args: list, timeout: int = 30) -> tuple[str, int]:
     """Run kubectl command."""
     try:
@@ -36,6 +118,1361 @@ def run_kubectl(args: list, timeout: int = 30) -> tuple[str, int]:
     except Exception as e:
         return str(e), 1
 
+async def kubectl(args: list, timeout: int = 30) -> tuple[str, int]:
+    """Run kubectl in a worker thread so the event loop keeps serving."""
+    context = _current_context.get()
+    if context:
+        args = ["--context", context] + args
+    return await asyncio.to_thread(run_kubectl, args, timeout)
+
+def resource_path(resource: str, namespace: str = None, name: str = None, subresource: str = None) -> str:
+    """Build the API path for a resource collection or object."""
+    path = RESOURCE_PATHS[resource]
+    if namespace and resource not in CLUSTER_SCOPED:
+        path += f"/namespaces/{namespace}"
+    path += f"/{resource}"
+    if name:
+        path += f"/{name}"
+    if subresource:
+        path += f"/{subresource}"
+    return path
+
+def load_kubeconfig(retry: bool = False) -> dict:
+    """Load the merged kubeconfig as a dict.
+
+    `kubectl config view --raw -o json` merges KUBECONFIG lists and inlines
+    nothing we would have to re-implement; it runs once per process. Without
+    kubectl, a single kubeconfig file is read directly (JSON, or YAML when
+    PyYAML is installed). A failed load is re-raised from cache unless
+    `retry` is set, so callers on the event loop never spawn kubectl.
+    """
+    global _kubeconfig, _kubeconfig_error
+    if _kubeconfig is None:
+        if _kubeconfig_error is not None and not retry:
+            raise _kubeconfig_error
+        try:
+            output, code = run_kubectl(["config", "view", "--raw", "-o", "json"])
+            if code == 0:
+                _kubeconfig = json.loads(output)
+            else:
+                path = os.path.expanduser(KUBECONFIG.split(os.pathsep)[0])
+                with open(path) as f:
+                    text = f.read()
+                try:
+                    _kubeconfig = json.loads(text)
+                except ValueError:
+                    import yaml
+                    _kubeconfig = yaml.safe_load(text)
+        except Exception as e:
+            _kubeconfig_error = e
+            raise
+    return _kubeconfig
+
+async def ensure_kubeconfig():
+    """Load the kubeconfig in a worker thread; later load_kubeconfig() calls hit the cache."""
+    if _kubeconfig is None and CLIENT_MODE != "kubectl":
+        try:
+            await asyncio.to_thread(load_kubeconfig, True)
+        except Exception:
+            # No kubeconfig: get_kube_client falls back to in-cluster or kubectl
+            pass
+
+def write_temp_pem(data: str) -> str:
+    """Write base64 PEM data to a private temp file (ssl needs file paths for client certs)."""
+    fd, path = tempfile.mkstemp(prefix="mcp-k8s-", suffix=".pem")
+    with os.fdopen(fd, "wb") as f:
+        f.write(base64.b64decode(data))
+    return path
+
+def tls_context(cluster: dict, user: dict) -> ssl.SSLContext:
+    """SSL context for a kubeconfig cluster/user: CA trust plus the client certificate, if any.
+
+    Inline cert/key data goes through temp files only for load_cert_chain and
+    is unlinked right after.
+    """
+    if cluster.get("certificate-authority-data"):
+        context = ssl.create_default_context(cadata=base64.b64decode(cluster["certificate-authority-data"]).decode())
+    elif cluster.get("certificate-authority"):
+        context = ssl.create_default_context(cafile=os.path.expanduser(cluster["certificate-authority"]))
+    else:
+        context = ssl.create_default_context()
+    if cluster.get("insecure-skip-tls-verify"):
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+
+    if user.get("client-certificate-data"):
+        paths = []
+        try:
+            paths.append(write_temp_pem(user["client-certificate-data"]))
+            paths.append(write_temp_pem(user["client-key-data"]))
+            context.load_cert_chain(*paths)
+        finally:
+            for path in paths:
+                os.unlink(path)
+    elif user.get("client-certificate"):
+        context.load_cert_chain(os.path.expanduser(user["client-certificate"]), os.path.expanduser(user["client-key"]))
+    return context
+
+class KubeClient:
+    """Persistent async client for one cluster's API server.
+
+    Connections are pooled across tool calls. Bearer tokens come from the
+    kubeconfig, a token file or an exec credential plugin, and exec tokens
+    are cached until shortly before they expire.
+    """
+
+    def __init__(self, server_url: str, verify, token: str = None, token_file: str = None,
+                 exec_config: dict = None, auth=None):
+        self.server_url = server_url.rstrip("/")
+        self.token = token
+        self.token_file = token_file
+        self.exec_config = exec_config
+        self.token_expiry = 0.0
+        # One plugin run refreshes the token for every request waiting on it
+        self.token_lock = asyncio.Lock()
+        self.http = httpx.AsyncClient(
+            base_url=self.server_url,
+            verify=verify,
+            auth=auth,
+            timeout=TIMEOUT,
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+            headers={"Accept": "application/json", "User-Agent": "kubernetes-mcp"}
+        )
+
+    @classmethod
+    def from_kubeconfig(cls, context_name: str = None) -> "KubeClient":
+        config = load_kubeconfig()
+        context_name = context_name or config.get("current-context")
+        context = next(c["context"] for c in config.get("contexts", []) if c["name"] == context_name)
+        cluster = next(c["cluster"] for c in config.get("clusters", []) if c["name"] == context["cluster"])
+        user = next((u["user"] for u in config.get("users", []) if u["name"] == context.get("user")), {}) or {}
+
+        verify = tls_context(cluster, user)
+
+        token = user.get("token")
+        provider = user.get("auth-provider", {}).get("config", {})
+        token = token or provider.get("access-token") or provider.get("id-token")
+        auth = (user["username"], user["password"]) if user.get("username") and user.get("password") else None
+
+        return cls(cluster["server"], verify, token=token, token_file=user.get("tokenFile"),
+                   exec_config=user.get("exec"), auth=auth)
+
+    @classmethod
+    def in_cluster(cls) -> "KubeClient":
+        host = os.environ["KUBERNETES_SERVICE_HOST"]
+        port = os.environ.get("KUBERNETES_SERVICE_PORT", "443")
+        verify = ssl.create_default_context(cafile=f"{SERVICE_ACCOUNT_DIR}/ca.crt")
+        return cls(f"https://{host}:{port}", verify, token_file=f"{SERVICE_ACCOUNT_DIR}/token")
+
+    async def exec_token(self) -> str:
+        """The exec plugin token, refreshed by a single plugin run near expiry."""
+        if self.token and time.time() < self.token_expiry:
+            return self.token
+        async with self.token_lock:
+            if self.token and time.time() < self.token_expiry:
+                return self.token
+            return await self.run_exec_plugin()
+
+    async def run_exec_plugin(self) -> str:
+        """Run the exec credential plugin and cache the token it returns."""
+        env = os.environ.copy()
+        env.update({e["name"]: e["value"] for e in self.exec_config.get("env") or []})
+        env["KUBERNETES_EXEC_INFO"] = json.dumps({
+            "apiVersion": self.exec_config.get("apiVersion", "client.authentication.k8s.io/v1"),
+            "kind": "ExecCredential",
+            "spec": {"interactive": False}
+        })
+        proc = await asyncio.create_subprocess_exec(
+            self.exec_config["command"], *(self.exec_config.get("args") or []),
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE, env=env
+        )
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), TIMEOUT)
+        if proc.returncode != 0:
+            raise KubeError(f"exec credential plugin failed: {stderr.decode()[:500]}")
+        status = json.loads(stdout).get("status", {})
+        self.token = status.get("token")
+        expiry = status.get("expirationTimestamp")
+        if expiry:
+            self.token_expiry = datetime.fromisoformat(expiry.replace("Z", "+00:00")).timestamp() - 60
+        else:
+            self.token_expiry = time.time() + 600
+        return self.token
+
+    async def auth_headers(self) -> dict:
+        if self.exec_config:
+            token = await self.exec_token()
+        elif self.token_file:
+            with open(self.token_file) as f:
+                token = f.read().strip()
+        else:
+            token = self.token
+        return {"Authorization": f"Bearer {token}"} if token else {}
+
+    async def request(self, method: str, path: str, params: dict = None, body=None,
+                      content_type: str = "application/json", accept: str = None) -> httpx.Response:
+        headers = await self.auth_headers()
+        if accept:
+            headers["Accept"] = accept
+        if body is not None:
+            headers["Content-Type"] = content_type
+        response = await self.http.request(method, path, params=params, headers=headers,
+                                           content=json.dumps(body) if body is not None else None)
+        if response.status_code >= 400:
+            raise api_error(response)
+        return response
+
+    async def stream_lines(self, path: str, params: dict = None, timeout: float = None, accept: str = None):
+        """Stream a GET response line by line (watches, pod logs)."""
+        headers = await self.auth_headers()
+        if accept:
+            headers["Accept"] = accept
+        request_timeout = httpx.Timeout(TIMEOUT, read=timeout)
+        async with self.http.stream("GET", path, params=params, headers=headers, timeout=request_timeout) as response:
+            if response.status_code >= 400:
+                await response.aread()
+                raise api_error(response)
+            async for line in response.aiter_lines():
+                yield line
+
+    async def watch(self, path: str, params: dict = None, timeout: float = None):
+        """Stream watch events for a collection, yielding one decoded event per line."""
+        async for line in self.stream_lines(path, dict(params or {}, watch="true"), timeout):
+            if line.strip():
+                yield json.loads(line)
+
+def api_error(response: httpx.Response) -> KubeError:
+    """Turn an API error response (usually a Status object) into a KubeError."""
+    try:
+        status = response.json()
+        return KubeError(f"{status.get('reason', response.status_code)}: {status.get('message', '')}", response.status_code)
+    except ValueError:
+        return KubeError(f"HTTP {response.status_code}: {response.text[:500]}", response.status_code)
+
+def get_kube_client(context: str = None):
+    """Get the cached API client for a context, or None to use kubectl."""
+    if CLIENT_MODE == "kubectl":
+        return None
+    context = context or _current_context.get()
+    key = context or ""
+    if key not in _clients:
+        try:
+            if not context and os.environ.get("KUBERNETES_SERVICE_HOST") and not os.path.exists(os.path.expanduser(KUBECONFIG)):
+                _clients[key] = KubeClient.in_cluster()
+            else:
+                _clients[key] = KubeClient.from_kubeconfig(context)
+        except Exception:
+            # No usable kubeconfig for a direct client: fall back to kubectl
+            _clients[key] = None
+    return _clients[key]
+
+async def kube_get(path: str, params: dict = None, accept: str = None, raw: bool = False):
+    """GET an API path, through the API client or `kubectl get --raw`.
+
+    Returns parsed JSON, or the response text when raw is set (pod logs).
+    """
+    params = {k: v for k, v in (params or {}).items() if v is not None}
+    client = get_kube_client()
+    if client:
+        response = await client.request("GET", path, params=params, accept=accept)
+        return response.text if raw else response.json()
+
+    query = f"?{urlencode(params)}" if params else ""
+    output, code = await kubectl(["get", "--raw", path + query], timeout=60)
+    if code != 0:
+        raise KubeError(output.strip())
+    return output if raw else json.loads(output)
+
+async def kube_list(resource: str, namespace: str = None, label_selector: str = None, field_selector: str = None,
+                    limit: int = None, cont: str = None, accept: str = None) -> dict:
+    """List a resource type in a namespace (or all namespaces when namespace is None).
+
+    The list is fetched in LIST_CHUNK_SIZE chunks via limit/continue. With an
+    explicit limit only that one page is returned; its metadata.continue
+    resumes the list.
+    """
+    params = {
+        "labelSelector": label_selector,
+        "fieldSelector": field_selector,
+        "limit": limit or LIST_CHUNK_SIZE,
+        "continue": cont
+    }
+    if accept == TABLE_ACCEPT:
+        params["includeObject"] = "Metadata"
+    path = resource_path(resource, namespace)
+    data = await kube_get(path, params, accept)
+    if limit:
+        return data
+
+    key = "rows" if data.get("kind") == "Table" else "items"
+    while data.get("metadata", {}).get("continue"):
+        params["continue"] = data["metadata"]["continue"]
+        page = await kube_get(path, params, accept)
+        data[key].extend(page.get(key) or [])
+        data["metadata"] = page.get("metadata", {})
+    return data
+
+def table_summaries(resource: str, table: dict) -> list:
+    """Map server-side Table rows onto the same keys the summarize_* helpers produce."""
+    columns = [c["name"] for c in table.get("columnDefinitions", [])]
+    summaries = []
+    for row in table.get("rows") or []:
+        cells = {c: ("" if v == "<none>" else v) for c, v in zip(columns, row["cells"])}
+        metadata = row.get("object", {}).get("metadata", {})
+        summary = {"name": metadata.get("name", cells.get("Name"))}
+        for key, column in TABLE_COLUMNS[resource].items():
+            summary[key] = metadata.get("namespace") if column is None else cells.get(column)
+        if isinstance(summary.get("restarts"), str):
+            # "3 (5m ago)" on newer servers
+            summary["restarts"] = int(summary["restarts"].split()[0] or 0)
+        if "ports" in summary:
+            summary["ports"] = summary["ports"].split(",") if summary["ports"] else []
+        summaries.append(summary)
+    return summaries
+
+def parse_selector(selector: str):
+    """Parse an equality-based label selector into (key, op, value) requirements.
+
+    Returns None for set-based selectors (`in`, `notin`), which are left to
+    the API server.
+    """
+    if not selector:
+        return []
+    if "(" in selector:
+        return None
+    requirements = []
+    for part in selector.split(","):
+        part = part.strip()
+        if "!=" in part:
+            key, value = part.split("!=", 1)
+            requirements.append((key.strip(), "!=", value.strip()))
+        elif "=" in part:
+            key, value = part.replace("==", "=").split("=", 1)
+            requirements.append((key.strip(), "=", value.strip()))
+        elif part.startswith("!"):
+            requirements.append((part[1:].strip(), "!", None))
+        elif part:
+            requirements.append((part, "exists", None))
+    return requirements
+
+def matches_selector(labels: dict, requirements: list) -> bool:
+    for key, op, value in requirements:
+        if op == "=" and labels.get(key) != value:
+            return False
+        if op == "!=" and labels.get(key) == value:
+            return False
+        if op == "exists" and key not in labels:
+            return False
+        if op == "!" and key in labels:
+            return False
+    return True
+
+def trim_object(obj: dict) -> dict:
+    """Drop the bulky metadata no tool reads before keeping an object in memory."""
+    metadata = obj.get("metadata", {})
+    metadata.pop("managedFields", None)
+    metadata.get("annotations", {}).pop("kubectl.kubernetes.io/last-applied-configuration", None)
+    return obj
+
+class Informer:
+    """LIST-then-WATCH cache of one resource type across all namespaces.
+
+    Objects are indexed by namespace, label (key=value) and, for pods, node.
+    Watch bookmarks keep the resourceVersion current, so a dropped watch
+    resumes without a relist; a 410 Gone triggers a fresh LIST.
+    """
+
+    def __init__(self, client: KubeClient, resource: str):
+        self.client = client
+        self.resource = resource
+        self.items = {}
+        self.by_namespace = defaultdict(set)
+        self.by_label = defaultdict(set)
+        self.by_node = defaultdict(set)
+        self.resource_version = None
+        self.synced = asyncio.Event()
+        self.attempted = asyncio.Event()  # set once the first LIST finished or failed
+        self.last_update = None
+        self.error = None
+        self.task = None
+
+    def start(self):
+        self.task = asyncio.create_task(self.run())
+
+    async def run(self):
+        path = resource_path(self.resource)
+        while True:
+            try:
+                if self.resource_version is None:
+                    await self.relist()
+                params = {"resourceVersion": self.resource_version, "allowWatchBookmarks": "true",
+                          "timeoutSeconds": WATCH_TIMEOUT}
+                async for event in self.client.watch(path, params, timeout=WATCH_TIMEOUT + 30):
+                    self.apply(event)
+                self.error = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if isinstance(e, KubeError) and e.code == 410:
+                    # resourceVersion too old: start over with a LIST
+                    self.resource_version = None
+                self.error = str(e)
+                self.attempted.set()
+                await asyncio.sleep(5)
+
+    async def relist(self):
+        """Full paged LIST; replaces the store in one step once complete."""
+        items = {}
+        params = {"limit": 500}
+        while True:
+            response = await self.client.request("GET", resource_path(self.resource), params=params)
+            data = response.json()
+            for obj in data.get("items", []):
+                items[self.key(obj)] = trim_object(obj)
+            cont = data.get("metadata", {}).get("continue")
+            if not cont:
+                break
+            params["continue"] = cont
+
+        self.items = {}
+        self.by_namespace.clear()
+        self.by_label.clear()
+        self.by_node.clear()
+        for key, obj in items.items():
+            self.put(key, obj)
+        self.resource_version = data["metadata"].get("resourceVersion")
+        self.last_update = time.time()
+        self.error = None
+        self.synced.set()
+        self.attempted.set()
+
+    def apply(self, event: dict):
+        obj = event.get("object", {})
+        if event["type"] == "ERROR":
+            raise KubeError(obj.get("message", "watch error"), obj.get("code"))
+
+        self.resource_version = obj["metadata"]["resourceVersion"]
+        self.last_update = time.time()
+        if event["type"] == "BOOKMARK":
+            return
+        key = self.key(obj)
+        self.remove(key)
+        if event["type"] != "DELETED":
+            self.put(key, trim_object(obj))
+
+    @staticmethod
+    def key(obj: dict) -> str:
+        return f"{obj['metadata'].get('namespace', '')}/{obj['metadata']['name']}"
+
+    def put(self, key: str, obj: dict):
+        self.items[key] = obj
+        self.by_namespace[obj["metadata"].get("namespace", "")].add(key)
+        for label, value in (obj["metadata"].get("labels") or {}).items():
+            self.by_label[f"{label}={value}"].add(key)
+        node = obj.get("spec", {}).get("nodeName")
+        if node:
+            self.by_node[node].add(key)
+
+    def remove(self, key: str):
+        obj = self.items.pop(key, None)
+        if obj is None:
+            return
+        self.by_namespace[obj["metadata"].get("namespace", "")].discard(key)
+        for label, value in (obj["metadata"].get("labels") or {}).items():
+            self.by_label[f"{label}={value}"].discard(key)
+        node = obj.get("spec", {}).get("nodeName")
+        if node:
+            self.by_node[node].discard(key)
+
+    def select(self, namespace: str = None, requirements: list = None, node: str = None) -> list:
+        """Objects matching namespace, label requirements and node, using the indexes."""
+        keys = None
+        if namespace:
+            keys = set(self.by_namespace.get(namespace, ()))
+        if node:
+            node_keys = self.by_node.get(node, set())
+            keys = keys & node_keys if keys is not None else set(node_keys)
+        for key, op, value in requirements or []:
+            if op == "=":
+                label_keys = self.by_label.get(f"{key}={value}", set())
+                keys = keys & label_keys if keys is not None else set(label_keys)
+        if keys is None:
+            keys = self.items.keys()
+        objs = [self.items[k] for k in keys if k in self.items]
+        return [o for o in objs if matches_selector(o["metadata"].get("labels") or {}, requirements or [])]
+
+    def status(self) -> dict:
+        return {
+            "resource": self.resource,
+            "source": "informer",
+            "synced": self.synced.is_set(),
+            "resource_version": self.resource_version,
+            "age_seconds": round(time.time() - self.last_update, 1) if self.last_update else None,
+            "objects": len(self.items),
+            "error": self.error
+        }
+
+async def cached_list(resource: str, namespace: str = None, label_selector: str = None, node: str = None):
+    """Serve a list from the resource's informer.
+
+    Returns (items, cache status), or None when the resource is not cached,
+    the cache has not synced (in time, or because its LIST fails, e.g. RBAC
+    forbids listing cluster-wide) or the selector needs the API server.
+    """
+    if resource not in INFORMERS:
+        return None
+    requirements = parse_selector(label_selector)
+    if requirements is None:
+        return None
+    client = get_kube_client()
+    if client is None:
+        return None
+
+    key = (_current_context.get() or "", resource)
+    informer = _informers.get(key)
+    if informer is None:
+        informer = _informers[key] = Informer(client, resource)
+        informer.start()
+    # In a fan-out the whole call must fit CONTEXT_TIMEOUT: wait less and let the
+    # informer finish syncing in the background for the next call
+    sync_timeout = INFORMER_SYNC_TIMEOUT if key[0] == "" else min(INFORMER_SYNC_TIMEOUT, CONTEXT_TIMEOUT / 2)
+    try:
+        await asyncio.wait_for(informer.attempted.wait(), sync_timeout)
+    except asyncio.TimeoutError:
+        return None
+    if not informer.synced.is_set():
+        return None
+    return informer.select(namespace, requirements, node), informer.status()
+
+async def list_summaries(resource: str, summarize, namespace: str = None, label_selector: str = None,
+                         field_selector: str = None, limit: int = None, cont: str = None) -> tuple[list, dict]:
+    """Summaries for a list tool, plus response metadata (cache status or paging token).
+
+    Plain lists are served from the informer when one is enabled. Otherwise
+    resources with a TABLE_COLUMNS entry are listed as server-side Tables,
+    and everything else as full objects run through `summarize`.
+    """
+    # A pod field selector on the node alone is served by the informer's node index
+    node = None
+    if resource == "pods" and field_selector:
+        match = re.fullmatch(r"spec\.nodeName==?([^,!=]+)", field_selector.strip())
+        node = match.group(1) if match else None
+    if not ((field_selector and not node) or limit or cont):
+        cached = await cached_list(resource, namespace, label_selector, node)
+        if cached:
+            items, cache = cached
+            return [summarize(obj) for obj in items], {"cache": cache}
+
+    accept = TABLE_ACCEPT if resource in TABLE_COLUMNS else None
+    data = await kube_list(resource, namespace, label_selector, field_selector, limit, cont, accept)
+    if data.get("kind") == "Table":
+        summaries = table_summaries(resource, data)
+    else:
+        summaries = [summarize(obj) for obj in data.get("items") or []]
+
+    page = {}
+    if limit:
+        page = {"continue": data.get("metadata", {}).get("continue") or None,
+                "remaining": data.get("metadata", {}).get("remainingItemCount")}
+    return summaries, page
+
+def list_response(items: list, extra: dict) -> list:
+    """Tool output for a list; cache status or a continue token is returned alongside the items."""
+    result = {**extra, "items": items} if extra else items
+    return [TextContent(type="text", text=json.dumps(result, indent=2))]
+
+def pod_status(pod: dict) -> str:
+    """The STATUS column of `kubectl get pods` (and of the server-side Table), from a full pod."""
+    status = pod["status"]
+    reason = status.get("reason") or status.get("phase") or "Unknown"
+    init_statuses = status.get("initContainerStatuses") or []
+    initializing = False
+    for i, c in enumerate(init_statuses):
+        state = c.get("state", {})
+        terminated, waiting = state.get("terminated"), state.get("waiting")
+        if terminated and terminated.get("exitCode") == 0:
+            continue
+        initializing = True
+        if terminated:
+            reason = "Init:" + (terminated.get("reason") or f"ExitCode:{terminated.get('exitCode')}")
+        elif waiting and waiting.get("reason") and waiting["reason"] != "PodInitializing":
+            reason = "Init:" + waiting["reason"]
+        else:
+            reason = f"Init:{i}/{len(init_statuses)}"
+        break
+    if not initializing:
+        running = False
+        for c in reversed(status.get("containerStatuses") or []):
+            state = c.get("state", {})
+            terminated, waiting = state.get("terminated"), state.get("waiting")
+            if waiting and waiting.get("reason"):
+                reason = waiting["reason"]
+            elif terminated:
+                reason = terminated.get("reason") or f"ExitCode:{terminated.get('exitCode')}"
+            elif c.get("ready") and "running" in state:
+                running = True
+        if reason == "Completed" and running:
+            ready = any(cond["type"] == "Ready" and cond["status"] == "True" for cond in status.get("conditions", []))
+            reason = "Running" if ready else "NotReady"
+    if pod["metadata"].get("deletionTimestamp"):
+        reason = "Unknown" if status.get("reason") == "NodeLost" else "Terminating"
+    return reason
+
+def summarize_pod(pod: dict) -> dict:
+    statuses = pod["status"].get("containerStatuses", [])
+    return {
+        "name": pod["metadata"]["name"],
+        "namespace": pod["metadata"]["namespace"],
+        "status": pod_status(pod),
+        "ready": f"{sum(1 for c in statuses if c.get('ready'))}/{len(pod['spec']['containers'])}",
+        "restarts": sum(c.get("restartCount", 0) for c in statuses),
+        "node": pod["spec"].get("nodeName", "")
+    }
+
+def summarize_deployment(dep: dict) -> dict:
+    return {
+        "name": dep["metadata"]["name"],
+        "namespace": dep["metadata"]["namespace"],
+        "ready": f"{dep['status'].get('readyReplicas', 0)}/{dep['spec'].get('replicas', 0)}",
+        "up_to_date": dep["status"].get("updatedReplicas", 0),
+        "available": dep["status"].get("availableReplicas", 0)
+    }
+
+def summarize_service(svc: dict) -> dict:
+    return {
+        "name": svc["metadata"]["name"],
+        "namespace": svc["metadata"]["namespace"],
+        "type": svc["spec"]["type"],
+        "cluster_ip": svc["spec"].get("clusterIP"),
+        "ports": [f"{p.get('port')}/{p.get('protocol')}" for p in svc["spec"].get("ports", [])]
+    }
+
+def summarize_node(node: dict) -> dict:
+    conditions = {c["type"]: c["status"] for c in node["status"].get("conditions", [])}
+    return {
+        "name": node["metadata"]["name"],
+        "status": "Ready" if conditions.get("Ready") == "True" else "NotReady",
+        "roles": ",".join(k.replace("node-role.kubernetes.io/", "") for k in node["metadata"].get("labels", {}) if k.startswith("node-role")),
+        "version": node["status"]["nodeInfo"]["kubeletVersion"],
+        "os": node["status"]["nodeInfo"]["osImage"]
+    }
+
+def event_time(event: dict) -> str:
+    """Most recent occurrence of an event (core/v1 events fill different fields depending on the reporter)."""
+    return (event.get("lastTimestamp") or (event.get("series") or {}).get("lastObservedTime")
+            or event.get("eventTime") or event["metadata"].get("creationTimestamp") or "")
+
+def parse_timestamp(value: str) -> float:
+    """Epoch seconds for an RFC3339 timestamp (Time or MicroTime), 0 when empty."""
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp() if value else 0.0
+
+def event_timestamp(event: dict) -> float:
+    """event_time() as epoch seconds, for ordering events whose fields differ in precision."""
+    return parse_timestamp(event_time(event))
+
+def summarize_event(event: dict) -> dict:
+    return {
+        "type": event.get("type"),
+        "reason": event.get("reason"),
+        "object": f"{event['involvedObject'].get('kind')}/{event['involvedObject'].get('name')}",
+        "message": (event.get("message") or "")[:200],
+        "count": event.get("count"),
+        "last_seen": event_time(event) or None
+    }
+
+def summarize_ingress(ing: dict) -> dict:
+    return {
+        "name": ing["metadata"]["name"],
+        "namespace": ing["metadata"]["namespace"],
+        "hosts": [r.get("host") for r in ing["spec"].get("rules", [])],
+        "address": [lb.get("ip") or lb.get("hostname") for lb in ing["status"].get("loadBalancer", {}).get("ingress", [])]
+    }
+
+def aggregate_events(events: list) -> list:
+    """Collapse events by involved object and reason, newest group last."""
+    groups = {}
+    for event in events:
+        obj = event["involvedObject"]
+        key = (obj.get("namespace"), obj.get("kind"), obj.get("name"), event.get("reason"))
+        seen = event_time(event)
+        first = event.get("firstTimestamp") or seen
+        group = groups.get(key)
+        if group is None:
+            groups[key] = group = {
+                "type": event.get("type"),
+                "reason": event.get("reason"),
+                "object": f"{obj.get('kind')}/{obj.get('name')}",
+                "namespace": obj.get("namespace"),
+                "count": 0,
+                "first_seen": first,
+                "last_seen": seen,
+                "message": ""
+            }
+        group["count"] += event.get("count") or (event.get("series") or {}).get("count") or 1
+        group["first_seen"] = min(group["first_seen"], first, key=parse_timestamp)
+        if parse_timestamp(seen) >= parse_timestamp(group["last_seen"]):
+            group["last_seen"] = seen
+            group["type"] = event.get("type")
+            group["message"] = (event.get("message") or "")[:200]
+    return sorted(groups.values(), key=lambda g: parse_timestamp(g["last_seen"]))
+
+def encode_event_cursor(resource_version: str, timestamp: str) -> str:
+    return f"{resource_version}|{timestamp}"
+
+def decode_event_cursor(cursor: str) -> tuple[str, str]:
+    resource_version, _, timestamp = cursor.partition("|")
+    return resource_version, timestamp
+
+async def watch_events(client: KubeClient, namespace: str, params: dict, resource_version: str,
+                       wait_seconds: float) -> tuple[list, str]:
+    """Changes since resource_version, waiting up to wait_seconds for the first one.
+
+    Returns (events, latest resourceVersion). Once something has arrived the
+    watch lingers only briefly for stragglers, so a busy namespace does not
+    hold the call for the whole wait.
+    """
+    params = dict(params, resourceVersion=resource_version, allowWatchBookmarks="true",
+                  timeoutSeconds=int(wait_seconds) + 1)
+    stream = client.watch(resource_path("events", namespace), params, timeout=wait_seconds + 5)
+    loop = asyncio.get_running_loop()
+    # Even without waiting, give the watch a moment to replay what changed since resource_version
+    deadline = loop.time() + max(wait_seconds, 1)
+    changed = {}
+    try:
+        while True:
+            remaining = deadline - loop.time()
+            if changed:
+                remaining = min(remaining, 0.5)
+            if remaining <= 0:
+                break
+            try:
+                event = await asyncio.wait_for(stream.__anext__(), remaining)
+            except (asyncio.TimeoutError, StopAsyncIteration):
+                break
+            obj = event.get("object", {})
+            if event["type"] == "ERROR":
+                raise KubeError(obj.get("message", "watch error"), obj.get("code"))
+            resource_version = obj["metadata"]["resourceVersion"]
+            if event["type"] in ("ADDED", "MODIFIED"):
+                changed[obj["metadata"]["uid"]] = obj
+    finally:
+        await stream.aclose()
+    return list(changed.values()), resource_version
+
+async def event_feed(namespace: str = None, label_selector: str = None, field_selector: str = None,
+                     cursor: str = None, wait_seconds: float = 0, aggregate: bool = True,
+                     max_events: int = 50) -> dict:
+    """Events newer than cursor (or the latest max_events without one) and a cursor for the next call.
+
+    The cursor holds a resourceVersion and the newest event timestamp.
+    Following it is a watch from that resourceVersion, which only transfers
+    what changed. Without a direct API client, or once the resourceVersion
+    has expired (410 Gone), the event list is filtered by timestamp instead.
+    """
+    wait_seconds = min(max(wait_seconds or 0, 0), MAX_EVENT_WAIT)
+    params = {k: v for k, v in {"labelSelector": label_selector, "fieldSelector": field_selector}.items() if v}
+    client = get_kube_client()
+    resource_version, since = decode_event_cursor(cursor) if cursor else (None, "")
+    events = None
+    source = "watch"
+
+    if client and resource_version:
+        try:
+            events, resource_version = await watch_events(client, namespace, params, resource_version, wait_seconds)
+        except KubeError as e:
+            if e.code != 410:
+                raise
+
+    if events is None:
+        source = "list"
+        cached = None if field_selector else await cached_list("events", namespace, label_selector)
+        if cached:
+            items, status = cached
+            resource_version = status["resource_version"]
+        else:
+            data = await kube_list("events", namespace, label_selector, field_selector)
+            items, resource_version = data.get("items", []), data.get("metadata", {}).get("resourceVersion")
+        # Compare parsed times: eventTime has microseconds, lastTimestamp only seconds
+        events = [e for e in items if event_timestamp(e) > parse_timestamp(since)] if since else items
+        if not events and client and wait_seconds and resource_version:
+            source = "watch"
+            events, resource_version = await watch_events(client, namespace, params, resource_version, wait_seconds)
+
+    events.sort(key=event_timestamp)
+    latest = max([since] + [event_time(e) for e in events], key=parse_timestamp)
+    summaries = aggregate_events(events) if aggregate else [summarize_event(e) for e in events]
+    return {
+        "cursor": encode_event_cursor(resource_version or "", latest),
+        "source": source,
+        "truncated": len(summaries) > max_events,
+        "events": summaries[-max_events:]
+    }
+
+async def list_objects(resource: str, namespace: str = None, label_selector: str = None) -> list:
+    """Full objects from the informer cache when enabled, else from the API."""
+    cached = await cached_list(resource, namespace, label_selector)
+    if cached:
+        return cached[0]
+    return (await kube_list(resource, namespace, label_selector)).get("items", [])
+
+# Kubernetes resource.Quantity suffixes (binary, then decimal) as multipliers of the base unit
+QUANTITY_SUFFIXES = {
+    "Ki": 2**10, "Mi": 2**20, "Gi": 2**30, "Ti": 2**40, "Pi": 2**50, "Ei": 2**60,
+    "n": 1e-9, "u": 1e-6, "m": 1e-3, "": 1, "k": 10**3, "K": 10**3, "M": 10**6, "G": 10**9,
+    "T": 10**12, "P": 10**15, "E": 10**18
+}
+QUANTITY_RE = re.compile(r"([+-]?(?:\d+\.?\d*|\.\d+))(?:([eE][+-]?\d+)|(Ki|Mi|Gi|Ti|Pi|Ei|[numkKMGTPE]))?")
+
+def parse_quantity(quantity: str) -> float:
+    """A Kubernetes quantity in base units ("250m", "128Mi", "1e9", "2E")."""
+    if not quantity:
+        return 0.0
+    match = QUANTITY_RE.fullmatch(str(quantity).strip())
+    if not match:
+        raise ValueError(f"invalid quantity '{quantity}'")
+    number, exponent, suffix = match.groups()
+    if exponent:
+        return float(number + exponent)
+    return float(number) * QUANTITY_SUFFIXES[suffix or ""]
+
+def parse_cpu(quantity: str) -> float:
+    """CPU quantity in millicores ("250m", "1", "123456n")."""
+    return parse_quantity(quantity) * 1000
+
+def parse_memory(quantity: str) -> int:
+    """Memory quantity in bytes ("128Mi", "1G", "1e9", "1500m")."""
+    return int(parse_quantity(quantity))
+
+def pct(used: float, total: float):
+    return round(100 * used / total, 1) if total else None
+
+def pod_resources(pod: dict) -> dict:
+    """Summed container requests and limits (millicores / bytes)."""
+    totals = {"cpu_request": 0.0, "cpu_limit": 0.0, "memory_request": 0, "memory_limit": 0}
+    for c in pod["spec"].get("containers", []):
+        resources = c.get("resources", {})
+        totals["cpu_request"] += parse_cpu(resources.get("requests", {}).get("cpu"))
+        totals["cpu_limit"] += parse_cpu(resources.get("limits", {}).get("cpu"))
+        totals["memory_request"] += parse_memory(resources.get("requests", {}).get("memory"))
+        totals["memory_limit"] += parse_memory(resources.get("limits", {}).get("memory"))
+    return totals
+
+def pod_usage(metrics: dict) -> tuple[float, int]:
+    containers = metrics.get("containers", [])
+    return (sum(parse_cpu(c["usage"].get("cpu")) for c in containers),
+            sum(parse_memory(c["usage"].get("memory")) for c in containers))
+
+async def pod_specs(keys: list) -> dict:
+    """Full pod objects for (namespace, name) keys, fetched one by one.
+
+    Pods that vanished since the metrics were scraped are left out.
+    """
+    semaphore = asyncio.Semaphore(LOG_STREAM_CONCURRENCY)
+
+    async def fetch(key: tuple):
+        async with semaphore:
+            try:
+                return key, await kube_get(resource_path("pods", key[0], key[1]))
+            except KubeError as e:
+                if e.code != 404 and "NotFound" not in str(e):
+                    raise
+                return key, None
+
+    return {key: pod for key, pod in await asyncio.gather(*(fetch(k) for k in keys)) if pod}
+
+async def top_pods(namespace: str = None, label_selector: str = None, sort_by: str = "cpu", limit: int = 50) -> list:
+    """Pod usage from metrics.k8s.io joined with requests/limits from the pod specs.
+
+    Specs come from the pods informer when enabled; otherwise only the pods
+    that make the cut are fetched, rather than listing every pod in scope.
+    """
+    path = f"{METRICS_PATH}/namespaces/{namespace}/pods" if namespace else f"{METRICS_PATH}/pods"
+    metrics = await kube_get(path, {"labelSelector": label_selector})
+    usage = []
+    for m in metrics.get("items", []):
+        cpu, memory = pod_usage(m)
+        usage.append(((m["metadata"]["namespace"], m["metadata"]["name"]), cpu, memory, m.get("window")))
+    usage.sort(key=lambda u: u[2] if sort_by == "memory" else u[1], reverse=True)
+    usage = usage[:limit]
+
+    cached = await cached_list("pods", namespace, label_selector)
+    if cached:
+        specs = {(p["metadata"]["namespace"], p["metadata"]["name"]): p for p in cached[0]}
+    else:
+        specs = await pod_specs([key for key, _, _, _ in usage])
+
+    rows = []
+    for key, cpu, memory, window in usage:
+        res = pod_resources(specs[key]) if key in specs else {}
+        rows.append({
+            "name": key[1],
+            "namespace": key[0],
+            "cpu_m": round(cpu, 1),
+            "memory_mi": round(memory / 2**20, 1),
+            "cpu_request_m": res.get("cpu_request") or None,
+            "cpu_limit_m": res.get("cpu_limit") or None,
+            "memory_request_mi": round(res["memory_request"] / 2**20, 1) if res.get("memory_request") else None,
+            "memory_limit_mi": round(res["memory_limit"] / 2**20, 1) if res.get("memory_limit") else None,
+            "cpu_pct_request": pct(cpu, res.get("cpu_request")),
+            "cpu_pct_limit": pct(cpu, res.get("cpu_limit")),
+            "memory_pct_request": pct(memory, res.get("memory_request")),
+            "memory_pct_limit": pct(memory, res.get("memory_limit")),
+            "window": window
+        })
+    return rows
+
+async def top_nodes(sort_by: str = "cpu") -> list:
+    """Node usage from metrics.k8s.io against node allocatable capacity."""
+    metrics, nodes = await asyncio.gather(kube_get(f"{METRICS_PATH}/nodes"), kube_list("nodes"))
+    allocatable = {n["metadata"]["name"]: n["status"].get("allocatable", {}) for n in nodes.get("items", [])}
+
+    rows = []
+    for m in metrics.get("items", []):
+        node = m["metadata"]["name"]
+        cpu, memory = parse_cpu(m["usage"].get("cpu")), parse_memory(m["usage"].get("memory"))
+        alloc_cpu = parse_cpu(allocatable.get(node, {}).get("cpu"))
+        alloc_memory = parse_memory(allocatable.get(node, {}).get("memory"))
+        rows.append({
+            "name": node,
+            "cpu_m": round(cpu, 1),
+            "cpu_allocatable_m": alloc_cpu,
+            "cpu_pct": pct(cpu, alloc_cpu),
+            "memory_mi": round(memory / 2**20, 1),
+            "memory_allocatable_mi": round(alloc_memory / 2**20, 1),
+            "memory_pct": pct(memory, alloc_memory)
+        })
+    rows.sort(key=lambda r: r["memory_pct" if sort_by == "memory" else "cpu_pct"] or 0, reverse=True)
+    return rows
+
+async def sample_metrics():
+    """Append one cluster-wide node and pod usage sample to the ring buffers."""
+    now = time.time()
+    nodes, pods = await asyncio.gather(kube_get(f"{METRICS_PATH}/nodes"), kube_get(f"{METRICS_PATH}/pods"))
+    samples = {
+        "nodes": {m["metadata"]["name"]: (parse_cpu(m["usage"].get("cpu")), parse_memory(m["usage"].get("memory")))
+                  for m in nodes.get("items", [])},
+        "pods": {f"{m['metadata']['namespace']}/{m['metadata']['name']}": pod_usage(m) for m in pods.get("items", [])}
+    }
+    for kind, values in samples.items():
+        history = _metrics_history[kind]
+        history.append((now, values))
+        while history and history[0][0] < now - METRICS_HISTORY_SECONDS:
+            history.popleft()
+
+async def run_metrics_sampler():
+    await ensure_kubeconfig()
+    while True:
+        try:
+            await sample_metrics()
+        except Exception:
+            # metrics-server hiccups just leave a gap in the history
+            pass
+        await asyncio.sleep(METRICS_SAMPLE_INTERVAL)
+
+def ensure_metrics_sampler():
+    """Start background sampling (at server start; the top tools also ensure it)."""
+    global _metrics_sampler
+    # The history covers the default context only
+    if METRICS_SAMPLE_INTERVAL > 0 and _metrics_sampler is None and _current_context.get() is None:
+        _metrics_sampler = asyncio.create_task(run_metrics_sampler())
+
+def metrics_trend(kind: str, minutes: int = 15, name: str = None, namespace: str = None, limit: int = 20) -> dict:
+    """Per-object CPU/memory statistics over the sampled window, busiest (by average CPU) first."""
+    cutoff = time.time() - minutes * 60
+    samples = [(ts, values) for ts, values in _metrics_history[kind] if ts >= cutoff]
+    series = defaultdict(list)
+    for ts, values in samples:
+        for key, (cpu, memory) in values.items():
+            if name and key.split("/")[-1] != name:
+                continue
+            if namespace and kind == "pods" and not key.startswith(f"{namespace}/"):
+                continue
+            series[key].append((ts, cpu, memory))
+
+    objects = []
+    for key, points in series.items():
+        cpus = [p[1] for p in points]
+        mems = [p[2] / 2**20 for p in points]
+        entry = {
+            "name": key,
+            "samples": len(points),
+            "cpu_m": {"min": round(min(cpus), 1), "avg": round(sum(cpus) / len(cpus), 1), "max": round(max(cpus), 1), "latest": round(cpus[-1], 1)},
+            "memory_mi": {"min": round(min(mems), 1), "avg": round(sum(mems) / len(mems), 1), "max": round(max(mems), 1), "latest": round(mems[-1], 1)},
+            "memory_change_mi": round(mems[-1] - mems[0], 1)
+        }
+        if name:
+            entry["points"] = [{"time": datetime.fromtimestamp(t, timezone.utc).strftime("%H:%M:%S"), "cpu_m": round(c, 1),
+                                "memory_mi": round(m / 2**20, 1)} for t, c, m in points]
+        objects.append(entry)
+    objects.sort(key=lambda o: o["cpu_m"]["avg"], reverse=True)
+
+    return {
+        "kind": kind,
+        "window_minutes": minutes,
+        "samples": len(samples),
+        "interval_seconds": METRICS_SAMPLE_INTERVAL,
+        "objects": objects[:limit]
+    }
+
+WORKLOAD_RESOURCES = {
+    "deployment": "deployments",
+    "statefulset": "statefulsets",
+    "daemonset": "daemonsets",
+    "replicaset": "replicasets",
+    "job": "jobs",
+}
+
+async def workload_selector(workload: str, namespace: str) -> str:
+    """Label selector for a workload given as kind/name (e.g. deployment/api)."""
+    kind, _, name = workload.partition("/")
+    resource = WORKLOAD_RESOURCES.get(kind.lower().rstrip("s"))
+    if not resource or not name:
+        raise KubeError(f"Unsupported workload '{workload}', use kind/name with kind one of {', '.join(WORKLOAD_RESOURCES)}")
+    obj = await kube_get(resource_path(resource, namespace, name))
+    selector = obj["spec"]["selector"]
+    requirements = [f"{k}={v}" for k, v in (selector.get("matchLabels") or {}).items()]
+    for expression in selector.get("matchExpressions") or []:
+        key, operator = expression["key"], expression["operator"]
+        values = ",".join(expression.get("values") or [])
+        if operator == "In":
+            requirements.append(f"{key} in ({values})")
+        elif operator == "NotIn":
+            requirements.append(f"{key} notin ({values})")
+        elif operator == "Exists":
+            requirements.append(key)
+        elif operator == "DoesNotExist":
+            requirements.append(f"!{key}")
+        else:
+            raise KubeError(f"Unsupported selector operator '{operator}' on {workload}")
+    return ",".join(requirements)
+
+def log_sort_key(line: str) -> str:
+    """Sortable form of a `timestamps=true` log line's RFC3339Nano prefix (fraction padded to 9 digits)."""
+    ts = line.split(" ", 1)[0]
+    base, _, frac = ts.rstrip("Z").partition(".")
+    return f"{base}.{frac.ljust(9, '0')}"
+
+async def read_container_log(namespace: str, pod: str, container: str, params: dict, pattern, max_lines: int) -> dict:
+    """Stream one container's log, keeping the last max_lines lines that match pattern."""
+    path = resource_path("pods", namespace, pod, "log")
+    params = {k: v for k, v in dict(params, container=container).items() if v is not None}
+    kept = deque(maxlen=max_lines)
+    result = {"pod": pod, "container": container, "scanned": 0}
+
+    def keep(line: str):
+        result["scanned"] += 1
+        message = line.split(" ", 1)[1] if " " in line else ""
+        if pattern is None or pattern.search(message):
+            kept.append(line[:2000])
+
+    try:
+        client = get_kube_client()
+        if client:
+            async for line in client.stream_lines(path, params, timeout=TIMEOUT * 2, accept="*/*"):
+                if line:
+                    keep(line)
+        else:
+            text = await kube_get(path, params, raw=True)
+            for line in text.splitlines():
+                keep(line)
+    except Exception as e:
+        result["error"] = str(e)[:300]
+
+    result["lines"] = list(kept)
+    return result
+
+async def collect_logs_multi(namespace: str, selector: str, container: str = None, since_seconds: int = None,
+                             since_time: str = None, tail: int = 200, pattern: str = None,
+                             max_lines: int = 500, max_pods: int = 50) -> dict:
+    """Fetch logs from matching pods and containers concurrently and merge them by timestamp.
+
+    Only the first max_pods pods (by name) are read; pods_matched and
+    pods_truncated report when the selector matched more.
+    """
+    regex = re.compile(pattern) if pattern else None
+    matched = (await kube_list("pods", namespace, selector)).get("items", [])
+    pods = sorted(matched, key=lambda p: p["metadata"]["name"])[:max_pods]
+
+    params = {
+        "timestamps": "true",
+        "tailLines": tail,
+        "sinceSeconds": since_seconds,
+        "sinceTime": since_time,
+        "limitBytes": LOG_LIMIT_BYTES
+    }
+    semaphore = asyncio.Semaphore(LOG_STREAM_CONCURRENCY)
+
+    async def fetch(pod_name: str, container_name: str) -> dict:
+        async with semaphore:
+            return await read_container_log(namespace, pod_name, container_name, params, regex, max_lines)
+
+    jobs = []
+    for pod in pods:
+        containers = [c["name"] for c in pod["spec"].get("containers", [])]
+        for c in containers:
+            if container is None or c == container:
+                jobs.append(fetch(pod["metadata"]["name"], c))
+    results = await asyncio.gather(*jobs)
+
+    merged = []
+    counts = {}
+    for r in results:
+        source = f"{r['pod']}/{r['container']}"
+        counts[source] = {"scanned": r["scanned"], "matched": len(r["lines"])}
+        if "error" in r:
+            counts[source]["error"] = r["error"]
+        for line in r["lines"]:
+            ts, _, message = line.partition(" ")
+            merged.append((log_sort_key(line), f"{ts} [{source}] {message}"))
+    merged.sort(key=lambda m: m[0])
+
+    return {
+        "selector": selector,
+        "pods": len(pods),
+        "pods_matched": len(matched),
+        "pods_truncated": len(matched) > len(pods),
+        "containers": counts,
+        "truncated": len(merged) > max_lines,
+        "lines": [m[1] for m in merged[-max_lines:]]
+    }
+
+BAD_WAITING_REASONS = {
+    "CrashLoopBackOff": 90,
+    "ImagePullBackOff": 85,
+    "ErrImagePull": 85,
+    "CreateContainerConfigError": 85,
+    "CreateContainerError": 80,
+    "InvalidImageName": 80,
+    "RunContainerError": 80,
+}
+NODE_PRESSURE = ("MemoryPressure", "DiskPressure", "PIDPressure", "NetworkUnavailable")
+
+def pod_owner(pod: dict) -> str:
+    """Top-level owner as Kind/name; ReplicaSets are mapped back to their Deployment."""
+    refs = pod["metadata"].get("ownerReferences") or []
+    if not refs:
+        return f"Pod/{pod['metadata']['name']}"
+    kind, name = refs[0]["kind"], refs[0]["name"]
+    template_hash = pod["metadata"].get("labels", {}).get("pod-template-hash")
+    if kind == "ReplicaSet" and template_hash and name.endswith(f"-{template_hash}"):
+        return f"Deployment/{name[:-len(template_hash) - 1]}"
+    return f"{kind}/{name}"
+
+def pod_problem(pod: dict, now: float):
+    """(reason, score, detail) for an unhealthy pod, or None."""
+    status = pod["status"]
+    phase = status.get("phase")
+    containers = status.get("containerStatuses") or []
+    for c in (status.get("initContainerStatuses") or []) + containers:
+        waiting = c.get("state", {}).get("waiting") or {}
+        if waiting.get("reason") in BAD_WAITING_REASONS:
+            return waiting["reason"], BAD_WAITING_REASONS[waiting["reason"]], (waiting.get("message") or "")[:200]
+    for c in containers:
+        terminated = c.get("lastState", {}).get("terminated") or {}
+        if terminated.get("reason") == "OOMKilled":
+            return "OOMKilled", 70, f"container {c['name']} restarted {c.get('restartCount', 0)} times"
+    if phase == "Pending":
+        created = datetime.fromisoformat(pod["metadata"]["creationTimestamp"].replace("Z", "+00:00")).timestamp()
+        if now - created > 300:
+            scheduled = next((c for c in status.get("conditions", []) if c["type"] == "PodScheduled"), {})
+            reason = "Unschedulable" if scheduled.get("reason") == "Unschedulable" else "PendingTooLong"
+            return reason, 65, (scheduled.get("message") or f"pending for {int((now - created) / 60)}m")[:200]
+    if phase == "Failed":
+        return status.get("reason") or "Failed", 50, (status.get("message") or "")[:200]
+    restarts = sum(c.get("restartCount", 0) for c in containers)
+    if restarts > 5:
+        return "FrequentRestarts", 40, f"{restarts} restarts"
+    if phase == "Running" and any(not c.get("ready") for c in containers):
+        return "NotReady", 30, ",".join(c["name"] for c in containers if not c.get("ready"))
+    return None
+
+async def cluster_snapshot(namespace: str = None, max_problems: int = 25) -> dict:
+    """Collect nodes, pods, deployments, warning events and node usage concurrently and rank what looks wrong."""
+    started = time.time()
+    names = ["nodes", "pods", "deployments", "events", "node_usage"]
+    results = await asyncio.gather(
+        list_objects("nodes"),
+        list_objects("pods", namespace),
+        list_objects("deployments", namespace),
+        kube_list("events", namespace, field_selector="type=Warning"),
+        top_nodes(),
+        return_exceptions=True
+    )
+    data, errors = {}, {}
+    for key, result in zip(names, results):
+        if isinstance(result, Exception):
+            errors[key] = str(result)[:300]
+            data[key] = []
+        else:
+            data[key] = result
+    events = data["events"].get("items", []) if isinstance(data["events"], dict) else []
+
+    # Latest warning events per involved object, keyed by (namespace, kind, name)
+    events_by_object = defaultdict(list)
+    for event in sorted(events, key=event_timestamp):
+        involved = event["involvedObject"]
+        events_by_object[(involved.get("namespace"), involved.get("kind"), involved.get("name"))].append(
+            f"{event.get('reason')}: {(event.get('message') or '')[:150]}")
+
+    problems = []
+    node_state = {}
+    for node in data["nodes"]:
+        node_name = node["metadata"]["name"]
+        conditions = {c["type"]: c for c in node["status"].get("conditions", [])}
+        ready = conditions.get("Ready", {}).get("status") == "True"
+        node_state[node_name] = ready
+        if not ready:
+            problems.append({"score": 100, "object": f"Node/{node_name}", "reason": "NodeNotReady",
+                             "detail": (conditions.get("Ready", {}).get("message") or "")[:200]})
+        for pressure in NODE_PRESSURE:
+            if conditions.get(pressure, {}).get("status") == "True":
+                problems.append({"score": 80, "object": f"Node/{node_name}", "reason": pressure,
+                                 "detail": (conditions[pressure].get("message") or "")[:200]})
+        if node["spec"].get("unschedulable"):
+            problems.append({"score": 20, "object": f"Node/{node_name}", "reason": "Cordoned", "detail": ""})
+    for usage in data["node_usage"]:
+        for resource in ("cpu", "memory"):
+            if (usage.get(f"{resource}_pct") or 0) >= 90:
+                problems.append({"score": 50, "object": f"Node/{usage['name']}", "reason": f"High{resource.capitalize()}",
+                                 "detail": f"{usage[f'{resource}_pct']}% of allocatable"})
+
+    # Unhealthy pods grouped by owner and reason
+    now = time.time()
+    groups = {}
+    for pod in data["pods"]:
+        problem = pod_problem(pod, now)
+        if problem is None:
+            continue
+        reason, score, detail = problem
+        owner = pod_owner(pod)
+        key = (pod["metadata"]["namespace"], owner, reason)
+        group = groups.setdefault(key, {"score": score, "object": owner, "namespace": key[0], "reason": reason,
+                                        "detail": detail, "pods": [], "nodes": set()})
+        group["pods"].append(pod["metadata"]["name"])
+        node_name = pod["spec"].get("nodeName")
+        if node_name:
+            group["nodes"].add(node_name)
+    for group in groups.values():
+        pods = group.pop("pods")
+        nodes = sorted(group.pop("nodes"))
+        group["score"] += min(len(pods), 10)
+        group["count"] = len(pods)
+        group["pods"] = pods[:3]
+        bad_nodes = [n for n in nodes if node_state.get(n) is False]
+        if bad_nodes:
+            group["detail"] = f"{group['detail']} (on NotReady nodes: {', '.join(bad_nodes)})".strip()
+        elif len(nodes) == 1 and len(pods) > 1:
+            group["detail"] = f"{group['detail']} (all on {nodes[0]})".strip()
+        group["events"] = [e for p in pods[:3] for e in events_by_object.get((group["namespace"], "Pod", p), [])[-2:]][-3:]
+        problems.append(group)
+
+    # Degraded deployments
+    degraded = 0
+    for dep in data["deployments"]:
+        desired = dep["spec"].get("replicas", 0)
+        available = dep["status"].get("availableReplicas", 0)
+        conditions = {c["type"]: c for c in dep["status"].get("conditions", [])}
+        stalled = conditions.get("Progressing", {}).get("reason") == "ProgressDeadlineExceeded"
+        if available >= desired and not stalled:
+            continue
+        degraded += 1
+        dep_name = dep["metadata"]["name"]
+        problems.append({
+            "score": 80 if stalled or available == 0 else 55,
+            "object": f"Deployment/{dep_name}",
+            "namespace": dep["metadata"]["namespace"],
+            "reason": "ProgressDeadlineExceeded" if stalled else "Unavailable",
+            "detail": f"{available}/{desired} available",
+            "events": events_by_object.get((dep["metadata"]["namespace"], "Deployment", dep_name), [])[-3:]
+        })
+
+    problems.sort(key=lambda p: p["score"], reverse=True)
+    pods = data["pods"]
+    return {
+        "scope": namespace or "all namespaces",
+        "summary": {
+            "nodes": len(data["nodes"]),
+            "nodes_not_ready": sum(1 for ready in node_state.values() if not ready),
+            "pods": len(pods),
+            "pods_running": sum(1 for p in pods if p["status"].get("phase") == "Running"),
+            "unhealthy_pods": sum(g["count"] for g in groups.values()),
+            "deployments": len(data["deployments"]),
+            "deployments_degraded": degraded,
+            "warning_events": len(events)
+        },
+        "problems": problems[:max_problems],
+        "truncated": len(problems) > max_problems,
+        "errors": errors,
+        "collected_ms": int((time.time() - started) * 1000)
+    }
+
+# Write tools and tools that only read local state never fan out
+NO_FAN_OUT = {"k8s_scale", "k8s_restart", "k8s_delete_pod", "k8s_contexts", "k8s_top_history"}
+
+def list_contexts() -> list:
+    return [c["name"] for c in load_kubeconfig().get("contexts", [])]
+
+async def fan_out(name: str, arguments: dict, contexts) -> dict:
+    """Run a read tool against several kubeconfig contexts concurrently and merge the results.
+
+    List results (bare, or {"items": ...} with cache status or a continue
+    token, which are kept per cluster under metadata) are concatenated with
+    each item tagged by cluster; anything else is returned per cluster. A cluster that fails or exceeds
+    CONTEXT_TIMEOUT shows up under errors without failing the others.
+    """
+    if contexts == "all" or contexts == ["all"]:
+        contexts = await asyncio.to_thread(list_contexts)
+    elif isinstance(contexts, str):
+        contexts = [c.strip() for c in contexts.split(",") if c.strip()]
+
+    async def run(context: str):
+        # Runs in its own task, so the context variable is private to this cluster
+        _current_context.set(context)
+        result = await asyncio.wait_for(call_tool(name, arguments), CONTEXT_TIMEOUT)
+        text = result[0].text
+        if text.startswith("Error:") or text.startswith("JSON parse error:"):
+            raise KubeError(text.removeprefix("Error: "))
+        try:
+            return json.loads(text)
+        except ValueError:
+            return text
+
+    results = await asyncio.gather(*(run(c) for c in contexts), return_exceptions=True)
+    values, errors = {}, {}
+    for context, result in zip(contexts, results):
+        if isinstance(result, asyncio.TimeoutError):
+            errors[context] = f"timed out after {CONTEXT_TIMEOUT}s"
+        elif isinstance(result, Exception):
+            errors[context] = str(result)[:300]
+        else:
+            values[context] = result
+
+    def list_items(value):
+        if isinstance(value, list):
+            return value
+        if isinstance(value, dict) and isinstance(value.get("items"), list):
+            return value["items"]
+        return None
+
+    if values and all(list_items(v) is not None for v in values.values()):
+        items, metadata = [], {}
+        for context, value in values.items():
+            items.extend({"cluster": context, **item} if isinstance(item, dict) else {"cluster": context, "value": item}
+                         for item in list_items(value))
+            if isinstance(value, dict) and len(value) > 1:
+                metadata[context] = {k: v for k, v in value.items() if k != "items"}
+        result = {"clusters": contexts, "items": items, "errors": errors}
+        if metadata:
+            result["metadata"] = metadata
+        return result
+    return {"clusters": contexts, "results": values, "errors": errors}
+
+LIST_PROPERTIES = {
+    "selector": {"type": "string", "description": "Label selector (e.g., 'app=nginx')"},
+    "field_selector": {"type": "string", "description": "Field selector (e.g., 'status.phase!=Running', 'spec.nodeName=node-1')"},
+    "limit": {"type": "integer", "description": "Return a single page of this many items with a continue token"},
+    "continue": {"type": "string", "description": "Continue token from a previous page"}
+}
+
 @server.list_tools()
 async def list_tools():
     """List available tools."""
@@ -48,8 +1485,8 @@ async def list_tools():
                 "type": "object",
                 "properties": {
                     "namespace": {"type": "string", "default": DEFAULT_NAMESPACE},
-                    "selector": {"type": "string", "description": "Label selector (e.g., 'app=nginx')"},
-                    "all_namespaces": {"type": "boolean", "default": False}
+                    "all_namespaces": {"type": "boolean", "default": False},
+                    **LIST_PROPERTIES
                 }
             }
         ),
@@ -60,7 +1497,8 @@ async def list_tools():
                 "type": "object",
                 "properties": {
                     "namespace": {"type": "string", "default": DEFAULT_NAMESPACE},
-                    "all_namespaces": {"type": "boolean", "default": False}
+                    "all_namespaces": {"type": "boolean", "default": False},
+                    **LIST_PROPERTIES
                 }
             }
         ),
@@ -71,14 +1509,15 @@ async def list_tools():
                 "type": "object",
                 "properties": {
                     "namespace": {"type": "string", "default": DEFAULT_NAMESPACE},
-                    "all_namespaces": {"type": "boolean", "default": False}
+                    "all_namespaces": {"type": "boolean", "default": False},
+                    **LIST_PROPERTIES
                 }
             }
         ),
         Tool(
             name="k8s_get_nodes",
             description="List cluster nodes",
-            inputSchema={"type": "object", "properties": {}}
+            inputSchema={"type": "object", "properties": {**LIST_PROPERTIES}}
         ),
         Tool(
             name="k8s_get_namespaces",
@@ -114,18 +1553,59 @@ async def list_tools():
                 "required": ["pod"]
             }
         ),
+        Tool(
+            name="k8s_logs_multi",
+            description="Merged, timestamp-ordered logs from all pods matching a label selector or workload, with optional regex filter",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "namespace": {"type": "string", "default": DEFAULT_NAMESPACE},
+                    "selector": {"type": "string", "description": "Label selector (e.g., 'app=nginx')"},
+                    "workload": {"type": "string", "description": "Workload as kind/name (e.g., 'deployment/api'); alternative to selector"},
+                    "container": {"type": "string", "description": "Only this container (default: all containers)"},
+                    "since_seconds": {"type": "integer", "description": "Only lines newer than this many seconds"},
+                    "since_time": {"type": "string", "description": "Only lines after this RFC3339 time"},
+                    "tail": {"type": "integer", "default": 200, "description": "Lines per container"},
+                    "pattern": {"type": "string", "description": "Regex the log message must match"},
+                    "max_lines": {"type": "integer", "default": 500},
+                    "max_pods": {"type": "integer", "default": 50, "description": "Pods to read (by name); pods_truncated is set when more matched"}
+                }
+            }
+        ),
         Tool(
             name="k8s_events",
-            description="Get cluster events",
+            description="Get cluster events; pass the returned cursor back to get only newer events",
             inputSchema={
                 "type": "object",
                 "properties": {
                     "namespace": {"type": "string", "default": DEFAULT_NAMESPACE},
-                    "all_namespaces": {"type": "boolean", "default": False}
+                    "all_namespaces": {"type": "boolean", "default": False},
+                    "selector": LIST_PROPERTIES["selector"],
+                    "field_selector": {"type": "string", "description": "Field selector (e.g., 'involvedObject.name=api-0', 'type=Warning')"},
+                    "cursor": {"type": "string", "description": "Cursor from a previous call"},
+                    "wait_seconds": {"type": "integer", "default": 0, "description": f"With a cursor, wait up to this long (max {MAX_EVENT_WAIT}s) for new events"},
+                    "aggregate": {"type": "boolean", "default": True, "description": "Collapse repeats by involved object and reason"},
+                    "max_events": {"type": "integer", "default": 50}
                 }
             }
         ),
         # Cluster info
+        Tool(
+            name="k8s_snapshot",
+            description="One-shot cluster health check: nodes, pods, deployments, warning events and node usage collected in parallel, returned as a ranked problem list",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "namespace": {"type": "string", "description": "Limit pods, deployments and events to one namespace (default: all)"},
+                    "max_problems": {"type": "integer", "default": 25}
+                }
+            }
+        ),
+        Tool(
+            name="k8s_contexts",
+            description="List kubeconfig contexts (clusters) available for the contexts parameter",
+            inputSchema={"type": "object", "properties": {}}
+        ),
         Tool(
             name="k8s_cluster_info",
             description="Get cluster info",
@@ -133,19 +1613,41 @@ async def list_tools():
         ),
         Tool(
             name="k8s_top_pods",
-            description="Show pod resource usage",
+            description="Show pod CPU/memory usage with requests, limits and utilization ratios",
             inputSchema={
                 "type": "object",
                 "properties": {
                     "namespace": {"type": "string", "default": DEFAULT_NAMESPACE},
-                    "all_namespaces": {"type": "boolean", "default": False}
+                    "all_namespaces": {"type": "boolean", "default": False},
+                    "selector": {"type": "string", "description": "Label selector (e.g., 'app=nginx')"},
+                    "sort_by": {"type": "string", "enum": ["cpu", "memory"], "default": "cpu"},
+                    "limit": {"type": "integer", "default": 50}
                 }
             }
         ),
         Tool(
             name="k8s_top_nodes",
-            description="Show node resource usage",
-            inputSchema={"type": "object", "properties": {}}
+            description="Show node CPU/memory usage against allocatable capacity",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "sort_by": {"type": "string", "enum": ["cpu", "memory"], "default": "cpu"}
+                }
+            }
+        ),
+        Tool(
+            name="k8s_top_history",
+            description="Short-term CPU/memory trend for pods or nodes from the in-process sampler",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "kind": {"type": "string", "enum": ["pods", "nodes"], "default": "pods"},
+                    "name": {"type": "string", "description": "Pod or node name; includes the individual samples"},
+                    "namespace": {"type": "string", "description": "Only pods in this namespace"},
+                    "minutes": {"type": "integer", "default": 15},
+                    "limit": {"type": "integer", "default": 20}
+                }
+            }
         ),
         # ConfigMaps and Secrets
         Tool(
@@ -238,107 +1740,54 @@ async def list_tools():
             )
         ])
 
+    contexts_property = {
+        "description": "Kubeconfig contexts to query concurrently (list of names, or 'all'); results are tagged by cluster",
+        "anyOf": [{"type": "array", "items": {"type": "string"}}, {"type": "string"}]
+    }
+    for tool in tools:
+        if tool.name not in NO_FAN_OUT:
+            tool.inputSchema.setdefault("properties", {})["contexts"] = contexts_property
+
     return tools
 
 @server.call_tool()
 async def call_tool(name: str, arguments: dict) -> list:
     """Execute tool calls."""
     try:
+        await ensure_kubeconfig()
+        contexts = arguments.get("contexts")
+        if contexts and name not in NO_FAN_OUT:
+            arguments = {k: v for k, v in arguments.items() if k != "contexts"}
+            result = await fan_out(name, arguments, contexts)
+            return [TextContent(type="text", text=json.dumps(result, indent=2))]
+
         namespace = arguments.get("namespace", DEFAULT_NAMESPACE)
         all_ns = arguments.get("all_namespaces", False)
-        ns_args = ["-A"] if all_ns else ["-n", namespace]
+        list_ns = None if all_ns else namespace
+        paging = (arguments.get("field_selector"), arguments.get("limit"), arguments.get("continue"))
 
         if name == "k8s_get_pods":
-            selector = arguments.get("selector")
-            args = ["get", "pods"] + ns_args + ["-o", "json"]
-            if selector:
-                args.extend(["-l", selector])
-
-            output, code = run_kubectl(args)
-            if code != 0:
-                return [TextContent(type="text", text=f"Error: {output}")]
-
-            data = json.loads(output)
-            pods = []
-            for pod in data.get("items", []):
-                pods.append({
-                    "name": pod["metadata"]["name"],
-                    "namespace": pod["metadata"]["namespace"],
-                    "status": pod["status"]["phase"],
-                    "ready": f"{sum(1 for c in pod['status'].get('containerStatuses', []) if c.get('ready'))}/{len(pod['spec']['containers'])}",
-                    "restarts": sum(c.get("restartCount", 0) for c in pod["status"].get("containerStatuses", [])),
-                    "node": pod["spec"].get("nodeName", "")
-                })
-
-            return [TextContent(type="text", text=json.dumps(pods, indent=2))]
+            pods, extra = await list_summaries("pods", summarize_pod, list_ns, arguments.get("selector"), *paging)
 
-        elif name == "k8s_get_deployments":
-            args = ["get", "deployments"] + ns_args + ["-o", "json"]
-            output, code = run_kubectl(args)
+            return list_response(pods, extra)
 
-            if code != 0:
-                return [TextContent(type="text", text=f"Error: {output}")]
-
-            data = json.loads(output)
-            deps = []
-            for dep in data.get("items", []):
-                deps.append({
-                    "name": dep["metadata"]["name"],
-                    "namespace": dep["metadata"]["namespace"],
-                    "ready": f"{dep['status'].get('readyReplicas', 0)}/{dep['spec']['replicas']}",
-                    "up_to_date": dep["status"].get("updatedReplicas", 0),
-                    "available": dep["status"].get("availableReplicas", 0)
-                })
+        elif name == "k8s_get_deployments":
+            deps, extra = await list_summaries("deployments", summarize_deployment, list_ns, arguments.get("selector"), *paging)
 
-            return [TextContent(type="text", text=json.dumps(deps, indent=2))]
+            return list_response(deps, extra)
 
         elif name == "k8s_get_services":
-            args = ["get", "services"] + ns_args + ["-o", "json"]
-            output, code = run_kubectl(args)
+            svcs, extra = await list_summaries("services", summarize_service, list_ns, arguments.get("selector"), *paging)
 
-            if code != 0:
-                return [TextContent(type="text", text=f"Error: {output}")]
-
-            data = json.loads(output)
-            svcs = []
-            for svc in data.get("items", []):
-                svcs.append({
-                    "name": svc["metadata"]["name"],
-                    "namespace": svc["metadata"]["namespace"],
-                    "type": svc["spec"]["type"],
-                    "cluster_ip": svc["spec"].get("clusterIP"),
-                    "ports": [f"{p.get('port')}/{p.get('protocol')}" for p in svc["spec"].get("ports", [])]
-                })
-
-            return [TextContent(type="text", text=json.dumps(svcs, indent=2))]
+            return list_response(svcs, extra)
 
         elif name == "k8s_get_nodes":
-            output, code = run_kubectl(["get", "nodes", "-o", "json"])
-
-            if code != 0:
-                return [TextContent(type="text", text=f"Error: {output}")]
+            nodes, extra = await list_summaries("nodes", summarize_node, None, arguments.get("selector"), *paging)
 
-            data = json.loads(output)
-            nodes = []
-            for node in data.get("items", []):
-                conditions = {c["type"]: c["status"] for c in node["status"].get("conditions", [])}
-                nodes.append({
-                    "name": node["metadata"]["name"],
-                    "status": "Ready" if conditions.get("Ready") == "True" else "NotReady",
-                    "roles": ",".join(k.replace("node-role.kubernetes.io/", "") for k in node["metadata"].get("labels", {}) if k.startswith("node-role")),
-                    "version": node["status"]["nodeInfo"]["kubeletVersion"],
-                    "os": node["status"]["nodeInfo"]["osImage"]
-                })
-
-            return [TextContent(type="text", text=json.dumps(nodes, indent=2))]
+            return list_response(nodes, extra)
 
         elif name == "k8s_get_namespaces":
-            output, code = run_kubectl(["get", "namespaces", "-o", "json"])
-
-            if code != 0:
-                return [TextContent(type="text", text=f"Error: {output}")]
-
-            data = json.loads(output)
+            data = await kube_list("namespaces", accept=PARTIAL_METADATA_ACCEPT)
             namespaces = [ns["metadata"]["name"] for ns in data.get("items", [])]
 
             return [TextContent(type="text", text=json.dumps(namespaces, indent=2))]
@@ -347,97 +1796,109 @@ async def call_tool(name: str, arguments: dict) -> list:
             resource_type = arguments.get("resource_type")
             name_arg = arguments.get("name")
 
-            output, code = run_kubectl(["describe", resource_type, name_arg, "-n", namespace])
+            output, code = await kubectl(["describe", resource_type, name_arg, "-n", namespace])
             return [TextContent(type="text", text=output[:10000])]
 
         elif name == "k8s_logs":
             pod = arguments.get("pod")
-            container = arguments.get("container")
-            tail = arguments.get("tail", 100)
-            previous = arguments.get("previous", False)
-
-            args = ["logs", pod, "-n", namespace, "--tail", str(tail)]
-            if container:
-                args.extend(["-c", container])
-            if previous:
-                args.append("--previous")
+            params = {
+                "tailLines": arguments.get("tail", 100),
+                "container": arguments.get("container"),
+                "previous": "true" if arguments.get("previous", False) else None
+            }
 
-            output, code = run_kubectl(args, timeout=60)
+            output = await kube_get(resource_path("pods", namespace, pod, "log"), params, accept="*/*", raw=True)
             return [TextContent(type="text", text=output[:20000])]
 
+        elif name == "k8s_logs_multi":
+            selector = arguments.get("selector")
+            workload = arguments.get("workload")
+            if workload:
+                selector = await workload_selector(workload, namespace)
+            if not selector:
+                return [TextContent(type="text", text="Error: selector or workload is required")]
+
+            result = await collect_logs_multi(
+                namespace,
+                selector,
+                container=arguments.get("container"),
+                since_seconds=arguments.get("since_seconds"),
+                since_time=arguments.get("since_time"),
+                tail=arguments.get("tail", 200),
+                pattern=arguments.get("pattern"),
+                max_lines=arguments.get("max_lines", 500),
+                max_pods=arguments.get("max_pods", 50)
+            )
+            return [TextContent(type="text", text=json.dumps(result, indent=2))]
+
         elif name == "k8s_events":
-            args = ["get", "events"] + ns_args + ["--sort-by=.lastTimestamp", "-o", "json"]
-            output, code = run_kubectl(args)
-
-            if code != 0:
-                return [TextContent(type="text", text=f"Error: {output}")]
-
-            data = json.loads(output)
-            events = []
-            for event in data.get("items", [])[-50:]:  # Last 50
-                events.append({
-                    "type": event.get("type"),
-                    "reason": event.get("reason"),
-                    "object": f"{event['involvedObject'].get('kind')}/{event['involvedObject'].get('name')}",
-                    "message": event.get("message", "")[:200],
-                    "count": event.get("count"),
-                    "last_seen": event.get("lastTimestamp")
-                })
-
-            return [TextContent(type="text", text=json.dumps(events, indent=2))]
+            result = await event_feed(
+                list_ns,
+                label_selector=arguments.get("selector"),
+                field_selector=arguments.get("field_selector"),
+                cursor=arguments.get("cursor"),
+                wait_seconds=arguments.get("wait_seconds", 0),
+                aggregate=arguments.get("aggregate", True),
+                max_events=arguments.get("max_events", 50)
+            )
+            return [TextContent(type="text", text=json.dumps(result, indent=2))]
+
+        elif name == "k8s_snapshot":
+            result = await cluster_snapshot(arguments.get("namespace"), arguments.get("max_problems", 25))
+            return [TextContent(type="text", text=json.dumps(result, indent=2))]
+
+        elif name == "k8s_contexts":
+            config = await asyncio.to_thread(load_kubeconfig, True)
+            contexts = [{
+                "name": c["name"],
+                "cluster": c["context"].get("cluster"),
+                "namespace": c["context"].get("namespace"),
+                "current": c["name"] == config.get("current-context")
+            } for c in config.get("contexts", [])]
+            return [TextContent(type="text", text=json.dumps(contexts, indent=2))]
 
         elif name == "k8s_cluster_info":
-            output, code = run_kubectl(["cluster-info"])
+            output, code = await kubectl(["cluster-info"])
             return [TextContent(type="text", text=output)]
 
         elif name == "k8s_top_pods":
-            args = ["top", "pods"] + ns_args
-            output, code = run_kubectl(args)
-            return [TextContent(type="text", text=output)]
+            ensure_metrics_sampler()
+            rows = await top_pods(list_ns, arguments.get("selector"), arguments.get("sort_by", "cpu"), arguments.get("limit", 50))
+            return [TextContent(type="text", text=json.dumps(rows, indent=2))]
 
         elif name == "k8s_top_nodes":
-            output, code = run_kubectl(["top", "nodes"])
-            return [TextContent(type="text", text=output)]
+            ensure_metrics_sampler()
+            rows = await top_nodes(arguments.get("sort_by", "cpu"))
+            return [TextContent(type="text", text=json.dumps(rows, indent=2))]
+
+        elif name == "k8s_top_history":
+            if METRICS_SAMPLE_INTERVAL <= 0:
+                return [TextContent(type="text", text="Error: metrics sampling is disabled (MCP_K8S_METRICS_SAMPLE_INTERVAL=0)")]
+            ensure_metrics_sampler()
+            result = metrics_trend(
+                arguments.get("kind", "pods"),
+                minutes=arguments.get("minutes", 15),
+                name=arguments.get("name"),
+                namespace=arguments.get("namespace"),
+                limit=arguments.get("limit", 20)
+            )
+            return [TextContent(type="text", text=json.dumps(result, indent=2))]
 
         elif name == "k8s_get_configmaps":
-            output, code = run_kubectl(["get", "configmaps", "-n", namespace, "-o", "json"])
-
-            if code != 0:
-                return [TextContent(type="text", text=f"Error: {output}")]
-
-            data = json.loads(output)
+            data = await kube_list("configmaps", namespace)
             cms = [{"name": cm["metadata"]["name"], "keys": list(cm.get("data", {}).keys())} for cm in data.get("items", [])]
 
             return [TextContent(type="text", text=json.dumps(cms, indent=2))]
 
         elif name == "k8s_get_secrets":
-            output, code = run_kubectl(["get", "secrets", "-n", namespace, "-o", "json"])
-
-            if code != 0:
-                return [TextContent(type="text", text=f"Error: {output}")]
+            # Only show names, not data! Listed as a Table, so secret values never leave the API server.
+            secrets, extra = await list_summaries("secrets", lambda s: {"name": s["metadata"]["name"], "type": s["type"]}, namespace)
 
-            data = json.loads(output)
-            # Only show names, not data!
-            secrets = [{"name": s["metadata"]["name"], "type": s["type"]} for s in data.get("items", [])]
-
-            return [TextContent(type="text", text=json.dumps(secrets, indent=2))]
+            return list_response(secrets, extra)
 
         elif name == "k8s_get_ingresses":
-            args = ["get", "ingresses"] + ns_args + ["-o", "json"]
-            output, code = run_kubectl(args)
-
-            if code != 0:
-                return [TextContent(type="text", text=f"Error: {output}")]
-
-            data = json.loads(output)
-            ingresses = []
-            for ing in data.get("items", []):
-                ingresses.append({
-                    "name": ing["metadata"]["name"],
-                    "namespace": ing["metadata"]["namespace"],
-                    "hosts": [r.get("host") for r in ing["spec"].get("rules", [])],
-                    "address": [lb.get("ip") or lb.get("hostname") for lb in ing["status"].get("loadBalancer", {}).get("ingress", [])]
-                })
+            data = await kube_list("ingresses", list_ns)
+            ingresses = [summarize_ingress(ing) for ing in data.get("items", [])]
 
             return [TextContent(type="text", text=json.dumps(ingresses, indent=2))]
 
@@ -446,12 +1907,16 @@ async def call_tool(name: str, arguments: dict) -> list:
             name_arg = arguments.get("name", "")
             output_format = arguments.get("output", "json")
 
+            if output_format == "json" and resource in RESOURCE_PATHS:
+                data = await kube_get(resource_path(resource, namespace, name_arg or None))
+                return [TextContent(type="text", text=json.dumps(data, indent=2)[:15000])]
+
             args = ["get", resource]
             if name_arg:
                 args.append(name_arg)
             args.extend(["-n", namespace, "-o", output_format])
 
-            output, code = run_kubectl(args)
+            output, code = await kubectl(args)
             return [TextContent(type="text", text=output[:15000])]
 
         # Write operations
@@ -459,26 +1924,47 @@ async def call_tool(name: str, arguments: dict) -> list:
             deployment = arguments.get("deployment")
             replicas = arguments.get("replicas")
 
-            output, code = run_kubectl(["scale", "deployment", deployment, f"--replicas={replicas}", "-n", namespace])
-            return [TextContent(type="text", text=output if code == 0 else f"Error: {output}")]
+            client = get_kube_client()
+            if client is None:
+                output, code = await kubectl(["scale", "deployment", deployment, f"--replicas={replicas}", "-n", namespace])
+                return [TextContent(type="text", text=output if code == 0 else f"Error: {output}")]
+
+            await client.request("PATCH", resource_path("deployments", namespace, deployment, "scale"),
+                                 body={"spec": {"replicas": replicas}},
+                                 content_type="application/merge-patch+json")
+            return [TextContent(type="text", text=f"deployment.apps/{deployment} scaled")]
 
         elif name == "k8s_restart" and not READONLY:
             deployment = arguments.get("deployment")
 
-            output, code = run_kubectl(["rollout", "restart", "deployment", deployment, "-n", namespace])
-            return [TextContent(type="text", text=output if code == 0 else f"Error: {output}")]
+            client = get_kube_client()
+            if client is None:
+                output, code = await kubectl(["rollout", "restart", "deployment", deployment, "-n", namespace])
+                return [TextContent(type="text", text=output if code == 0 else f"Error: {output}")]
+
+            # Same annotation `kubectl rollout restart` sets
+            restarted_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+            await client.request("PATCH", resource_path("deployments", namespace, deployment),
+                                 body={"spec": {"template": {"metadata": {"annotations": {"kubectl.kubernetes.io/restartedAt": restarted_at}}}}},
+                                 content_type="application/strategic-merge-patch+json")
+            return [TextContent(type="text", text=f"deployment.apps/{deployment} restarted")]
 
         elif name == "k8s_delete_pod" and not READONLY:
             pod = arguments.get("pod")
 
-            output, code = run_kubectl(["delete", "pod", pod, "-n", namespace])
-            return [TextContent(type="text", text=output if code == 0 else f"Error: {output}")]
+            client = get_kube_client()
+            if client is None:
+                output, code = await kubectl(["delete", "pod", pod, "-n", namespace])
+                return [TextContent(type="text", text=output if code == 0 else f"Error: {output}")]
+
+            await client.request("DELETE", resource_path("pods", namespace, pod))
+            return [TextContent(type="text", text=f'pod "{pod}" deleted')]
 
         else:
             return [TextContent(type="text", text=f"Unknown tool: {name}")]
 
     except json.JSONDecodeError as e:
-        return [TextContent(type="text", text=f"JSON parse error: {str(e)}\nRaw output: {output[:500]}")]
+        return [TextContent(type="text", text=f"JSON parse error: {str(e)}")]
     except Exception as e:
         return [TextContent(type="text", text=f"Error: {str(e)}")]
 
@@ -486,6 +1972,8 @@ if __name__ == "__main__":
     from mcp.server.stdio import stdio_server
 
     async def main():
+        # Sample from startup so k8s_top_history has data on its first call
+        ensure_metrics_sampler()
         async with stdio_server() as (read_stream, write_stream):
             await server.run(read_stream, write_stream, server.create_initialization_options())
 
@@ -4,8 +4,15 @@ Slack MCP Server for Codex CLI
 Send notifications and messages to Slack.
 """
 import os
+import re
+import sys
 import json
+import time
+import hashlib
+import uuid
+import random
 import asyncio
+from collections import OrderedDict, deque
 import httpx
 from mcp.server import Server
 from mcp.types import Tool, TextContent
@@ -14,9 +21,72 @@ from mcp.types import Tool, TextContent
 SLACK_WEBHOOK_URL = os.getenv("SLACK_WEBHOOK_URL", "")
 SLACK_BOT_TOKEN = os.getenv("SLACK_BOT_TOKEN", "")
 DEFAULT_CHANNEL = os.getenv("SLACK_DEFAULT_CHANNEL", "#alerts")
+RATE_PER_SEC = float(os.getenv("SLACK_RATE_PER_SEC", "1"))
+RATE_BURST = int(os.getenv("SLACK_RATE_BURST", "3"))
+MAX_ATTEMPTS = int(os.getenv("SLACK_MAX_ATTEMPTS", "5"))
+DEDUPE_WINDOW = int(os.getenv("SLACK_DEDUPE_WINDOW", "600"))
+DEDUPE_STATE = os.path.expanduser(os.getenv("SLACK_DEDUPE_STATE", "~/.codex/slack-dedupe.json"))
+CHANNEL_CACHE = os.path.expanduser(os.getenv("SLACK_CHANNEL_CACHE", "~/.codex/slack-channels.json"))
+CHANNEL_CACHE_TTL = int(os.getenv("SLACK_CHANNEL_CACHE_TTL", "3600"))
+WAIT_TIMEOUT = 30
+
+if RATE_PER_SEC <= 0:
+    raise ValueError("SLACK_RATE_PER_SEC must be greater than 0")
 
 server = Server("slack-mcp")
 
+# Delivery queue state: one queue, pending deque, token bucket and worker per
+# target ("webhook" or a channel), plus a bounded history of delivery records.
+_client = None
+_queues = {}
+_pending = {}
+_buckets = {}
+_workers = {}
+_deliveries = OrderedDict()
+MAX_DELIVERY_HISTORY = 500
+
+# Alert fingerprints seen within DEDUPE_WINDOW, persisted to DEDUPE_STATE
+_dedupe = None
+
+# Channel directory ({"loaded", "channels"}), persisted to CHANNEL_CACHE, and
+# every name -> (id, seen at) lookup learned from it or from partial walks
+_channels = None
+_channel_ids = {}
+_channel_lock = None
+
+def get_client() -> httpx.AsyncClient:
+    """Get the shared HTTP client, kept open across tool calls."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(timeout=10)
+    return _client
+
+class TokenBucket:
+    """Token bucket rate limiter that can also be paused for a Retry-After."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def pause(self, seconds: float):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            if now < self.paused_until:
+                await asyncio.sleep(self.paused_until - now)
+                continue
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
 @server.list_tools()
 async def list_tools():
     """List available tools."""
@@ -28,7 +98,8 @@ async def list_tools():
                 "type": "object",
                 "properties": {
                     "text": {"type": "string", "description": "Message text"},
-                    "blocks": {"type": "array", "description": "Slack Block Kit blocks (optional)"}
+                    "blocks": {"type": "array", "description": "Slack Block Kit blocks (optional)"},
+                    "wait": {"type": "boolean", "default": False, "description": "Wait for delivery instead of returning a delivery ID"}
                 },
                 "required": ["text"]
             }
@@ -41,7 +112,8 @@ async def list_tools():
                 "properties": {
                     "channel": {"type": "string", "description": "Channel ID or name"},
                     "text": {"type": "string"},
-                    "blocks": {"type": "array", "description": "Block Kit blocks"}
+                    "blocks": {"type": "array", "description": "Block Kit blocks"},
+                    "wait": {"type": "boolean", "default": False, "description": "Wait for delivery and return the Slack API response"}
                 },
                 "required": ["channel", "text"]
             }
@@ -55,7 +127,9 @@ async def list_tools():
                     "title": {"type": "string", "description": "Alert title"},
                     "message": {"type": "string", "description": "Alert message"},
                     "severity": {"type": "string", "enum": ["info", "warning", "error", "critical"], "default": "info"},
-                    "fields": {"type": "object", "description": "Additional fields as key-value pairs"}
+                    "fields": {"type": "object", "description": "Additional fields as key-value pairs"},
+                    "channel": {"type": "string", "description": "Channel when posting with the bot token (default SLACK_DEFAULT_CHANNEL)"},
+                    "wait": {"type": "boolean", "default": False, "description": "Wait for delivery instead of returning a delivery ID"}
                 },
                 "required": ["title", "message"]
             }
@@ -70,18 +144,46 @@ async def list_tools():
                     "description": {"type": "string"},
                     "severity": {"type": "string", "enum": ["P1", "P2", "P3", "P4"], "default": "P3"},
                     "service": {"type": "string", "description": "Affected service"},
-                    "runbook_url": {"type": "string", "description": "Link to runbook"}
+                    "runbook_url": {"type": "string", "description": "Link to runbook"},
+                    "channel": {"type": "string", "description": "Channel when posting with the bot token (default SLACK_DEFAULT_CHANNEL)"},
+                    "wait": {"type": "boolean", "default": False, "description": "Wait for delivery instead of returning a delivery ID"}
                 },
                 "required": ["title", "description"]
             }
         ),
         Tool(
             name="slack_list_channels",
-            description="List Slack channels (requires bot token)",
+            description="List Slack channels from the cached channel directory (requires bot token)",
             inputSchema={
                 "type": "object",
                 "properties": {
+                    "limit": {"type": "integer", "default": 20},
+                    "include_archived": {"type": "boolean", "default": False},
+                    "member_only": {"type": "boolean", "default": False, "description": "Only channels the bot is a member of"},
+                    "refresh": {"type": "boolean", "default": False, "description": "Reload the directory from Slack"}
+                }
+            }
+        ),
+        Tool(
+            name="slack_find_channel",
+            description="Find channels by name, name prefix or ID in the cached channel directory (requires bot token)",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "query": {"type": "string", "description": "Channel name, prefix (e.g., 'inc-') or ID"},
+                    "include_archived": {"type": "boolean", "default": False},
                     "limit": {"type": "integer", "default": 20}
+                },
+                "required": ["query"]
+            }
+        ),
+        Tool(
+            name="slack_delivery_status",
+            description="Check queued Slack deliveries (one delivery ID, or recent deliveries and queue depth)",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "delivery_id": {"type": "string", "description": "Delivery ID returned by a send tool"}
                 }
             }
         )
@@ -115,156 +217,559 @@ def get_severity_color(severity: str) -> str:
     }
     return colors.get(severity, "#808080")
 
+def build_digest(jobs: list) -> dict:
+    """Fold a burst of queued alerts into a single digest message."""
+    lines = [f"{job['summary']}" for job in jobs[:20]]
+    if len(jobs) > 20:
+        lines.append(f"...and {len(jobs) - 20} more")
+    return {
+        "text": f":bell: {len(jobs)} alerts",
+        "blocks": [
+            {"type": "header", "text": {"type": "plain_text", "text": f":bell: {len(jobs)} alerts"}},
+            {"type": "section", "text": {"type": "mrkdwn", "text": "\n".join(lines)[:3000]}}
+        ]
+    }
+
+async def post_to_slack(target: str, payload: dict, method: str = "chat.postMessage") -> tuple[int, float, dict]:
+    """Post a payload to the webhook or a channel.
+
+    Returns the HTTP status, the Retry-After delay (0 if none) and the
+    response body (the API JSON, or {"text": ...} for webhooks).
+    """
+    client = get_client()
+    if target == "webhook":
+        response = await client.post(SLACK_WEBHOOK_URL, json=payload)
+        result = {"text": response.text}
+    else:
+        response = await client.post(
+            f"https://slack.com/api/{method}",
+            json={"channel": target, **payload},
+            headers={"Authorization": f"Bearer {SLACK_BOT_TOKEN}"}
+        )
+        result = response.json() if response.status_code == 200 else {"text": response.text}
+    try:
+        retry_after = float(response.headers.get("Retry-After", 0) or 0)
+    except ValueError:
+        # HTTP-date form: fall back to the worker's own backoff
+        retry_after = 0.0
+    return response.status_code, retry_after, result
+
+def finish(jobs: list, status: str, result: dict = None, error: str = None):
+    """Mark jobs delivered or failed and wake any waiters."""
+    if status == "delivered" and result.get("ts"):
+        fps = {job["fingerprint"] for job in jobs if job.get("fingerprint")}
+        if len(fps) == 1:
+            # Remember where the message landed so duplicates can update it in place
+            remember_message(fps.pop(), result.get("channel"), result["ts"])
+        else:
+            # A digest of different alerts can't be rewritten for one of them:
+            # let their next repeat post afresh
+            for fp in fps:
+                forget_fingerprint(fp)
+    if status == "failed":
+        # Nothing was posted: let the next attempt through instead of suppressing it
+        for job in jobs:
+            if job.get("fingerprint"):
+                forget_fingerprint(job["fingerprint"])
+    for job in jobs:
+        job["status"] = status
+        job["result"] = result
+        job["error"] = error
+        job["finished"] = time.time()
+        job["done"].set()
+
+async def delivery_worker(target: str):
+    """Deliver queued messages for one target, rate limited by its token bucket.
+
+    Alerts with the same coalesce key that pile up while the worker waits for
+    a token are folded into one digest, so a burst costs a single Slack call.
+    """
+    queue = _queues[target]
+    bucket = _buckets[target]
+    pending = _pending[target]
+
+    while True:
+        if not pending:
+            pending.append(await queue.get())
+        await bucket.acquire()
+        while not queue.empty():
+            pending.append(queue.get_nowait())
+
+        first = pending.popleft()
+        group = [first]
+        if first["coalesce"]:
+            group += [job for job in pending if job["coalesce"] == first["coalesce"]]
+            rest = [job for job in pending if job["coalesce"] != first["coalesce"]]
+            pending.clear()
+            pending.extend(rest)
+        payload = first["payload"] if len(group) == 1 else build_digest(group)
+        for job in group:
+            job["attempts"] += 1
+            job["status"] = "sending"
+
+        try:
+            status, retry_after, result = await post_to_slack(target, payload, first["method"])
+        except httpx.HTTPError as e:
+            status, retry_after, result = 0, 0, {"error": str(e)}
+        except Exception as e:
+            # Unexpected response (e.g. a non-JSON body): fail this group, keep the worker alive
+            finish(group, "failed", {}, f"{type(e).__name__}: {e}")
+            continue
+
+        if status == 200 and (target == "webhook" or result.get("ok")):
+            if len(group) > 1:
+                for job in group:
+                    job["digest_of"] = len(group)
+            finish(group, "delivered", result)
+            continue
+
+        error = result.get("error") or result.get("text") or f"HTTP {status}"
+        # Retry on rate limits, server errors and network failures; API errors are final
+        retryable = status == 429 or status == 0 or status >= 500
+        if retryable and first["attempts"] < MAX_ATTEMPTS:
+            bucket.pause(retry_after or min(30.0, 2 ** first["attempts"]) * (0.5 + random.random()))
+            for job in reversed(group):
+                job["status"] = "queued"
+                pending.appendleft(job)
+        else:
+            finish(group, "failed", result, error)
+
+def enqueue(target: str, payload: dict, coalesce: str = "", summary: str = "",
+            method: str = "chat.postMessage", fingerprint: str = None) -> dict:
+    """Queue a message for background delivery and return its delivery record.
+
+    Queued jobs sharing a non-empty coalesce key may be sent as one digest.
+    """
+    if target not in _queues:
+        _queues[target] = asyncio.Queue()
+        _pending[target] = deque()
+        _buckets[target] = TokenBucket(RATE_PER_SEC, RATE_BURST)
+    worker = _workers.get(target)
+    if worker is None or worker.done():
+        _workers[target] = asyncio.create_task(delivery_worker(target))
+
+    job = {
+        "id": uuid.uuid4().hex[:12],
+        "target": target,
+        "payload": payload,
+        "coalesce": coalesce,
+        "summary": summary,
+        "method": method,
+        "fingerprint": fingerprint,
+        "status": "queued",
+        "attempts": 0,
+        "queued": time.time(),
+        "done": asyncio.Event()
+    }
+    _deliveries[job["id"]] = job
+    while len(_deliveries) > MAX_DELIVERY_HISTORY:
+        _deliveries.popitem(last=False)
+    _queues[target].put_nowait(job)
+    return job
+
+def describe_delivery(job: dict) -> dict:
+    """Public view of a delivery record."""
+    info = {k: job.get(k) for k in ("id", "target", "status", "attempts", "error", "digest_of") if job.get(k) is not None}
+    if job.get("finished"):
+        info["latency_s"] = round(job["finished"] - job["queued"], 2)
+    return info
+
+async def queued_response(job: dict, label: str, wait: bool) -> list:
+    """Tool response for a queued delivery, optionally waiting for the outcome."""
+    if wait:
+        try:
+            await asyncio.wait_for(job["done"].wait(), WAIT_TIMEOUT)
+        except asyncio.TimeoutError:
+            pass
+        if job["status"] == "delivered" and job["target"] != "webhook":
+            return [TextContent(type="text", text=json.dumps(job["result"], indent=2))]
+    return [TextContent(type="text", text=f"{label} {job['status']}: {json.dumps(describe_delivery(job))}")]
+
+def fingerprint(*parts: str) -> str:
+    """Fingerprint an alert, ignoring case, whitespace, numbers and ids."""
+    text = "\x1f".join(str(p) for p in parts).lower()
+    text = re.sub(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}", "#", text)
+    text = re.sub(r"\b0x[0-9a-f]+\b|\d+(\.\d+)?", "#", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+def load_dedupe() -> dict:
+    """Load the fingerprint state from disk once, dropping expired entries.
+
+    Entries expire a window after the first post, so an alert that keeps
+    firing is re-posted once per window instead of being suppressed forever.
+    """
+    global _dedupe
+    if _dedupe is None:
+        try:
+            with open(DEDUPE_STATE) as f:
+                _dedupe = json.load(f)
+        except (OSError, ValueError):
+            _dedupe = {}
+    now = time.time()
+    for fp in [fp for fp, entry in _dedupe.items() if now - entry["first"] > DEDUPE_WINDOW]:
+        del _dedupe[fp]
+    return _dedupe
+
+def save_dedupe():
+    """Write the fingerprint state atomically."""
+    try:
+        os.makedirs(os.path.dirname(DEDUPE_STATE), exist_ok=True)
+        tmp = f"{DEDUPE_STATE}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(_dedupe, f)
+        os.replace(tmp, DEDUPE_STATE)
+    except OSError:
+        pass
+
+def check_duplicate(fp: str):
+    """Count a fingerprint. Returns its entry if it repeats within the window."""
+    if DEDUPE_WINDOW <= 0:
+        return None
+    state = load_dedupe()
+    now = time.time()
+    entry = state.get(fp)
+    if entry:
+        entry["count"] += 1
+        entry["last"] = now
+    else:
+        state[fp] = {"first": now, "last": now, "count": 1}
+    save_dedupe()
+    return entry
+
+def remember_message(fp: str, channel: str, ts: str):
+    """Attach the posted message location to a fingerprint."""
+    entry = load_dedupe().get(fp)
+    if entry:
+        entry["channel"] = channel
+        entry["ts"] = ts
+        save_dedupe()
+
+def forget_fingerprint(fp: str):
+    """Drop a fingerprint whose first message was never delivered."""
+    state = load_dedupe()
+    if fp in state and not state[fp].get("ts"):
+        del state[fp]
+        save_dedupe()
+
+async def channel_pages():
+    """Yield conversation pages with cursor pagination, honoring Retry-After."""
+    cursor = None
+    while True:
+        params = {"limit": 1000, "types": "public_channel,private_channel"}
+        if cursor:
+            params["cursor"] = cursor
+        response = await get_client().get(
+            "https://slack.com/api/conversations.list",
+            params=params,
+            headers={"Authorization": f"Bearer {SLACK_BOT_TOKEN}"}
+        )
+        if response.status_code == 429:
+            await asyncio.sleep(float(response.headers.get("Retry-After", 1)))
+            continue
+        data = response.json()
+        if not data.get("ok"):
+            raise RuntimeError(data.get("error"))
+        yield [{
+            "id": c["id"],
+            "name": c["name"],
+            "is_private": c.get("is_private", False),
+            "is_archived": c.get("is_archived", False),
+            "is_member": c.get("is_member", False),
+            "members": c.get("num_members")
+        } for c in data.get("channels", [])]
+        cursor = data.get("response_metadata", {}).get("next_cursor")
+        if not cursor:
+            return
+
+async def fetch_channels() -> list:
+    """List every conversation."""
+    return [c async for page in channel_pages() for c in page]
+
+def channel_lock() -> asyncio.Lock:
+    """Lock guarding the channel directory, created on first use."""
+    global _channel_lock
+    if _channel_lock is None:
+        _channel_lock = asyncio.Lock()
+    return _channel_lock
+
+def remember_channels(channels: list, loaded: float):
+    """Record name -> ID lookups seen at the given time."""
+    for c in channels:
+        _channel_ids[c["name"]] = (c["id"], loaded)
+
+def read_channel_cache():
+    """Load the persisted channel directory, if any. Call under the lock."""
+    global _channels
+    try:
+        with open(CHANNEL_CACHE) as f:
+            _channels = json.load(f)
+        remember_channels(_channels["channels"], _channels["loaded"])
+    except (OSError, ValueError, KeyError):
+        pass
+
+def store_channels(channels: list):
+    """Replace the channel directory and persist it. Call under the lock."""
+    global _channels
+    _channels = {"loaded": time.time(), "channels": channels}
+    remember_channels(channels, _channels["loaded"])
+    try:
+        os.makedirs(os.path.dirname(CHANNEL_CACHE), exist_ok=True)
+        tmp = f"{CHANNEL_CACHE}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(_channels, f)
+        os.replace(tmp, CHANNEL_CACHE)
+    except OSError:
+        pass
+
+async def load_channels(refresh: bool = False) -> list:
+    """Return the channel directory, reloading it after CHANNEL_CACHE_TTL."""
+    async with channel_lock():
+        if _channels is None and not refresh:
+            read_channel_cache()
+        if refresh or _channels is None or time.time() - _channels["loaded"] > CHANNEL_CACHE_TTL:
+            store_channels(await fetch_channels())
+        return _channels["channels"]
+
+async def resolve_channel(channel: str) -> str:
+    """Resolve a channel name to its ID.
+
+    IDs pass through unchanged. Names are looked up among channels seen
+    within CHANNEL_CACHE_TTL; otherwise the directory is paged only until
+    the name turns up (unless a full listing under a minute old already
+    lacks it). Names that do not resolve, or cannot be looked up at all
+    (e.g. a chat:write-only token without channels:read), are passed to
+    Slack as-is.
+    """
+    if re.fullmatch(r"[CGD][A-Z0-9]{8,}", channel):
+        return channel
+    name = channel.lstrip("#").lower()
+    try:
+        async with channel_lock():
+            if _channels is None:
+                read_channel_cache()
+            cached = _channel_ids.get(name)
+            if cached and time.time() - cached[1] < CHANNEL_CACHE_TTL:
+                return cached[0]
+            if _channels and time.time() - _channels["loaded"] < 60:
+                return channel
+
+            seen = []
+            pages = channel_pages()
+            try:
+                async for page in pages:
+                    seen += page
+                    remember_channels(page, time.time())
+                    if any(c["name"] == name for c in page):
+                        return _channel_ids[name][0]
+            finally:
+                await pages.aclose()
+            # Walked the whole directory without a match: keep it as the listing
+            store_channels(seen)
+    except Exception as e:
+        print(f"slack-mcp: channel directory unavailable ({e}), sending to {channel} unresolved", file=sys.stderr)
+    return channel
+
+def find_channels(channels: list, query: str) -> list:
+    """Match channels by ID, exact name, then name prefix."""
+    query = query.lstrip("#").lower()
+    exact = [c for c in channels if c["name"] == query or c["id"].lower() == query]
+    prefix = sorted((c for c in channels if c["name"].startswith(query) and c not in exact), key=lambda c: c["name"])
+    return exact + prefix
+
+async def notification_target(arguments: dict) -> str:
+    """Alerts go through the bot (so they can be updated) when a token is set."""
+    if SLACK_BOT_TOKEN:
+        return await resolve_channel(arguments.get("channel") or DEFAULT_CHANNEL)
+    return "webhook"
+
+async def send_notification(arguments: dict, payload: dict, fp: str, label: str,
+                            summary: str = "", group: str = "") -> list:
+    """Queue an alert or incident, folding repeats of a recent one into it."""
+    entry = check_duplicate(fp)
+    if entry is None:
+        job = enqueue(await notification_target(arguments), payload, coalesce=group, summary=summary, fingerprint=fp)
+        return await queued_response(job, label, arguments.get("wait", False))
+
+    count = entry["count"]
+    if SLACK_BOT_TOKEN and entry.get("ts"):
+        last = time.strftime("%H:%M:%S UTC", time.gmtime(entry["last"]))
+        updated = dict(payload)
+        updated["blocks"] = payload["blocks"] + [{
+            "type": "context",
+            "elements": [{"type": "mrkdwn", "text": f":repeat: Repeated {count} times, last at {last}"}]
+        }]
+        updated["text"] = f"{payload['text']} (x{count})"
+        job = enqueue(entry["channel"], {"ts": entry["ts"], **updated}, method="chat.update")
+        return [TextContent(type="text", text=f"{label} duplicate (x{count}): original message updated, delivery {job['id']}")]
+
+    return [TextContent(type="text", text=f"{label} suppressed: duplicate seen {count} times in the last {DEDUPE_WINDOW}s")]
+
 @server.call_tool()
 async def call_tool(name: str, arguments: dict) -> list:
     """Execute tool calls."""
     try:
-        async with httpx.AsyncClient(timeout=10) as client:
+        wait = arguments.get("wait", False)
+
+        if name == "slack_send_webhook":
+            if not SLACK_WEBHOOK_URL:
+                return [TextContent(type="text", text="Error: SLACK_WEBHOOK_URL not configured")]
+
+            text = arguments.get("text")
+            blocks = arguments.get("blocks")
+
+            payload = {"text": text}
+            if blocks:
+                payload["blocks"] = blocks
+
+            job = enqueue("webhook", payload)
+            return await queued_response(job, "Message", wait)
 
-            if name == "slack_send_webhook":
-                if not SLACK_WEBHOOK_URL:
-                    return [TextContent(type="text", text="Error: SLACK_WEBHOOK_URL not configured")]
+        elif name == "slack_send_message":
+            if not SLACK_BOT_TOKEN:
+                return [TextContent(type="text", text="Error: SLACK_BOT_TOKEN not configured")]
 
-                text = arguments.get("text")
-                blocks = arguments.get("blocks")
+            channel = arguments.get("channel")
+            text = arguments.get("text")
+            blocks = arguments.get("blocks")
 
-                payload = {"text": text}
-                if blocks:
-                    payload["blocks"] = blocks
+            payload = {"text": text}
+            if blocks:
+                payload["blocks"] = blocks
 
-                response = await client.post(SLACK_WEBHOOK_URL, json=payload)
-                return [TextContent(type="text", text=f"Sent: {response.status_code} - {response.text}")]
+            job = enqueue(await resolve_channel(channel), payload)
+            return await queued_response(job, "Message", wait)
 
-            elif name == "slack_send_message":
-                if not SLACK_BOT_TOKEN:
-                    return [TextContent(type="text", text="Error: SLACK_BOT_TOKEN not configured")]
+        elif name == "slack_alert":
+            if not SLACK_WEBHOOK_URL and not SLACK_BOT_TOKEN:
+                return [TextContent(type="text", text="Error: SLACK_WEBHOOK_URL or SLACK_BOT_TOKEN not configured")]
 
-                channel = arguments.get("channel")
-                text = arguments.get("text")
-                blocks = arguments.get("blocks")
+            title = arguments.get("title")
+            message = arguments.get("message")
+            severity = arguments.get("severity", "info")
+            fields = arguments.get("fields", {})
 
-                payload = {
-                    "channel": channel,
-                    "text": text
+            emoji = get_severity_emoji(severity)
+            color = get_severity_color(severity)
+
+            blocks = [
+                {
+                    "type": "header",
+                    "text": {"type": "plain_text", "text": f"{emoji} {title}"}
+                },
+                {
+                    "type": "section",
+                    "text": {"type": "mrkdwn", "text": message}
                 }
-                if blocks:
-                    payload["blocks"] = blocks
-
-                response = await client.post(
-                    "https://slack.com/api/chat.postMessage",
-                    json=payload,
-                    headers={"Authorization": f"Bearer {SLACK_BOT_TOKEN}"}
-                )
-                return [TextContent(type="text", text=json.dumps(response.json(), indent=2))]
-
-            elif name == "slack_alert":
-                if not SLACK_WEBHOOK_URL:
-                    return [TextContent(type="text", text="Error: SLACK_WEBHOOK_URL not configured")]
-
-                title = arguments.get("title")
-                message = arguments.get("message")
-                severity = arguments.get("severity", "info")
-                fields = arguments.get("fields", {})
-
-                emoji = get_severity_emoji(severity)
-                color = get_severity_color(severity)
-
-                blocks = [
-                    {
-                        "type": "header",
-                        "text": {"type": "plain_text", "text": f"{emoji} {title}"}
-                    },
-                    {
-                        "type": "section",
-                        "text": {"type": "mrkdwn", "text": message}
-                    }
-                ]
-
-                if fields:
-                    field_blocks = []
-                    for key, value in fields.items():
-                        field_blocks.append({
-                            "type": "mrkdwn",
-                            "text": f"*{key}:*\n{value}"
-                        })
-                    blocks.append({
-                        "type": "section",
-                        "fields": field_blocks[:10]  # Max 10 fields
+            ]
+
+            if fields:
+                field_blocks = []
+                for key, value in fields.items():
+                    field_blocks.append({
+                        "type": "mrkdwn",
+                        "text": f"*{key}:*\n{value}"
                     })
+                blocks.append({
+                    "type": "section",
+                    "fields": field_blocks[:10]  # Max 10 fields
+                })
+
+            payload = {
+                "text": f"{emoji} {title}: {message}",
+                "blocks": blocks,
+                "attachments": [{"color": color, "blocks": []}]
+            }
 
-                payload = {
-                    "text": f"{emoji} {title}: {message}",
-                    "blocks": blocks,
-                    "attachments": [{"color": color, "blocks": []}]
-                }
+            fp = fingerprint("alert", title, severity, message)
+            # Bursts of the same alert (title and severity, numbers ignored) share a digest
+            return await send_notification(arguments, payload, fp, "Alert", summary=f"{emoji} *{title}*: {message[:200]}",
+                                           group=fingerprint("alert", title, severity))
 
-                response = await client.post(SLACK_WEBHOOK_URL, json=payload)
-                return [TextContent(type="text", text=f"Alert sent: {response.status_code}")]
-
-            elif name == "slack_incident":
-                if not SLACK_WEBHOOK_URL:
-                    return [TextContent(type="text", text="Error: SLACK_WEBHOOK_URL not configured")]
-
-                title = arguments.get("title")
-                description = arguments.get("description")
-                severity = arguments.get("severity", "P3")
-                service = arguments.get("service", "Unknown")
-                runbook_url = arguments.get("runbook_url", "")
-
-                emoji = get_severity_emoji(severity)
-                color = get_severity_color(severity)
-
-                blocks = [
-                    {
-                        "type": "header",
-                        "text": {"type": "plain_text", "text": f"{emoji} INCIDENT: {title}"}
-                    },
-                    {
-                        "type": "section",
-                        "fields": [
-                            {"type": "mrkdwn", "text": f"*Severity:*\n{severity}"},
-                            {"type": "mrkdwn", "text": f"*Service:*\n{service}"}
-                        ]
-                    },
-                    {
-                        "type": "section",
-                        "text": {"type": "mrkdwn", "text": f"*Description:*\n{description}"}
-                    }
-                ]
-
-                if runbook_url:
-                    blocks.append({
-                        "type": "section",
-                        "text": {"type": "mrkdwn", "text": f":book: <{runbook_url}|View Runbook>"}
-                    })
+        elif name == "slack_incident":
+            if not SLACK_WEBHOOK_URL and not SLACK_BOT_TOKEN:
+                return [TextContent(type="text", text="Error: SLACK_WEBHOOK_URL or SLACK_BOT_TOKEN not configured")]
 
-                payload = {
-                    "text": f"{emoji} INCIDENT [{severity}]: {title}",
-                    "blocks": blocks,
-                    "attachments": [{"color": color, "blocks": []}]
+            title = arguments.get("title")
+            description = arguments.get("description")
+            severity = arguments.get("severity", "P3")
+            service = arguments.get("service", "Unknown")
+            runbook_url = arguments.get("runbook_url", "")
+
+            emoji = get_severity_emoji(severity)
+            color = get_severity_color(severity)
+
+            blocks = [
+                {
+                    "type": "header",
+                    "text": {"type": "plain_text", "text": f"{emoji} INCIDENT: {title}"}
+                },
+                {
+                    "type": "section",
+                    "fields": [
+                        {"type": "mrkdwn", "text": f"*Severity:*\n{severity}"},
+                        {"type": "mrkdwn", "text": f"*Service:*\n{service}"}
+                    ]
+                },
+                {
+                    "type": "section",
+                    "text": {"type": "mrkdwn", "text": f"*Description:*\n{description}"}
                 }
+            ]
+
+            if runbook_url:
+                blocks.append({
+                    "type": "section",
+                    "text": {"type": "mrkdwn", "text": f":book: <{runbook_url}|View Runbook>"}
+                })
+
+            payload = {
+                "text": f"{emoji} INCIDENT [{severity}]: {title}",
+                "blocks": blocks,
+                "attachments": [{"color": color, "blocks": []}]
+            }
 
-                response = await client.post(SLACK_WEBHOOK_URL, json=payload)
-                return [TextContent(type="text", text=f"Incident notification sent: {response.status_code}")]
-
-            elif name == "slack_list_channels":
-                if not SLACK_BOT_TOKEN:
-                    return [TextContent(type="text", text="Error: SLACK_BOT_TOKEN not configured")]
-
-                limit = arguments.get("limit", 20)
-                response = await client.get(
-                    "https://slack.com/api/conversations.list",
-                    params={"limit": limit, "types": "public_channel,private_channel"},
-                    headers={"Authorization": f"Bearer {SLACK_BOT_TOKEN}"}
-                )
-                data = response.json()
-                if data.get("ok"):
-                    channels = [{"id": c["id"], "name": c["name"]} for c in data.get("channels", [])]
-                    return [TextContent(type="text", text=json.dumps(channels, indent=2))]
-                return [TextContent(type="text", text=f"Error: {data.get('error')}")]
-
-            else:
-                return [TextContent(type="text", text=f"Unknown tool: {name}")]
+            # Incidents are never folded into digests (no coalesce group)
+            fp = fingerprint("incident", title, severity, service, description)
+            return await send_notification(arguments, payload, fp, "Incident notification")
+
+        elif name == "slack_list_channels":
+            if not SLACK_BOT_TOKEN:
+                return [TextContent(type="text", text="Error: SLACK_BOT_TOKEN not configured")]
+
+            limit = arguments.get("limit", 20)
+            channels = await load_channels(arguments.get("refresh", False))
+            if not arguments.get("include_archived", False):
+                channels = [c for c in channels if not c["is_archived"]]
+            if arguments.get("member_only", False):
+                channels = [c for c in channels if c["is_member"]]
+            return [TextContent(type="text", text=json.dumps(channels[:limit], indent=2))]
+
+        elif name == "slack_find_channel":
+            if not SLACK_BOT_TOKEN:
+                return [TextContent(type="text", text="Error: SLACK_BOT_TOKEN not configured")]
+
+            channels = await load_channels()
+            if not arguments.get("include_archived", False):
+                channels = [c for c in channels if not c["is_archived"]]
+            matches = find_channels(channels, arguments.get("query", ""))
+            return [TextContent(type="text", text=json.dumps(matches[:arguments.get("limit", 20)], indent=2))]
+
+        elif name == "slack_delivery_status":
+            delivery_id = arguments.get("delivery_id")
+            if delivery_id:
+                job = _deliveries.get(delivery_id)
+                if not job:
+                    return [TextContent(type="text", text=f"Error: unknown delivery ID {delivery_id}")]
+                return [TextContent(type="text", text=json.dumps(describe_delivery(job), indent=2))]
+
+            return [TextContent(type="text", text=json.dumps({
+                "queued": {target: queue.qsize() + len(_pending[target]) for target, queue in _queues.items()},
+                "recent": [describe_delivery(job) for job in list(_deliveries.values())[-20:]]
+            }, indent=2))]
+
+        else:
+            return [TextContent(type="text", text=f"Unknown tool: {name}")]
 
     except Exception as e:
         return [TextContent(type="text", text=f"Error: {str(e)}")]